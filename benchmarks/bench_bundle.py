@@ -0,0 +1,156 @@
+"""
+create_map's bundle against a stand-in for the cdns: every url index.html loads, and the fonts its stylesheets
+load, served by a local http server. the requests and hosts a page load makes, and the bytes, with the assets
+on the cdns, vendored a file each, and concatenated and minified. and the first build, fetching, against the
+next, from the cache
+
+    python benchmarks/bench_bundle.py
+"""
+import contextlib
+import functools
+import gzip
+import http.server
+import io
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_incremental import LINK_ATTR_MAP, NODE_ATTR_MAP  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from bundle_assets import find_assets  # noqa: E402
+from fetch_cache import url_transport  # noqa: E402
+from map_utils import create_map  # noqa: E402
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def local_path(url: str) -> str:
+    "where the stand-in serves an url: /host/path. the assets differ by their paths, the queries are left out"
+    parts = urlsplit(url)
+    return f"/{parts.netloc}{parts.path}"
+
+
+def fake_script(rng, n_bytes: int) -> str:
+    lines = ["/*! vendored library, MIT license */"]
+    while sum(map(len, lines)) < n_bytes:
+        name = "".join(rng.choice(list("abcdefghij"), 8))
+        lines.append(f"// {name} helper\nfunction {name}(a, b) {{ return a + b * {rng.integers(100)}; }}")
+    return "\n".join(lines) + "\n//# sourceMappingURL=lib.min.js.map\n"
+
+
+def fake_style(rng, n_rules: int, fonts: str) -> str:
+    rules = [f"/* generated */\n@charset \"UTF-8\";\n{fonts}"]
+    for i in range(n_rules):
+        rules.append(f".c{i}  >  .d{i} {{\n    color: #{rng.integers(1 << 24):06x};\n    margin: {i % 7}px 0;\n}}\n")
+    return "".join(rules)
+
+
+def cdn(folder: str, page: str, rng):
+    "every asset of the page, and the fonts and images its stylesheets load, under folder"
+    font = "@font-face {{ font-family: 'F'; src: url('{0}?v=4.4.0'); src: url('{0}?#iefix&v=4.4.0') format('embedded-opentype'); }}\n"
+    files = {}
+    for asset in find_assets(page):
+        url = asset["url"]
+        if asset["kind"] == "script":
+            files[url] = fake_script(rng, int(rng.integers(2_000, 60_000)))
+        elif asset["kind"] == "style":
+            files[url] = fake_style(rng, 300, font.format("../fonts/webfont.eot") if "font-awesome" in url else "")
+            if "googleapis" in url:
+                files[url] += "@font-face { font-family: 'G'; src: url(https://fonts.gstatic.com/s/g/v1/g.woff2) format('woff2'); }\n"
+            if url.endswith("vendor.css"):
+                files[url] = "@import url('vendor-extra.css');\n" + files[url]
+                files[url.replace("vendor.css", "vendor-extra.css")] = fake_style(rng, 50, ".x { background: url(../img/bg.png); }\n")
+        else:
+            files[url] = "<div>partial</div>" if asset["kind"] == "include" else "icon"
+    for url in ["https://maxcdn.bootstrapcdn.com/font-awesome/4.4.0/fonts/webfont.eot", "https://fonts.gstatic.com/s/g/v1/g.woff2", "http://mappr-player.s3.us-east-1.amazonaws.com/img/bg.png"]:
+        files[url] = rng.bytes(20_000)
+    for url, data in files.items():
+        path = Path(folder + local_path(url))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data if isinstance(data, bytes) else data.encode("utf-8"))
+    return files
+
+
+def page_load(out_dir: Path, page: str, files) -> tuple:
+    "the requests, hosts and bytes (raw and gzipped) of the assets a page load fetches, fonts included"
+    loaded = {}
+
+    def load(ref: str, base: str):
+        key = urldefrag(urljoin(base, ref))[0]
+        if key in loaded:
+            return
+        if "://" not in key:
+            data = (out_dir / urlsplit(key).path).read_bytes()
+        else:
+            data = files[key] if key in files else files[key.split("?")[0]]
+        loaded[key] = data if isinstance(data, bytes) else data.encode("utf-8")
+        if key.split("?")[0].endswith(".css") or "/css" in key:
+            for ref in re.findall(r"url\(\s*['\"]?([^'\")]+?)['\"]?\s*\)", loaded[key].decode("utf-8", errors="replace")):
+                if not ref.startswith("data:"):
+                    load(ref, key)
+
+    for m in re.finditer(r"(?:src|href)=\"(assets/[^\"]+)\"|'(assets/[^']+)'", page):
+        load(m.group(1) or m.group(2), "")
+    for asset in find_assets(page):
+        load(asset["url"], "")
+    hosts = {urlsplit(key).netloc or "the map folder" for key in loaded}
+    blobs = list(loaded.values())
+    return len(loaded), len(hosts), sum(map(len, blobs)), sum(len(gzip.compress(blob, 6)) for blob in blobs)
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    page = (ROOT / "src" / "index.html").read_text(encoding="utf-8")
+    with tempfile.TemporaryDirectory() as tmp:
+        files = cdn(f"{tmp}/cdn", page, np.random.default_rng(0))
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=f"{tmp}/cdn"))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        fetched = []
+
+        def transport(url: str) -> bytes:
+            fetched.append(url)
+            return url_transport(f"http://127.0.0.1:{server.server_port}{local_path(url)}")
+
+        n_rows = 1_000
+        synthetic_datapoints(n_rows).to_csv(f"{tmp}/nodes.csv", index=False)
+        synthetic_links(5 * n_rows, n_nodes=n_rows).to_csv(f"{tmp}/links.csv", index=False)
+        with open(f"{tmp}/node_attrs.csv", "w") as f:
+            f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items()))
+
+        runs = [
+            ("cdns", {}),
+            ("a file each", {"cache": f"{tmp}/cache", "transport": transport}),
+            ("cached", {"cache": f"{tmp}/cache", "transport": transport}),
+            ("concat+minify", {"cache": f"{tmp}/cache", "transport": transport, "concat": True, "minify": True}),
+        ]
+        for n, (name, bundle) in enumerate(runs):
+            fetched.clear()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                create_map(
+                    f"{tmp}/nodes.csv", f"{tmp}/links.csv", f"{tmp}/node_attrs.csv", NODE_ATTR_MAP, LINK_ATTR_MAP,
+                    outFolder=f"{tmp}/out{n}", incremental=False, bundle=bundle,
+                )
+            elapsed = time.perf_counter() - start
+            out_dir = Path(f"{tmp}/out{n}")
+            requests, hosts, raw, gz = page_load(out_dir, (out_dir / "index.html").read_text(encoding="utf-8"), files)
+            print(
+                f"\t{name:<14} build {elapsed:5.2f}s, {len(fetched):>2} fetched. page load: {requests:>2} requests"
+                f" to {hosts} hosts, {raw / 2 ** 10:7.1f}KB ({gz / 2 ** 10:6.1f}KB gz)"
+            )
+        server.shutdown()
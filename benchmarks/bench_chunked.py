@@ -0,0 +1,103 @@
+"""
+check that create_map(chunksize=...) writes the same files as the in-memory build, on a sheet
+with the columns that are awkward to read in chunks, and compare the peak RSS of both builds
+
+    python benchmarks/bench_chunked.py [n_links] [chunksize]
+"""
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_incremental import LINK_ATTR_MAP, NODE_ATTR_MAP  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from map_utils import create_map  # noqa: E402
+
+FILES = ["nodes.json", "links.json"]
+
+# columns whose inferred dtype depends on rows far apart: gaps only near the end, booleans with
+# gaps, numbers declared as strings with one text value, a column empty in most chunks
+AWKWARD_TYPES = {**ATTR_TYPES, "late_gap": "integer", "flag": "string", "code": "string", "sparse": "float", "exact": "float"}
+
+
+def awkward_datapoints(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    df = synthetic_datapoints(n)
+    late_gap = rng.integers(0, 100, size=n).astype(float)
+    late_gap[-1] = np.nan
+    flag = rng.choice(["True", "False"], size=n).astype(object)
+    flag[n // 2] = np.nan
+    code = rng.integers(0, 50, size=n).astype(str).astype(object)
+    code[-2] = "n/a"
+    sparse = np.full(n, np.nan)
+    sparse[n // 3] = 0.1
+    exact = rng.integers(0, 8, size=n) / 4
+    df["x_tsne"] = np.where(np.arange(n) < n // 2, 0.0, df["x_tsne"])  # a long run equal to the node template
+    return df.assign(late_gap=late_gap, flag=flag, code=code, sparse=sparse, exact=exact)
+
+
+def write_inputs(tmp: str, df_datapoints: pd.DataFrame, n_links: int, attrTypes):
+    df_datapoints.to_csv(f"{tmp}/nodes.csv", index=False)
+    synthetic_links(n_links, n_nodes=len(df_datapoints)).to_csv(f"{tmp}/links.csv", index=False)
+    with open(f"{tmp}/node_attrs.csv", "w") as f:
+        f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in attrTypes.items()))
+
+
+def build(tmp: str, outFolder: str, chunksize):
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(
+            f"{tmp}/nodes.csv",
+            f"{tmp}/links.csv",
+            f"{tmp}/node_attrs.csv",
+            NODE_ATTR_MAP,
+            LINK_ATTR_MAP,
+            outFolder=f"{tmp}/{outFolder}",
+            incremental=False,
+            chunksize=chunksize,
+        )
+
+
+def same_files(tmp: str, a: str, b: str) -> bool:
+    return all((Path(tmp) / a / "data" / f).read_bytes() == (Path(tmp) / b / "data" / f).read_bytes() for f in FILES)
+
+
+def peak_rss_mb(tmp: str, chunksize) -> float:
+    # a fresh process per build, so the peaks do not mix. VmHWM and not ru_maxrss, which a child
+    # inherits from this process, that held the generated sheets
+    code = (
+        f"import re, sys; sys.path[:0] = {[str(ROOT / 'src'), str(ROOT / 'benchmarks')]!r}\n"
+        f"from bench_chunked import build; build({tmp!r}, 'rss', {chunksize!r})\n"
+        "print(int(re.search(r'VmHWM:\\s+(\\d+)', open('/proc/self/status').read()).group(1)) / 1024)"
+    )
+    return float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    n_links = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_inputs(tmp, awkward_datapoints(3000), 20_000, AWKWARD_TYPES)
+        build(tmp, "whole", None)
+        for size in [1, 7, 1000, 5000]:
+            build(tmp, f"chunks_{size}", size)
+            print(f"awkward sheet, chunksize={size}: {'identical' if same_files(tmp, 'whole', f'chunks_{size}') else 'DIFFERENT'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_inputs(tmp, synthetic_datapoints(n_links // 10), n_links, ATTR_TYPES)
+        sizes = ", ".join(f"{f} {os.path.getsize(f'{tmp}/{f}') / 2 ** 20:.0f}MB" for f in ["nodes.csv", "links.csv"])
+        print(f"{n_links // 10} nodes, {n_links} links ({sizes})")
+        print(f"\t      whole: peak RSS {peak_rss_mb(tmp, None):7.1f}MB")
+        print(f"\tchunks {chunksize}: peak RSS {peak_rss_mb(tmp, chunksize):7.1f}MB")
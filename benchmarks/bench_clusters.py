@@ -0,0 +1,47 @@
+"""
+build time of the coarse cluster networks (create_map clusters) against the size of the map, and the
+nodes and links the player draws zoomed out, with and without them
+
+    python benchmarks/bench_clusters.py [max_nodes]
+"""
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import synthetic_datapoints  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from build_clusters import build_clusters  # noqa: E402
+from map_utils import create_snapshot  # noqa: E402
+import json_writer  # noqa: E402
+
+NODE_ATTR_MAP = {"OriginalLabel": "label", "OriginalX": "x_tsne", "OriginalY": "y_tsne"}
+LINK_ATTR_MAP = {"source": "Source", "target": "Target", "isDirectional": "isDirectional"}
+N_CLUSTERS = 200
+
+
+if __name__ == "__main__":
+    max_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    snapshots = [create_snapshot("clusters", "", layout_params={"settings": {"nodeColorAttr": "cluster"}})]
+    n_nodes = 10_000
+    while n_nodes <= max_nodes:
+        df_datapoints = synthetic_datapoints(n_nodes)
+        df_datapoints["cluster"] = np.random.default_rng(1).integers(0, N_CLUSTERS, size=n_nodes).astype(str)
+        df_links = synthetic_links(5 * n_nodes, n_nodes=n_nodes)
+        start = time.perf_counter()
+        data = build_clusters(df_datapoints, df_links, snapshots, NODE_ATTR_MAP, LINK_ATTR_MAP)
+        elapsed = time.perf_counter() - start
+        f = io.BytesIO()
+        json_writer.dump(data, f, indent=None)
+        network = data["networks"][0]
+        print(
+            f"\t{n_nodes:>8} nodes, {len(df_links):>8} links: {elapsed:6.2f}s -> {len(network['nodes'])} super-nodes,"
+            f" {len(network['links'])} links, clusters.json {len(f.getvalue()) / 2 ** 10:7.1f}KB"
+        )
+        n_nodes *= 10
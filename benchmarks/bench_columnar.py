@@ -0,0 +1,47 @@
+"""
+payload size and parse time of the row and columnar dataset formats
+
+    python benchmarks/bench_columnar.py [n_datapoints]
+"""
+import gzip
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import json_writer  # noqa: E402
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from build_dataset import build_columnar_datapoints, iter_datapoints  # noqa: E402
+from ingest import read_datapointAttrs, read_datapoints  # noqa: E402
+
+TED = ROOT / "projects/public/TED_talks_demo/processed_data"
+
+
+def encode(data) -> bytes:
+    f = io.BytesIO()
+    json_writer.dump(data, f, indent=None, separators=(",", ":"))
+    return f.getvalue()
+
+
+def report(label: str, df, attrTypes):
+    rows = encode({"datapoints": iter_datapoints(df, attrTypes)})
+    columnar = encode(build_columnar_datapoints(df, attrTypes))
+    print(f"{label}: {len(df)} datapoints")
+    for name, payload in [("rows", rows), ("columnar", columnar)]:
+        start = time.perf_counter()
+        json.loads(payload)
+        parse = time.perf_counter() - start
+        gz = len(gzip.compress(payload, 6))
+        print(f"\t{name:>9}: {len(payload) / 2 ** 20:7.2f}MB  gzip {gz / 2 ** 20:6.2f}MB  json.loads {parse:6.3f}s")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df_attrs = read_datapointAttrs(TED / "node_attrs.csv")
+    report("TED talks", read_datapoints(TED / "nodes.csv"), dict(zip(df_attrs["id"], df_attrs["attrType"])))
+    report("synthetic", synthetic_datapoints(n), ATTR_TYPES)
@@ -0,0 +1,100 @@
+"""
+benchmark the column-wise build_datapoints against the original iterrows builder
+
+    python benchmarks/bench_datapoints.py [n_rows]
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from build_dataset import build_datapoints  # noqa: E402
+from ingest import read_datapoints  # noqa: E402
+from utils import load_templates  # noqa: E402
+
+ATTR_TYPES = {
+    "id": "integer",
+    "label": "string",
+    "keywords": "liststring",
+    "theme": "string",
+    "views": "integer",
+    "score": "float",
+    "year": "year",
+    "x_tsne": "float",
+    "y_tsne": "float",
+}
+
+
+def build_datapoints_iterrows(dpPath: str, dpAttribTypes) -> List[Dict[str, Any]]:
+    "the original row-wise builder, kept here as the reference implementation"
+    df_datapoints: pd.DataFrame = pd.read_csv(dpPath)
+    datapointTpl = load_templates("datapoint")
+    datapoints = []
+    for _, dp in df_datapoints.iterrows():
+        attrs: Dict[str, Any] = dict(dp)
+        for key, val in attrs.items():
+            if dpAttribTypes[key] == "liststring":
+                if isinstance(val, str):
+                    attrs[key] = val.split("|") if "|" in val else [val]
+                else:
+                    attrs[key] = ""
+            elif dpAttribTypes[key] == "float" or dpAttribTypes[key] == "integer" or dpAttribTypes[key] == "year":
+                attrs[key] = val if not pd.isna(attrs[key]) else ""
+            else:
+                attrs[key] = val if not pd.isna(attrs[key]) else ""
+        dp = {**datapointTpl, **{"id": f'{dp["id"]}', "attr": attrs}}
+        datapoints.append(dp)
+    return datapoints
+
+
+def synthetic_datapoints(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    tags = np.array(["culture", "science", "design", "health", "music", "cities", "water", "art"])
+    keywords = ["|".join(rng.choice(tags, size=rng.integers(1, 5), replace=False)) for _ in range(n)]
+    df = pd.DataFrame(
+        {
+            "id": np.arange(n),
+            "label": [f"node {i}" for i in range(n)],
+            "keywords": keywords,
+            "theme": rng.choice(["a", "b", "c", None], size=n),
+            "views": rng.integers(0, 10 ** 7, size=n),
+            "score": rng.random(n),
+            "year": rng.integers(1990, 2021, size=n),
+            "x_tsne": rng.normal(size=n) * 500,
+            "y_tsne": rng.normal(size=n) * 500,
+        }
+    )
+    # sprinkle some missing values
+    df.loc[rng.random(n) < 0.05, "score"] = np.nan
+    df.loc[rng.random(n) < 0.05, "keywords"] = np.nan
+    return df
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        csvPath = str(Path(tmp) / "nodes.csv")
+        synthetic_datapoints(n).to_csv(csvPath, index=False)
+
+        old, t_old = timed(build_datapoints_iterrows, csvPath, ATTR_TYPES)
+        new, t_new = timed(lambda path, types: build_datapoints(read_datapoints(path), types), csvPath, ATTR_TYPES)
+
+    identical = json.dumps(old, indent=4) == json.dumps(new, indent=4)
+    print(f"{n} datapoints")
+    print(f"\titerrows:    {t_old:8.2f}s")
+    print(f"\tcolumn-wise: {t_new:8.2f}s  ({t_old / t_new:.1f}x)")
+    print(f"\tidentical json: {identical}")
@@ -0,0 +1,73 @@
+"""
+links.json with and without create_map(dedupeLinks=True) on a tag network that lists every
+undirected link both ways round, and the time dedupe_links takes
+
+    python benchmarks/bench_dedupe.py [n_links]
+"""
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_incremental import LINK_ATTR_MAP, NODE_ATTR_MAP  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from map_utils import create_map  # noqa: E402
+from prune_links import dedupe_links  # noqa: E402
+
+
+def both_ways(n: int, n_nodes: int) -> pd.DataFrame:
+    "undirected links written A->B and B->A with the same weight, as Tag2Network does"
+    df = synthetic_links(n // 2, n_nodes=n_nodes).assign(isDirectional=False)
+    df = pd.concat([df, df.rename(columns={"Source": "Target", "Target": "Source"})])
+    return df.iloc[np.random.default_rng(2).permutation(len(df))].reset_index(drop=True)
+
+
+def build(tmp: str, outFolder: str, dedupeLinks: bool) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        create_map(
+            f"{tmp}/nodes.csv",
+            f"{tmp}/links.csv",
+            f"{tmp}/node_attrs.csv",
+            NODE_ATTR_MAP,
+            LINK_ATTR_MAP,
+            outFolder=f"{tmp}/{outFolder}",
+            minify=True,
+            incremental=False,
+            dedupeLinks=dedupeLinks,
+        )
+    return out.getvalue()
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    n_links = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_nodes = n_links // 10
+    df_links = both_ways(n_links, n_nodes)
+
+    start = time.perf_counter()
+    kept, dropped = dedupe_links(df_links, LINK_ATTR_MAP)
+    print(f"{n_links} links: dedupe_links {time.perf_counter() - start:.2f}s, kept {len(kept)}, dropped {dropped}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_datapoints(n_nodes).to_csv(f"{tmp}/nodes.csv", index=False)
+        df_links.to_csv(f"{tmp}/links.csv", index=False)
+        with open(f"{tmp}/node_attrs.csv", "w") as f:
+            f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items()))
+        build(tmp, "all", False)
+        log = build(tmp, "deduped", True)
+        sizes = [os.path.getsize(f"{tmp}/{out}/data/links.json") for out in ["all", "deduped"]]
+        print(f"\t{re.search(r'dropped .*', log).group(0)}")
+        print(f"\tlinks.json {sizes[0]:,}B -> {sizes[1]:,}B, {sizes[0] - sizes[1]:,}B less")
@@ -0,0 +1,61 @@
+"""
+peak RSS of reading the TED datapoints and writing nodes.json, with inferred dtypes vs
+the compact dtypes picked from the attrTypes. each run is a fresh process
+
+    python benchmarks/bench_dtypes.py [copies]
+
+copies repeats the TED rows to show how the saving scales with the sheet
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+TED = ROOT / "projects" / "public" / "TED_talks_demo" / "processed_data"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(datapointsPath: str, compact: bool):
+    import json_writer
+    from build_dataset import build_attrDescriptors, iter_datapoints
+    from ingest import read_datapointAttrs, read_datapoints
+
+    before = peak_rss_mb()
+    df_attrs = read_datapointAttrs(TED / "node_attrs.csv")
+    df_datapoints = read_datapoints(datapointsPath, df_attrs if compact else None)
+    frame = df_datapoints.memory_usage(deep=True).sum() / 2 ** 20
+    types = {row["id"]: row["attrType"] for row in build_attrDescriptors(df_attrs)}
+    with open(os.devnull, "wb") as f:
+        json_writer.dump({"datapoints": iter_datapoints(df_datapoints, types)}, f)
+    print(f"{frame:.1f} {peak_rss_mb() - before:.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run(sys.argv[2], sys.argv[3] == "compact")
+        sys.exit(0)
+
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    with tempfile.TemporaryDirectory() as tmp:
+        datapointsPath = str(TED / "nodes.csv")
+        if copies > 1:
+            lines = (TED / "nodes.csv").read_text().splitlines(keepends=True)
+            datapointsPath = f"{tmp}/nodes.csv"
+            with open(datapointsPath, "w") as f:
+                f.write(lines[0] + "".join(lines[1:]) * copies)
+
+        print(f"TED datapoints x{copies}")
+        for label in ["inferred", "compact"]:
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", datapointsPath, label], capture_output=True, text=True, check=True, cwd=os.getcwd()
+            ).stdout.split()
+            print(f"\t{label:>8}: frame {float(out[0]):7.1f}MB  peak RSS +{float(out[1]):7.1f}MB")
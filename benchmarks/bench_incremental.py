@@ -0,0 +1,57 @@
+"""
+full build vs a rebuild after editing only a snapshot description
+
+    python benchmarks/bench_incremental.py [n_links]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from map_utils import create_map, create_snapshot  # noqa: E402
+
+NODE_ATTR_MAP = {"OriginalLabel": "label", "OriginalX": "x_tsne", "OriginalY": "y_tsne"}
+LINK_ATTR_MAP = {"source": "Source", "target": "Target", "isDirectional": "isDirectional"}
+
+
+def build(tmp: str, description: str) -> float:
+    snapshot = create_snapshot("snapshot", "subtitle", description=description)
+    snapshot["id"] = "snapshot-1"  # keep the id stable across builds
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(
+            f"{tmp}/nodes.csv",
+            f"{tmp}/links.csv",
+            f"{tmp}/node_attrs.csv",
+            NODE_ATTR_MAP,
+            LINK_ATTR_MAP,
+            snapshots=[snapshot],
+            outFolder=f"{tmp}/out",
+            incremental=True,
+        )
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    n_links = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_nodes = n_links // 10
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_datapoints(n_nodes).to_csv(f"{tmp}/nodes.csv", index=False)
+        synthetic_links(n_links, n_nodes=n_nodes).to_csv(f"{tmp}/links.csv", index=False)
+        with open(f"{tmp}/node_attrs.csv", "w") as f:
+            f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items()))
+
+        print(f"{n_nodes} nodes, {n_links} links")
+        print(f"\tfull build:               {build(tmp, 'first draft'):6.2f}s")
+        print(f"\tsnapshot text edited:     {build(tmp, 'second draft'):6.2f}s")
+        print(f"\tnothing changed:          {build(tmp, 'second draft'):6.2f}s")
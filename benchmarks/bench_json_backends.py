@@ -0,0 +1,44 @@
+"""
+compare the json_writer encoder backends on a synthetic dataset
+
+    python benchmarks/bench_json_backends.py [n_datapoints]
+"""
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import json_writer  # noqa: E402
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from build_dataset import build_datapoints  # noqa: E402
+
+FORMATS = {"indent=4": {"indent": 4}, "minified": {"indent": None, "separators": (",", ":")}}
+
+
+def write(data, backend: str, fmt) -> int:
+    f = io.BytesIO()
+    json_writer.dump(data, f, backend=backend, **fmt)
+    return len(f.getvalue())
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    data = {"datapoints": build_datapoints(synthetic_datapoints(n), ATTR_TYPES)}
+
+    print(f"{n} datapoints")
+    start = time.perf_counter()
+    json.dumps(data, indent=4)
+    print(f"\t{'json.dumps':>8} {'indent=4':>9}: {time.perf_counter() - start:6.2f}s")
+    for name, backend in json_writer.BACKENDS.items():
+        for label, fmt in FORMATS.items():
+            if not backend.supports(fmt["indent"], fmt.get("separators", (",", ": "))):
+                print(f"\t{name:>8} {label:>9}: not available")
+                continue
+            start = time.perf_counter()
+            size = write(data, name, fmt)
+            print(f"\t{name:>8} {label:>9}: {time.perf_counter() - start:6.2f}s  {size / 2 ** 20:6.1f}MB")
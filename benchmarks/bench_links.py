@@ -0,0 +1,86 @@
+"""
+benchmark the column-wise build_links against the original merge-per-link builder
+
+    python benchmarks/bench_links.py [n_links]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from build_network import build_links  # noqa: E402
+from utils import load_templates, merge  # noqa: E402
+
+ATTR_MAP = {"source": "Source", "target": "Target", "isDirectional": "isDirectional"}
+
+
+def build_links_merge(df_links: pd.DataFrame, attr_map: Dict[str, str]) -> List[Dict[str, Any]]:
+    "the original row-wise builder, kept here as the reference implementation"
+    linkTpl = load_templates("link")
+    links = []
+    for idx, link in df_links.iterrows():
+        edgeAttrs: Dict[str, Any] = dict(link)
+        link = merge(
+            linkTpl,
+            {
+                "id": f"{idx}",
+                "source": f"{int(edgeAttrs[attr_map['source']])}",
+                "target": f"{int(edgeAttrs[attr_map['target']])}",
+                "isDirectional": edgeAttrs.get(attr_map.get("isDirectional", ""), False),
+                "attr": {"OriginalLabel": f"{idx}"},
+            },
+        )
+        otherAttrs = {
+            at: val for at, val in edgeAttrs.items() if at.lower() not in ["id", "source", "target", "isdirectional"]
+        }
+        linkMerged = merge(link, {"attr": otherAttrs})
+        links.append(dict(linkMerged))
+    return links
+
+
+def synthetic_links(n: int, n_nodes: int = 10_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    weight = rng.random(n)
+    weight[::100] = 1.0  # rows equal to the template default
+    return pd.DataFrame(
+        {
+            "Source": rng.integers(0, n_nodes, size=n),
+            "Target": rng.integers(0, n_nodes, size=n),
+            "weight": weight,
+            "sign": rng.choice(["positive", "negative"], size=n),
+            "votes": rng.integers(0, 10, size=n),
+            "isDirectional": rng.random(n) < 0.5,
+        }
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    res = fn(*args)
+    return res, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df_links = synthetic_links(n)
+
+    old, t_old = timed(build_links_merge, df_links, ATTR_MAP)
+    new, t_new = timed(build_links, df_links, ATTR_MAP)
+
+    # also check a purely numeric sheet, where iterrows upcasts every row to float
+    df_numeric = df_links[["Source", "Target", "weight"]].head(1000)
+    identical = json.dumps(old, indent=4) == json.dumps(new, indent=4) and json.dumps(
+        build_links_merge(df_numeric, ATTR_MAP)
+    ) == json.dumps(build_links(df_numeric, ATTR_MAP))
+
+    print(f"{n} links")
+    print(f"\tmerge per link: {t_old:8.2f}s")
+    print(f"\tcolumn-wise:    {t_new:8.2f}s  ({t_old / t_new:.1f}x)")
+    print(f"\tidentical json: {identical}")
@@ -0,0 +1,80 @@
+"""
+time utils.merge per node against the previous in place, deep copying merge. tests/test_merge.py checks they agree
+
+    python benchmarks/bench_merge.py [n_nodes]
+"""
+import copy
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from utils import load_templates, merge, template_view  # noqa: E402
+
+
+def reference_merge(a, b):
+    # the previous merge: updates a in place and returns a deep copy of it
+    for key in b:
+        if key in a:
+            if isinstance(a[key], dict) and isinstance(b[key], dict):
+                reference_merge(a[key], b[key])
+            elif a[key] == b[key]:
+                pass  # same leaf value
+            else:
+                a[key] = b[key]
+        else:
+            if isinstance(b[key], dict):
+                a[key] = dict(b[key])  # copy
+            else:
+                a[key] = b[key]
+    return copy.deepcopy(a)
+
+
+def node_updates(n: int):
+    return [
+        {"dataPointId": f"{i}", "id": f"{i}", "attr": {"OriginalLabel": f"node {i}", "OriginalX": i * 0.5, "OriginalY": float(i % 7)}}
+        for i in range(n)
+    ]
+
+
+def timed(fn, updates) -> float:
+    start = time.perf_counter()
+    fn(updates)
+    return time.perf_counter() - start
+
+
+def run_reference(updates):
+    tpl = load_templates("node")
+    for upd in updates:
+        reference_merge(tpl, upd)
+
+
+def run_merge(updates):
+    tpl = template_view("node")
+    for upd in updates:
+        tpl = merge(tpl, upd)
+
+
+def settings_merge(merge_fn, tpl_fn, n: int = 2000) -> float:
+    # build_settings merges into the (much larger) settings template once per build
+    start = time.perf_counter()
+    for _ in range(n):
+        merge_fn(tpl_fn("settings"), {"player": {"settings": {"showModal": True}}})
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    updates = node_updates(n)
+
+    t_ref, t_new = timed(run_reference, updates), timed(run_merge, updates)
+    print(f"{n} nodes")
+    print(f"\tmerge + deepcopy: {t_ref:6.2f}s  {t_ref / n * 1e6:6.2f}us/node")
+    print(f"\tstructural merge: {t_new:6.2f}s  {t_new / n * 1e6:6.2f}us/node  ({t_ref / t_new:.0f}x)")
+
+    t_ref, t_new = settings_merge(reference_merge, load_templates), settings_merge(merge, template_view)
+    print("settings template")
+    print(f"\tmerge + deepcopy: {t_ref * 1e6:6.1f}us")
+    print(f"\tstructural merge: {t_new * 1e6:6.1f}us  ({t_ref / t_new:.0f}x)")
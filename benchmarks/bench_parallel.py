@@ -0,0 +1,69 @@
+"""
+build time of create_map with 1 process vs a process pool, and a check that the files are identical
+
+    python benchmarks/bench_parallel.py [n_links] [max_workers]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_incremental import LINK_ATTR_MAP, NODE_ATTR_MAP  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from map_utils import create_map  # noqa: E402
+
+FILES = ["nodes.json", "links.json", "settings.json"]
+
+
+def build(tmp: str, workers: int) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(
+            f"{tmp}/nodes.csv",
+            f"{tmp}/links.csv",
+            f"{tmp}/node_attrs.csv",
+            NODE_ATTR_MAP,
+            LINK_ATTR_MAP,
+            outFolder=f"{tmp}/out_{workers}",
+            compression={"gz": 9},
+            incremental=False,
+            workers=workers,
+        )
+    return time.perf_counter() - start
+
+
+def same_files(tmp: str, workers: int) -> bool:
+    return all(
+        (Path(tmp) / "out_1" / "data" / fname).read_bytes() == (Path(tmp) / f"out_{workers}" / "data" / fname).read_bytes()
+        for fname in FILES
+    )
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    n_links = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    n_nodes = n_links // 10
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_datapoints(n_nodes).to_csv(f"{tmp}/nodes.csv", index=False)
+        synthetic_links(n_links, n_nodes=n_nodes).to_csv(f"{tmp}/links.csv", index=False)
+        with open(f"{tmp}/node_attrs.csv", "w") as f:
+            f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items()))
+
+        print(f"{n_nodes} nodes, {n_links} links, {os.cpu_count()} cpus")
+        t_seq = build(tmp, 1)
+        print(f"\tworkers=1: {t_seq:6.2f}s")
+        workers = 2
+        while workers <= max_workers:
+            elapsed = build(tmp, workers)
+            same = "identical" if same_files(tmp, workers) else "DIFFERENT"
+            print(f"\tworkers={workers}: {elapsed:6.2f}s  ({t_seq / elapsed:.1f}x, {same})")
+            workers *= 2
@@ -0,0 +1,69 @@
+"""
+nodes.json and links.json with full float precision against create_map's precision ("auto" for
+the coordinates, and a few decimal places for the other floats), raw and gzipped, and the saving the
+build reports against the measured one
+
+    python benchmarks/bench_precision.py [n_rows]
+"""
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_incremental import LINK_ATTR_MAP, NODE_ATTR_MAP  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from map_utils import create_map  # noqa: E402
+
+PRECISIONS = {
+    "full": {},
+    "auto coordinates": {"OriginalX": "auto", "OriginalY": "auto"},
+    "auto + 3 places": {"OriginalX": "auto", "OriginalY": "auto", "score": 3, "weight": 3},
+}
+
+
+def build(tmp: str, outFolder: str, precision) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        create_map(
+            f"{tmp}/nodes.csv",
+            f"{tmp}/links.csv",
+            f"{tmp}/node_attrs.csv",
+            NODE_ATTR_MAP,
+            LINK_ATTR_MAP,
+            outFolder=f"{tmp}/{outFolder}",
+            minify=True,
+            compression={"gz": 6},
+            incremental=False,
+            precision=precision,
+        )
+    return out.getvalue()
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_datapoints(n_rows).to_csv(f"{tmp}/nodes.csv", index=False, float_format="%.17g")
+        synthetic_links(5 * n_rows, n_nodes=n_rows).to_csv(f"{tmp}/links.csv", index=False, float_format="%.17g")
+        with open(f"{tmp}/node_attrs.csv", "w") as f:
+            f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items()))
+        full = None
+        for n, (name, precision) in enumerate(PRECISIONS.items()):
+            log = build(tmp, f"out{n}", precision)
+            data = f"{tmp}/out{n}/data"
+            raw = sum(os.path.getsize(f"{data}/{fname}") for fname in ["nodes.json", "links.json"])
+            gz = sum(os.path.getsize(f"{data}/{fname}.gz") for fname in ["nodes.json", "links.json"])
+            full = full or (raw, gz)
+            reported = re.search(r"about ([\d,]+)B less", log)
+            print(
+                f"\t{name:<18} {raw / 2 ** 20:7.2f}MB ({gz / 2 ** 20:6.2f}MB gz), {full[0] - raw:>11,}B less"
+                f" ({full[1] - gz:>10,}B gz). reported {reported.group(1) if reported else 0}B"
+            )
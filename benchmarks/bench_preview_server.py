@@ -0,0 +1,149 @@
+"""
+load test of the preview server against the single threaded socketserver.TCPServer and SimpleHTTPRequestHandler
+the build scripts used to serve maps with. clients load a map's files at the same time, while one slow client holds
+a connection open: the latency of their requests and what they cost on the wire, on a first load (with gzip), a
+reload (revalidated) and the first 64KB of nodes.json as a range
+
+    python benchmarks/bench_preview_server.py [n_rows] [n_clients]
+"""
+import contextlib
+import functools
+import http.client
+import http.server
+import io
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_incremental import LINK_ATTR_MAP, NODE_ATTR_MAP  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from map_utils import create_map  # noqa: E402
+from preview_server import PreviewRequestHandler, make_server  # noqa: E402
+
+# a request not answered by then has been held up
+TIMEOUT = 5
+
+
+class QuietStdlibHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class QuietPreviewHandler(PreviewRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class QuietTCPServer(socketserver.TCPServer):
+    # the clients that gave up on a held up server are gone by the time it answers them
+    def handle_error(self, request, client_address):
+        pass
+
+
+def stdlib_server(directory: str) -> socketserver.TCPServer:
+    return QuietTCPServer(("127.0.0.1", 0), functools.partial(QuietStdlibHandler, directory=directory))
+
+
+def preview_server(directory: str) -> http.server.ThreadingHTTPServer:
+    server = make_server(directory, 0, "127.0.0.1")
+    server.RequestHandlerClass = functools.partial(QuietPreviewHandler, directory=directory)
+    return server
+
+
+def load(port: int, paths, headers, etags=None):
+    """requests paths on one connection (reopened when the server closes it). the latency of each, the body bytes,
+    the statuses and the etags
+    """
+    conn, latencies, wire, statuses, tags = None, [], 0, [], {}
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=TIMEOUT)
+            conn.request("GET", path, headers={**headers, **({"If-None-Match": etags[path]} if etags and path in etags else {})})
+            res = conn.getresponse()
+            wire += len(res.read())
+            statuses.append(res.status)
+            tags[path] = res.getheader("ETag")
+            if res.getheader("Connection", "").lower() == "close" or res.version == 10:
+                conn.close()
+                conn = None
+        except (socket.timeout, ConnectionError):
+            statuses.append("timeout")
+            conn = None
+        latencies.append(time.perf_counter() - start)
+    if conn is not None:
+        conn.close()
+    return latencies, wire, statuses, tags
+
+
+def run(server, paths, n_clients: int, headers, etags=None, slowClient: bool = True):
+    "n_clients loading paths at once, while a slow client has connected and not sent its request yet"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    slow = socket.create_connection(("127.0.0.1", port)) if slowClient else None
+    results = [None] * n_clients
+
+    def client(n: int):
+        results[n] = load(port, paths, headers, etags)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if slow is not None:
+        slow.close()
+    server.shutdown()
+    server.server_close()
+    latencies = np.concatenate([res[0] for res in results])
+    statuses = [status for res in results for status in res[2]]
+    return elapsed, latencies, sum(res[1] for res in results), statuses, results[0][3]
+
+
+def report(name: str, elapsed, latencies, wire, statuses):
+    codes = {code: statuses.count(code) for code in dict.fromkeys(statuses)}
+    print(
+        f"\t{name:<22} {elapsed:6.2f}s, p50 {np.median(latencies) * 1000:7.1f}ms, p95 {np.percentile(latencies, 95) * 1000:7.1f}ms,"
+        f" {wire / 2 ** 20:7.2f}MB. {codes}"
+    )
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_datapoints(n_rows).to_csv(f"{tmp}/nodes.csv", index=False)
+        synthetic_links(5 * n_rows, n_nodes=n_rows).to_csv(f"{tmp}/links.csv", index=False)
+        with open(f"{tmp}/node_attrs.csv", "w") as f:
+            f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items()))
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_map(
+                f"{tmp}/nodes.csv", f"{tmp}/links.csv", f"{tmp}/node_attrs.csv", NODE_ATTR_MAP, LINK_ATTR_MAP,
+                outFolder=f"{tmp}/out", minify=True, compression={"gz": 6}, incremental=False,
+            )
+        out = f"{tmp}/out"
+        paths = ["/index.html"] + [f"/data/{fname}" for fname in ["settings.json", "nodes.json", "links.json"]]
+        gzip = {"Accept-Encoding": "gzip"}
+        print(f"\t{n_clients} clients loading {paths}")
+        report("stdlib TCPServer load", *run(stdlib_server(out), paths, n_clients, gzip, slowClient=False)[:4])
+        report("stdlib + slow client", *run(stdlib_server(out), paths, n_clients, gzip)[:4])
+        elapsed, latencies, wire, statuses, etags = run(preview_server(out), paths, n_clients, gzip)
+        report("preview + slow client", elapsed, latencies, wire, statuses)
+        report("preview reload", *run(preview_server(out), paths, n_clients, gzip, etags)[:4])
+        report("preview 64KB range", *run(preview_server(out), ["/data/nodes.json"], n_clients, {"Range": "bytes=0-65535"})[:4])
@@ -0,0 +1,49 @@
+"""
+build time and size of the search index (create_map searchIndex) against the number of datapoints
+
+    python benchmarks/bench_search.py [max_rows]
+"""
+import io
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from build_dataset import build_attrDescriptors  # noqa: E402
+from build_search import build_search_index  # noqa: E402
+import json_writer  # noqa: E402
+
+SEARCHABLE = ["label", "keywords", "theme"]
+
+
+if __name__ == "__main__":
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df_attrs = pd.DataFrame(
+        {
+            "id": list(ATTR_TYPES.keys()),
+            "title": "",
+            "attrType": list(ATTR_TYPES.values()),
+            "searchable": [key in SEARCHABLE for key in ATTR_TYPES],
+        }
+    )
+    attrDescriptors = build_attrDescriptors(df_attrs)
+    print(f"searchable: {SEARCHABLE}")
+    n_rows = 1000
+    while n_rows <= max_rows:
+        df_datapoints = synthetic_datapoints(n_rows)
+        start = time.perf_counter()
+        index = build_search_index(df_datapoints, attrDescriptors)
+        elapsed = time.perf_counter() - start
+        f = io.BytesIO()
+        json_writer.dump(index, f, indent=None)
+        print(
+            f"\t{n_rows:>8} datapoints: {elapsed:6.2f}s, {len(index['tokens']):>7} words,"
+            f" {len(f.getvalue()) / 2 ** 20:7.2f}MB minified"
+        )
+        n_rows *= 10
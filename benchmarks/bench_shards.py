@@ -0,0 +1,95 @@
+"""
+check that create_map(shardBy=...) writes the same records as the unsharded build, split across
+the shard files, and compare what the player has to fetch and parse before its first shard
+
+    python benchmarks/bench_shards.py [n_links]
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_incremental import LINK_ATTR_MAP, NODE_ATTR_MAP  # noqa: E402
+from bench_links import synthetic_links  # noqa: E402
+from map_utils import create_map  # noqa: E402
+
+
+def build(tmp: str, outFolder: str, shardBy, datasetFormat: str = "rows"):
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(
+            f"{tmp}/nodes.csv",
+            f"{tmp}/links.csv",
+            f"{tmp}/node_attrs.csv",
+            NODE_ATTR_MAP,
+            LINK_ATTR_MAP,
+            outFolder=f"{tmp}/{outFolder}",
+            minify=True,
+            datasetFormat=datasetFormat,
+            incremental=False,
+            shardBy=shardBy,
+        )
+
+
+def joined(data_dir: Path):
+    "the datapoints, nodes and links of a sharded build, joined as index.html does"
+    dataset = json.loads((data_dir / "nodes.json").read_text())
+    network = json.loads((data_dir / "links.json").read_text())[0]
+    datapoints = [dp for s in dataset["shards"] for dp in json.loads((data_dir / s["file"]).read_text())["datapoints"]]
+    shards = [json.loads((data_dir / s["file"]).read_text()) for s in network["shards"]]
+    cross = json.loads((data_dir / network["crossLinks"]["file"]).read_text())
+    nodes = [node for s in shards for node in s["nodes"]]
+    links = [link for s in shards + [cross] for link in s["links"]]
+    return datapoints, nodes, links
+
+
+def same_records(tmp: str) -> bool:
+    whole = Path(tmp) / "whole" / "data"
+    dataset = json.loads((whole / "nodes.json").read_text())
+    network = json.loads((whole / "links.json").read_text())[0]
+    byId = lambda records: sorted(records, key=lambda r: int(r["id"]))
+    datapoints, nodes, links = joined(Path(tmp) / "sharded" / "data")
+    return (
+        byId(datapoints) == byId(dataset["datapoints"])
+        and byId(nodes) == byId(network["nodes"])
+        and byId(links) == byId(network["links"])
+    )
+
+
+def parse_time(paths) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        json.loads(path.read_bytes())
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    n_links = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    n_nodes = n_links // 10
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_datapoints(n_nodes).to_csv(f"{tmp}/nodes.csv", index=False)
+        synthetic_links(n_links, n_nodes=n_nodes).to_csv(f"{tmp}/links.csv", index=False)
+        with open(f"{tmp}/node_attrs.csv", "w") as f:
+            f.write("id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items()))
+
+        build(tmp, "whole", None)
+        build(tmp, "sharded", "theme")
+        print(f"{n_nodes} nodes, {n_links} links, sharded by theme")
+        print(f"\tsame records: {same_records(tmp)}")
+
+        whole, sharded = Path(tmp) / "whole" / "data", Path(tmp) / "sharded" / "data"
+        network = json.loads((sharded / "links.json").read_text())[0]
+        first = [sharded / "nodes.json", sharded / "links.json", sharded / "shards/nodes.0.json", sharded / "shards/links.0.json"]
+        print(f"\t{len(network['shards'])} shards, {network['crossLinks']['links']} cross-shard links")
+        print(f"\tunsharded:   {sum(os.path.getsize(whole / f) for f in ['nodes.json', 'links.json']) / 2 ** 20:6.1f}MB"
+              f"  parsed in {parse_time([whole / 'nodes.json', whole / 'links.json']):.2f}s")
+        print(f"\tfirst shard: {sum(os.path.getsize(f) for f in first) / 2 ** 20:6.1f}MB  parsed in {parse_time(first):.2f}s")
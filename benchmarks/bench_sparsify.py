@@ -0,0 +1,52 @@
+"""
+sparsify_links on synthetic similarity graphs: links kept, connected components before and after,
+and the time each mode takes. the backbone needs scipy
+
+    python benchmarks/bench_sparsify.py [n_links]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from prune_links import sparsify_links  # noqa: E402
+
+ATTR_MAP = {"source": "Source", "target": "Target"}
+MODES = [{"topk": 5}, {"quantile": 0.9}, {"quantile": 0.9, "backbone": True}, {"topk": 5, "backbone": True}]
+
+
+def similarity_links(n: int, n_nodes: int, n_clusters: int = 50, seed: int = 0) -> pd.DataFrame:
+    "dense links, heavier inside clusters than across them, as tag similarity networks are"
+    rng = np.random.default_rng(seed)
+    cluster = rng.integers(0, n_clusters, size=n_nodes)
+    sources, targets = rng.integers(0, n_nodes, size=n), rng.integers(0, n_nodes, size=n)
+    weight = rng.random(n) * np.where(cluster[sources] == cluster[targets], 1.0, 0.3)
+    return pd.DataFrame({"Source": sources, "Target": targets, "weight": weight})
+
+
+def components(df_links: pd.DataFrame, n_nodes: int) -> int:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    graph = coo_matrix((np.ones(len(df_links)), (df_links["Source"], df_links["Target"])), shape=(n_nodes, n_nodes))
+    return connected_components(graph, directed=False)[0]
+
+
+if __name__ == "__main__":
+    n_links = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    for n_nodes in [n_links // 100, n_links // 20]:
+        df_links = similarity_links(n_links, n_nodes)
+        print(f"{n_nodes} nodes, {n_links} links, {components(df_links, n_nodes)} components")
+        for mode in MODES:
+            start = time.perf_counter()
+            kept, pruned = sparsify_links(df_links, ATTR_MAP, **mode)
+            elapsed = time.perf_counter() - start
+            print(
+                f"\t{str(mode):<36} {elapsed:6.2f}s  kept {len(kept):>9} ({len(kept) / n_links:5.1%}),"
+                f" {components(kept, n_nodes)} components"
+            )
@@ -0,0 +1,58 @@
+"""
+peak memory of writing nodes.json and links.json from in-memory lists vs the streaming writer
+
+    python benchmarks/bench_stream_memory.py [n_rows ...]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import json_writer  # noqa: E402
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from bench_links import ATTR_MAP, synthetic_links  # noqa: E402
+from build_dataset import build_datapoints, iter_datapoints  # noqa: E402
+from build_network import build_links, iter_links  # noqa: E402
+
+
+def write_lists(df_datapoints, df_links, out_dir: str):
+    with open(os.path.join(out_dir, "nodes.json"), "w") as f:
+        json.dump({"datapoints": build_datapoints(df_datapoints, ATTR_TYPES)}, f, indent=4)
+    with open(os.path.join(out_dir, "links.json"), "w") as f:
+        json.dump([{"links": build_links(df_links, ATTR_MAP)}], f, indent=4)
+
+
+def write_streams(df_datapoints, df_links, out_dir: str):
+    with open(os.path.join(out_dir, "nodes.json"), "wb") as f:
+        json_writer.dump({"datapoints": iter_datapoints(df_datapoints, ATTR_TYPES)}, f, indent=4)
+    with open(os.path.join(out_dir, "links.json"), "wb") as f:
+        json_writer.dump([{"links": iter_links(df_links, ATTR_MAP)}], f, indent=4)
+
+
+def peak_mb(fn, *args) -> float:
+    gc.collect()
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+if __name__ == "__main__":
+    os.chdir(ROOT)
+    sizes = [int(n) for n in sys.argv[1:]] or [20_000, 80_000]
+    print(f"{'rows':>8} {'lists (MB)':>12} {'stream (MB)':>12} {'output (MB)':>12}")
+    for n in sizes:
+        df_datapoints, df_links = synthetic_datapoints(n), synthetic_links(n, n_nodes=n)
+        with tempfile.TemporaryDirectory() as tmp:
+            mb_lists = peak_mb(write_lists, df_datapoints, df_links, tmp)
+            mb_stream = peak_mb(write_streams, df_datapoints, df_links, tmp)
+            out_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 2 ** 20
+        print(f"{n:>8} {mb_lists:>12.1f} {mb_stream:>12.1f} {out_mb:>12.1f}")
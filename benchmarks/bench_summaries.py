@@ -0,0 +1,44 @@
+"""
+time build_summaries on a synthetic datapoints sheet, whole and read in chunks
+
+    python benchmarks/bench_summaries.py [n_rows]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import ATTR_TYPES, synthetic_datapoints  # noqa: E402
+from build_dataset import build_attrDescriptors  # noqa: E402
+from build_summaries import build_summaries  # noqa: E402
+from ingest import read_datapoints  # noqa: E402
+
+RENDER_TYPES = {"keywords": "tag-cloud", "theme": "categorybar", "label": "text"}
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df_attrs = pd.DataFrame(
+        {
+            "id": list(ATTR_TYPES.keys()),
+            "title": "",
+            "attrType": list(ATTR_TYPES.values()),
+            "renderType": [RENDER_TYPES.get(key, "histogram") for key in ATTR_TYPES],
+        }
+    )
+    attrDescriptors = build_attrDescriptors(df_attrs)
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_datapoints(n_rows).to_csv(f"{tmp}/nodes.csv", index=False)
+        print(f"{n_rows} datapoints, {sum(at['renderType'] != 'text' for at in attrDescriptors)} attrs summarized")
+        for chunksize in [None, 100_000]:
+            df_datapoints = read_datapoints(f"{tmp}/nodes.csv", df_attrs, chunksize)
+            start = time.perf_counter()
+            summaries = build_summaries(df_datapoints, attrDescriptors)
+            label = "whole" if chunksize is None else f"chunks of {chunksize}"
+            print(f"\t{label:<18} {time.perf_counter() - start:6.2f}s")
@@ -0,0 +1,54 @@
+"""
+time creating snapshots with the cached template registry against re-parsing the yaml on every call
+
+    python benchmarks/bench_templates.py [n_snapshots]
+"""
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import map_utils  # noqa: E402
+import utils  # noqa: E402
+
+LAYOUT = {"plotType": "network", "settings": {"nodeColorAttr": "Cluster", "drawGroupLabels": True}}
+
+
+def uncached_load_templates(fname: str):
+    # the previous loader: open and parse with the pure python loader on each call
+    with open(ROOT / "src" / "templates" / f"{fname}.yaml") as f:
+        return list(yaml.load_all(f, Loader=yaml.FullLoader))[0]
+
+
+def create_snapshots(n: int):
+    return [map_utils.create_snapshot(f"snap {i}", "subtitle", layout_params=LAYOUT) for i in range(n)]
+
+
+def timed(n: int) -> float:
+    start = time.perf_counter()
+    create_snapshots(n)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    cached = map_utils.load_templates
+    map_utils.load_templates = uncached_load_templates
+    uncached_snaps = create_snapshots(n)
+    t_uncached = timed(n)
+
+    map_utils.load_templates = cached
+    utils._templates.clear()
+    cached_snaps = create_snapshots(n)
+    t_cached = timed(n)
+
+    # ids are random uuids, everything else must match
+    same = all({**a, "id": ""} == {**b, "id": ""} for a, b in zip(uncached_snaps, cached_snaps))
+    print(f"{n} snapshots ({'identical' if same else 'DIFFERENT'})")
+    print(f"\tparse per call: {t_uncached * 1000:8.1f}ms")
+    print(f"\tregistry:       {t_cached * 1000:8.1f}ms  ({t_uncached / t_cached:.0f}x)")
@@ -0,0 +1,75 @@
+"""
+build_thumbnails on synthetic photos served by a local http server: the first build fetches and
+downscales them, with 1 and with several processes, the next finds them in the cache. and the bytes
+a player would load, full size against thumbnails. needs Pillow
+
+    python benchmarks/bench_thumbnails.py [n_images]
+"""
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from build_thumbnails import build_thumbnails  # noqa: E402
+from fetch_cache import FetchCache, url_transport  # noqa: E402
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def photos(folder: str, n: int, seed: int = 0):
+    "n noisy gradients, 800x600 jpegs, as big as the portraits on the TED map"
+    rng = np.random.default_rng(seed)
+    grad = np.linspace(0, 255, 800)[None, :, None] * np.ones((600, 1, 3))
+    for i in range(n):
+        pixels = np.clip(grad * rng.random(3) + rng.normal(0, 20, (600, 800, 3)), 0, 255).astype(np.uint8)
+        Image.fromarray(pixels).save(f"{folder}/{i}.jpg", quality=85)
+
+
+if __name__ == "__main__":
+    n_images = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        os.mkdir(f"{tmp}/img")
+        photos(f"{tmp}/img", n_images)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=f"{tmp}/img"))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls = [f"http://127.0.0.1:{server.server_port}/{i}.jpg" for i in range(n_images)]
+        fetched = []
+
+        def transport(url: str) -> bytes:
+            fetched.append(url)
+            return url_transport(url)
+
+        # the cached build starts from the cache of the first, into a fresh folder
+        runs = [("first build", 1, "cache1", "out1"), ("first build", 4, "cache4", "out4"), ("cached", 1, "cache1", "out")]
+        for run, workers, cacheDir, outDir in runs:
+            out = Path(tmp) / outDir
+            out.mkdir()
+            cache = FetchCache(Path(tmp) / cacheDir)
+            fetched.clear()
+            start = time.perf_counter()
+            if workers == 1:
+                data = build_thumbnails(urls, out, cache, transport)
+            else:
+                with ProcessPoolExecutor(workers) as pool:
+                    data = build_thumbnails(urls, out, cache, transport, pool=pool)
+            elapsed = time.perf_counter() - start
+            print(f"\t{run:<12} {workers:>2} processes: {elapsed:6.2f}s, {len(fetched)} fetched, {len(data['images'])} thumbnails")
+        server.shutdown()
+
+        full = sum(path.stat().st_size for path in Path(f"{tmp}/img").iterdir())
+        thumbs = sum(path.stat().st_size for path in (Path(tmp) / "out1" / "thumbs").iterdir())
+        print(f"\t{n_images} requests either way. full size {full / 2 ** 20:.2f}MB, thumbnails {thumbs / 2 ** 20:.2f}MB")
@@ -0,0 +1,50 @@
+"""
+build time of the tile quadtree (create_map tiles) against the number of datapoints, the size of
+tiles.json, and how many datapoints a viewer loads for a view of a tenth of the map at the deepest zoom
+
+    python benchmarks/bench_tiles.py [max_rows]
+"""
+import io
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from bench_datapoints import synthetic_datapoints  # noqa: E402
+from build_tiles import build_tiles  # noqa: E402
+import json_writer  # noqa: E402
+
+NODE_ATTR_MAP = {"OriginalLabel": "label", "OriginalX": "x_tsne", "OriginalY": "y_tsne"}
+
+
+def in_view(tile, view) -> bool:
+    "same test as MP_APP.visibleTiles"
+    b = tile["bounds"]
+    return not (b[2] < view[0] or b[0] > view[2] or b[3] < view[1] or b[1] > view[3])
+
+
+if __name__ == "__main__":
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_rows = 10_000
+    while n_rows <= max_rows:
+        df_datapoints = synthetic_datapoints(n_rows)
+        start = time.perf_counter()
+        index, leafIds = build_tiles(df_datapoints, [], NODE_ATTR_MAP)
+        elapsed = time.perf_counter() - start
+        f = io.BytesIO()
+        json_writer.dump(index, f, indent=None)
+
+        pyramid = index["pyramids"][0]
+        x0, y0, x1, y1 = pyramid["bounds"]
+        # a view of a tenth of the width and height, in the middle
+        view = [x0 + 0.45 * (x1 - x0), y0 + 0.45 * (y1 - y0), x0 + 0.55 * (x1 - x0), y0 + 0.55 * (y1 - y0)]
+        loaded = sum(tile["count"] for tile in pyramid["tiles"] if tile["leaf"] and in_view(tile, view))
+        print(
+            f"\t{n_rows:>8} datapoints: {elapsed:6.2f}s, {len(pyramid['tiles']):>5} tiles, {len(leafIds[0]):>5} leaves,"
+            f" {pyramid['maxZoom'] + 1:>2} zooms, tiles.json {len(f.getvalue()) / 2 ** 10:7.1f}KB,"
+            f" view loads {loaded:>7} ({loaded / n_rows:5.1%})"
+        )
+        n_rows *= 10
@@ -8,10 +8,7 @@ Created on Thu Jan 14 19:33:18 2021
 
 import pathlib as pl  # path library
 from src.map_utils import create_map, create_snapshot
-import os
-import http.server
-import socketserver
-import webbrowser
+from src.preview_server import serve
 
 
 # configure the files and folders
@@ -228,20 +225,4 @@ create_map(
 
 
 # launch local server and open browser to display map
-def launch_map_in_browser(project_directory, PORT=5000):
-    """
-    launches a new tab in active browswer with the map
-    project_directory : string, the directory with the project data (index.html and 'data' folder)
-    """
-    web_dir = os.path.join(os.getcwd(), project_directory)
-    os.chdir(web_dir)  # change to project directory where index.html and data folder are
-
-    webbrowser.open_new_tab("http://localhost:" + str(PORT))  # open new tab in browswer
-
-    Handler = http.server.SimpleHTTPRequestHandler
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print("serving at port", PORT, "go to http://localhost:%s \nCTL_C to quit\n" % str(PORT))
-        httpd.serve_forever()
-
-
-launch_map_in_browser(str(outFolder), PORT=5000)
+serve(str(outFolder), 5000, openBrowser=True)
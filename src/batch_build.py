@@ -0,0 +1,126 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Union
+import contextlib
+import io
+import sys
+import time
+import traceback
+
+import yaml
+
+from map_utils import create_map, create_snapshot
+from parallel_build import cpu_workers
+from utils import merge, preload_templates
+
+# from src.map_utils import create_map, create_snapshot
+# from src.parallel_build import cpu_workers
+# from src.utils import merge, preload_templates
+
+# project keys that are input files, resolved against the manifest's folder
+PATH_KEYS = ["datapointsPath", "linksPath", "datapointAttrPath", "outFolder"]
+
+# written to each map folder with the output of its build
+LOG_NAME = "build.log"
+
+
+def load_batch(manifestPath: Union[Path, str]) -> List[Dict[str, Any]]:
+    """reads a batch manifest (yaml or json) and returns one create_map spec per project.
+    see projects/public/batch.yaml. "defaults" are merged under every project, relative paths
+    are resolved against the manifest's folder and outFolder defaults to the project name.
+
+    Args:
+        manifestPath (Union[Path, str]): the manifest file
+
+    Returns:
+        List[Dict[str, Any]]: the projects, each with a "name" and the create_map args
+    """
+    manifestPath = Path(manifestPath)
+    with open(manifestPath) as f:
+        manifest: Dict[str, Any] = yaml.safe_load(f) or {}
+
+    projects = []
+    for i, project in enumerate(manifest.get("projects") or []):
+        project = merge(manifest.get("defaults") or {}, project)
+        name = project.get("name", f"project_{i}")
+        project = {**project, "name": name, "outFolder": project.get("outFolder", name)}
+        for key in PATH_KEYS:
+            if key in project:
+                project[key] = str(manifestPath.parent / project[key])
+        projects.append(project)
+    return projects
+
+
+def build_project(project: Dict[str, Any]) -> Dict[str, Any]:
+    """builds one project of a batch. errors are caught and returned, not raised
+
+    Args:
+        project (Dict[str, Any]): a spec from load_batch. "snapshots" are create_snapshot args,
+                                  with an optional fixed "id"
+
+    Returns:
+        Dict[str, Any]: {"name", "ok", "seconds", "error"}. the build output is written to outFolder/build.log
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    error = None
+    try:
+        with contextlib.redirect_stdout(log):
+            args = {key: val for key, val in project.items() if key != "name"}
+            snapshots = []
+            for spec in args.pop("snapshots", []):
+                snap = create_snapshot(**{key: val for key, val in spec.items() if key != "id"})
+                snapshots.append({**snap, "id": spec["id"]} if "id" in spec else snap)
+            create_map(**args, snapshots=snapshots)
+    except Exception:
+        error = traceback.format_exc()
+        log.write(error)
+
+    outFolder = Path(project["outFolder"])
+    if outFolder.exists():
+        (outFolder / LOG_NAME).write_text(log.getvalue())
+    return {"name": project["name"], "ok": error is None, "seconds": time.perf_counter() - start, "error": error}
+
+
+def build_batch(projects: List[Dict[str, Any]], workers: int = 0) -> List[Dict[str, Any]]:
+    """builds the projects concurrently, one per process. a failing project, or one whose process
+    dies, is reported and does not stop the others
+
+    Args:
+        projects (List[Dict[str, Any]]): specs from load_batch
+        workers (int, optional): processes to build with. Defaults to 0, one per cpu.
+
+    Returns:
+        List[Dict[str, Any]]: the build_project results, in the order of projects
+    """
+    # parse the templates once. forked workers share the parsed registry
+    preload_templates()
+    workers = min(cpu_workers(workers), max(len(projects), 1))
+    print(f">> building {len(projects)} maps with {workers} processes")
+
+    results = []
+    with ProcessPoolExecutor(workers) as pool:
+        start = time.perf_counter()
+        futures = [pool.submit(build_project, project) for project in projects]
+        for project, future in zip(projects, futures):
+            try:
+                result = future.result()
+            except Exception:
+                # the worker died (e.g. out of memory) and broke the pool. the builds already done are kept
+                error = traceback.format_exc()
+                result = {"name": project["name"], "ok": False, "seconds": time.perf_counter() - start, "error": error}
+            status = "ok" if result["ok"] else "FAILED"
+            print(f"\t- {result['name']:<30} {status:<6} {result['seconds']:6.2f}s")
+            results.append(result)
+
+    failed = [result for result in results if not result["ok"]]
+    print(f">> {len(results) - len(failed)} built, {len(failed)} failed")
+    for result in failed:
+        print(f"\n{result['name']}:\n{result['error']}")
+    return results
+
+
+if __name__ == "__main__":
+    # python batch_build.py manifest.yaml [workers]
+    results = build_batch(load_batch(sys.argv[1]), int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    sys.exit(0 if all(result["ok"] for result in results) else 1)
@@ -0,0 +1,184 @@
+from typing import Any, Dict, List, Tuple, Union
+import numpy as np
+import pandas as pd
+from build_shards import shard_links
+from build_tiles import layout_axes
+from ingest import CsvChunks
+from prune_links import WEIGHT_COL
+from utils import CHUNKSIZE, frame_chunks, template_view
+
+#from src.build_shards import shard_links
+#from src.build_tiles import layout_axes
+#from src.ingest import CsvChunks
+#from src.prune_links import WEIGHT_COL
+#from src.utils import CHUNKSIZE, frame_chunks, template_view
+
+# above this many values, an attr colors by a gradient rather than by cluster. no coarse network for it
+MAX_CLUSTERS = 1000
+
+
+def snapshot_clusters(snapshots: List[Dict]) -> List[Tuple[str, Tuple[str, str]]]:
+    """the distinct (nodeColorAttr, (xaxis, yaxis)) of the original and scatterplot snapshots, in snapshot order
+
+    Args:
+        snapshots (List[Dict]): from create_snapshot
+
+    Returns:
+        List[Tuple[str, Tuple[str, str]]]: the color attr and axes, as attrs of the player
+    """
+    views = []
+    for snap in snapshots:
+        layout = snap.get("layout", {})
+        axes = layout_axes(layout)
+        attr = layout.get("settings", {}).get("nodeColorAttr")
+        if axes is not None and attr is not None and (attr, axes) not in views:
+            views.append((attr, axes))
+    return views
+
+
+def _columns(sheet: Union[pd.DataFrame, CsvChunks], columns: List[str], chunksize: int) -> pd.DataFrame:
+    # just the columns needed, of a sheet that may be read in chunks
+    if isinstance(sheet, pd.DataFrame):
+        return sheet[columns]
+    return pd.concat([df_chunk[columns] for df_chunk in frame_chunks(sheet, chunksize)], ignore_index=True)
+
+
+def cluster_network(
+    df_nodes: pd.DataFrame,
+    df_links: pd.DataFrame,
+    link_attr_map: Dict[str, str],
+    clusterCol: str,
+    xcol: str,
+    ycol: str,
+) -> Dict[str, Any]:
+    """the coarse network of the clusters: a super-node per value of clusterCol, at the centroid of its nodes
+    and sized by their number, and a link per pair of clusters with links between them, weighted by the sum
+    of their weights. links are counted either way round, and the links inside a cluster are counted on its
+    super-node. the largest cluster comes first
+
+    Args:
+        df_nodes (pd.DataFrame): the datapoints, with the id, cluster and coordinate columns
+        df_links (pd.DataFrame): the links, with the source and target columns, and the weight when there is one
+        link_attr_map (Dict[str, str]): map of {required params: column-names} for the links
+        clusterCol (str): the datapoints column to group by. missing values make a cluster of their own, keyed ""
+        xcol (str): the datapoints column of the node x
+        ycol (str): the datapoints column of the node y
+
+    Returns:
+        Dict[str, Any]: {"nodes": [...], "links": [...]}, records shaped as in links.json
+    """
+    vals = df_nodes[clusterCol].astype(object)
+    keys = vals.where(vals.notna(), "").astype(str)
+    counts = keys.value_counts()
+    order = sorted(counts.index, key=lambda key: (-counts[key], key))
+    codes = keys.map({key: n for n, key in enumerate(order)}).to_numpy(dtype=np.int64)
+    n_clusters = len(order)
+
+    # centroids of the nodes with both coordinates
+    xs, ys = (pd.to_numeric(df_nodes[col].astype(object), errors="coerce").to_numpy(dtype=np.float64) for col in [xcol, ycol])
+    placed = np.isfinite(xs) & np.isfinite(ys)
+    n_placed = np.bincount(codes[placed], minlength=n_clusters)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cx = np.bincount(codes[placed], weights=xs[placed], minlength=n_clusters) / n_placed
+        cy = np.bincount(codes[placed], weights=ys[placed], minlength=n_clusters) / n_placed
+
+    # links by the clusters at their ends. ends that are not datapoints are left out
+    linkTpl = template_view("link")
+    sources, targets = shard_links(df_links, link_attr_map, df_nodes, codes)
+    weights = np.full(len(df_links), float(linkTpl["attr"][WEIGHT_COL]))
+    if WEIGHT_COL in df_links.columns:
+        given = pd.to_numeric(df_links[WEIGHT_COL], errors="coerce").to_numpy(dtype=np.float64)
+        weights = np.where(np.isnan(given), weights, given)
+    valid = (sources >= 0) & (targets >= 0)
+    inner = valid & (sources == targets)
+    innerCount = np.bincount(sources[inner], minlength=n_clusters)
+    innerWeight = np.bincount(sources[inner], weights=weights[inner], minlength=n_clusters)
+    cross = valid & (sources != targets)
+    pairs = np.minimum(sources[cross], targets[cross]) * n_clusters + np.maximum(sources[cross], targets[cross])
+    pairKeys, pairCodes = np.unique(pairs, return_inverse=True)
+    pairCount = np.bincount(pairCodes, minlength=len(pairKeys))
+    pairWeight = np.bincount(pairCodes, weights=weights[cross], minlength=len(pairKeys))
+
+    nodeTpl = template_view("node")
+    nodes = [
+        {
+            **nodeTpl,
+            "id": f"{n}",
+            "dataPointId": key,
+            "attr": {
+                **nodeTpl["attr"],
+                "OriginalLabel": key,
+                "OriginalSize": int(counts[key]),
+                "OriginalX": float(cx[n]) if n_placed[n] > 0 else nodeTpl["attr"]["OriginalX"],
+                "OriginalY": float(cy[n]) if n_placed[n] > 0 else nodeTpl["attr"]["OriginalY"],
+                clusterCol: key,
+                "nodes": int(counts[key]),
+                "links": int(innerCount[n]),
+                WEIGHT_COL: float(innerWeight[n]),
+            },
+        }
+        for n, key in enumerate(order)
+    ]
+    links = [
+        {
+            **linkTpl,
+            "id": f"{n}",
+            "source": f"{pair // n_clusters}",
+            "target": f"{pair % n_clusters}",
+            "attr": {**linkTpl["attr"], "OriginalLabel": f"{n}", "links": int(count), WEIGHT_COL: float(weight)},
+        }
+        for n, (pair, count, weight) in enumerate(zip(pairKeys.tolist(), pairCount.tolist(), pairWeight.tolist()))
+    ]
+    return {"nodes": nodes, "links": links}
+
+
+def build_clusters(
+    df_datapoints: Union[pd.DataFrame, CsvChunks],
+    df_links: Union[pd.DataFrame, CsvChunks],
+    snapshots: List[Dict],
+    node_attr_map: Dict[str, str],
+    link_attr_map: Dict[str, str],
+    chunksize: int = CHUNKSIZE,
+) -> Dict[str, Any]:
+    """a coarse network of the clusters for each color attr and axes of the original and scatterplot snapshots
+    (see cluster_network), for the player to draw while zoomed out. OriginalX/OriginalY are read from the
+    columns node_attr_map names. color attrs with more than MAX_CLUSTERS values, or that are not datapoints
+    columns, get none
+
+    Args:
+        df_datapoints (Union[pd.DataFrame, CsvChunks]): the datapoints, whole or in chunks
+        df_links (Union[pd.DataFrame, CsvChunks]): the links, whole or in chunks
+        snapshots (List[Dict]): from create_snapshot
+        node_attr_map (Dict[str, str]): map of {required params: column-names} for the nodes
+        link_attr_map (Dict[str, str]): map of {required params: column-names} for the links
+        chunksize (int, optional): rows per pass when the sheets are DataFrames. Defaults to CHUNKSIZE.
+
+    Returns:
+        Dict[str, Any]: {"networks": [{"attr": color attr, "axes": [xaxis, yaxis], "nodes": [...], "links": [...]}]}
+    """
+    views = []
+    for attr, axes in snapshot_clusters(snapshots):
+        cols = [node_attr_map.get(name, name) for name in (attr, *axes)]
+        missing = [col for col in cols if col not in df_datapoints.columns]
+        if len(missing) > 0:
+            print(f"\t- no clusters for '{attr}' over {axes}. {missing} not datapoints columns")
+            continue
+        views.append((attr, axes, cols))
+
+    networks: List[Dict[str, Any]] = []
+    if len(views) == 0:
+        return {"networks": networks}
+    nodeCols = list(dict.fromkeys(["id"] + [col for _, _, cols in views for col in cols]))
+    linkCols = [link_attr_map["source"], link_attr_map["target"]]
+    if WEIGHT_COL in df_links.columns:
+        linkCols.append(WEIGHT_COL)
+    df_nodes = _columns(df_datapoints, nodeCols, chunksize)
+    df_edges = _columns(df_links, linkCols, chunksize)
+    for attr, axes, (clusterCol, xcol, ycol) in views:
+        n_clusters = df_nodes[clusterCol].nunique(dropna=False)
+        if n_clusters > MAX_CLUSTERS:
+            print(f"\t- no clusters for '{attr}'. {n_clusters} values, more than {MAX_CLUSTERS}")
+            continue
+        network = cluster_network(df_nodes, df_edges, link_attr_map, clusterCol, xcol, ycol)
+        networks.append({"attr": attr, "axes": list(axes), **network})
+    return {"networks": networks}
@@ -1,17 +1,17 @@
-from pathlib import Path
+import numpy as np
 import pandas as pd
-from typing import Any, List, Dict, Union
-from utils import load_templates
+from typing import Any, Iterable, Iterator, List, Dict, Union
+from utils import CHUNKSIZE, frame_chunks, row_dtype, template_view
 
-#from src.utils import load_templates
+#from src.utils import CHUNKSIZE, frame_chunks, row_dtype, template_view
 
 
-def build_attrDescriptors(datapointAttrPath: Union[Path, str]) -> List[Dict[str, Any]]:
+def build_attrDescriptors(df_attrs: pd.DataFrame) -> List[Dict[str, Any]]:
 
-    df_attrs: pd.DataFrame = pd.read_csv(str(datapointAttrPath))
-    attrDescriptorTpl = load_templates("datapointAttribs")
+    attrDescriptorTpl = template_view("datapointAttribs")
 
-    df_attrs.fillna(value="", inplace=True)
+    # fill a copy. the parsed sheet is shared with the other builders
+    df_attrs = df_attrs.fillna(value="")
     attrDescriptors = []
     for _, row in df_attrs.iterrows():
         # extract the attr (each row) data as a dict
@@ -37,35 +37,84 @@ def build_attrDescriptors(datapointAttrPath: Union[Path, str]) -> List[Dict[str,
     return attrDescriptors
 
 
-def build_datapoints(dpPath: str, dpAttribTypes) -> List[Dict[str, Any]]:
-    df_datapoints: pd.DataFrame = pd.read_csv(dpPath)
-
+def build_attr_columns(df_datapoints: pd.DataFrame, dpAttribTypes: Dict[str, str]) -> Dict[str, List[Any]]:
+    """validates the attr vals of every column based on its attrType, one column at a time
+
+    Args:
+        df_datapoints (pd.DataFrame): the datapoints sheet
+        dpAttribTypes (Dict[str, str]): map of {column-name: attrType}
+
+    Returns:
+        Dict[str, List[Any]]: map of {column-name: list of formatted values}
+    """
+    dtype = row_dtype(df_datapoints)
+    columns: Dict[str, List[Any]] = {}
+    for key in df_datapoints.columns:
+        vals = df_datapoints[key].to_numpy(dtype=dtype)
+        if dpAttribTypes[key] == "liststring":
+            # convert any liststring attr into a list. NaN or non string values become empty
+            columns[key] = [val.split("|") if isinstance(val, str) else "" for val in vals]
+        else:
+            vals = vals.astype(object)
+            vals[pd.isna(vals)] = ""
+            columns[key] = vals.tolist()
+    return columns
+
+
+def iter_datapoints(
+    sheet: Union[pd.DataFrame, Iterable[pd.DataFrame]], dpAttribTypes: Dict[str, str], chunksize: int = CHUNKSIZE
+) -> Iterator[Dict[str, Any]]:
+    """yields the datapoints, building chunksize rows at a time so only one chunk of
+    records is held in memory while they are streamed to the writer.
+    sheet is the datapoints DataFrame, or its chunks (e.g. from ingest.CsvChunks)
+    """
     # load datapoint template - datapoint.yaml
-    datapointTpl = load_templates("datapoint")
-
-    datapoints = []
-    for _, dp in df_datapoints.iterrows():
-        # structure the datapoint (each row) as a dict
-        attrs: Dict[str, Any] = dict(dp)
-
-        # validate the attr vals based on type.
-        for key, val in attrs.items():
-            if dpAttribTypes[key] == "liststring":
-                # check if value is NaN or not string type
-                if isinstance(val, str):
-                    # convert any liststring attr into a list
-                    attrs[key] = val.split("|") if "|" in val else [val]
-                else:
-                    attrs[key] = ""
-            elif dpAttribTypes[key] == "float" or dpAttribTypes[key] == "integer" or dpAttribTypes[key] == "year":
-                attrs[key] = val if not pd.isna(attrs[key]) else ""
-            else:
-                attrs[key] = val if not pd.isna(attrs[key]) else ""
-
-        # merge attrs with template
-        dp = {**datapointTpl, **{"id": f'{dp["id"]}', "attr": attrs}}
-
-        # collect datapoint
-        datapoints.append(dp)
-
-    return datapoints
\ No newline at end of file
+    datapointTpl = template_view("datapoint")
+
+    for df_chunk in frame_chunks(sheet, chunksize):
+        # validate the attr vals based on type, column by column
+        columns = build_attr_columns(df_chunk, dpAttribTypes)
+        ids = [f"{val}" for val in df_chunk["id"].to_numpy(dtype=row_dtype(df_chunk))]
+
+        # merge attrs with template, row by row
+        keys = list(columns.keys())
+        for dpId, vals in zip(ids, zip(*columns.values())):
+            yield {**datapointTpl, **{"id": dpId, "attr": dict(zip(keys, vals))}}
+
+
+def build_datapoints(df_datapoints: pd.DataFrame, dpAttribTypes) -> List[Dict[str, Any]]:
+    return list(iter_datapoints(df_datapoints, dpAttribTypes))
+
+
+def _encode_liststring(vals: List[Any]) -> Dict[str, List[Any]]:
+    # dictionary-encode the tags of a liststring column: a vocabulary of the distinct tags
+    # and, per datapoint, the list of tag codes (None where the value is empty)
+    is_list = [isinstance(val, list) for val in vals]
+    lens = np.array([len(val) if isList else 0 for val, isList in zip(vals, is_list)], dtype=np.int64)
+    tags = pd.Series([tag for val, isList in zip(vals, is_list) if isList for tag in val], dtype=object)
+    codes, vocab = pd.factorize(tags)
+    rows = np.split(codes, np.cumsum(lens)[:-1]) if len(vals) > 0 else []
+    return {
+        "vocab": vocab.tolist(),
+        "codes": [row.tolist() if isList else None for row, isList in zip(rows, is_list)],
+    }
+
+
+def build_columnar_datapoints(df_datapoints: pd.DataFrame, dpAttribTypes: Dict[str, str]) -> Dict[str, Any]:
+    """builds the datapoints as one array per attribute instead of one dict per datapoint.
+    liststring attributes are dictionary-encoded into a vocabulary and per datapoint tag codes.
+    the loader shim in index.html expands it back into datapoints for the player.
+
+    Args:
+        df_datapoints (pd.DataFrame): the datapoints sheet
+        dpAttribTypes (Dict[str, str]): map of {column-name: attrType}
+
+    Returns:
+        Dict[str, Any]: {"format": "columnar", "ids": [datapoint ids], "columns": {column-name: values}}
+    """
+    columns: Dict[str, Any] = build_attr_columns(df_datapoints, dpAttribTypes)
+    for key, vals in columns.items():
+        if dpAttribTypes[key] == "liststring":
+            columns[key] = _encode_liststring(vals)
+    ids = [f"{val}" for val in df_datapoints["id"].to_numpy(dtype=row_dtype(df_datapoints))]
+    return {"format": "columnar", "ids": ids, "columns": columns}
@@ -0,0 +1,85 @@
+from pathlib import Path
+from typing import Any, Dict, Union
+import hashlib
+import json
+
+# name of the manifest file in the output folder
+MANIFEST_NAME = "build_manifest.json"
+
+# the builder code and templates. a change to any of them invalidates every output
+SRC_DIR = Path(__file__).resolve().parent
+
+
+def load_manifest(out_dir: Path) -> Dict[str, Any]:
+    """the manifest of the previous build in out_dir, or an empty one
+
+    Args:
+        out_dir (Path): the map folder
+
+    Returns:
+        Dict[str, Any]: {"inputs": {path: {size, mtime_ns, sha1}}, "outputs": {file: build key}}
+    """
+    manifest: Dict[str, Any] = {"inputs": {}, "outputs": {}}
+    try:
+        with open(out_dir / MANIFEST_NAME) as f:
+            manifest = {**manifest, **json.load(f)}
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return manifest
+
+
+def save_manifest(out_dir: Path, manifest: Dict[str, Any]):
+    with open(out_dir / MANIFEST_NAME, mode="w") as f:
+        json.dump(manifest, f, indent=4)
+
+
+def clear_manifest(out_dir: Path):
+    "removes the manifest, so a later incremental build does not trust files built without it"
+    (out_dir / MANIFEST_NAME).unlink(missing_ok=True)
+
+
+def _sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, mode="rb") as f:
+        for block in iter(lambda: f.read(2 ** 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_hash(path: Union[Path, str], manifest: Dict[str, Any]) -> str:
+    """content hash of an input file. files whose size and mtime match the manifest are not re-read
+
+    Args:
+        path (Union[Path, str]): input file
+        manifest (Dict[str, Any]): the build manifest. its "inputs" entry is updated
+
+    Returns:
+        str: sha1 of the file content
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    known = manifest["inputs"].get(str(path), {})
+    if known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+        return known["sha1"]
+    sha1 = _sha1(path)
+    manifest["inputs"][str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha1}
+    return sha1
+
+
+def source_hash() -> str:
+    "hash of the builder code and templates"
+    digest = hashlib.sha1()
+    for path in sorted(SRC_DIR.glob("*.py")) + sorted((SRC_DIR / "templates").glob("*.yaml")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def build_key(*parts: Any) -> str:
+    "hash of everything an output file is built from: input hashes, parameters, snapshots etc."
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def is_fresh(manifest: Dict[str, Any], path: Path, key: str) -> bool:
+    "true if path exists and was built from the same inputs"
+    return path.exists() and manifest["outputs"].get(path.name) == key
@@ -1,76 +1,128 @@
-from pathlib import Path
+import numpy as np
 import pandas as pd
-from typing import Any, List, Dict, Union
-from utils import load_templates, merge
-#from src.utils import load_templates, merge
+from typing import Any, Iterable, Iterator, List, Dict, Union
+from utils import CHUNKSIZE, frame_chunks, row_dtype, template_view
+#from src.utils import CHUNKSIZE, frame_chunks, row_dtype, template_view
 
+# node attrs taken from the datapoint columns in attr_map, and their value when unmapped
+NODE_ATTR_DEFAULTS: Dict[str, Any] = {"OriginalLabel": "Node", "OriginalX": 0, "OriginalY": 0}
 
-def build_nodes(dpPath: Union[Path, str], attr_map: Dict[str, str]) -> List[Dict[str, Any]]:
-    df_datapoints: pd.DataFrame = pd.read_csv(str(dpPath))
 
+def _template_equal(vals: List[Any], tplVal: Any) -> List[Any]:
+    # merge() keeps a template leaf while the incoming value compares equal to it (e.g. a weight of 1.0 stays 1)
+    return [tplVal if val is not pd.NA and val == tplVal else val for val in vals]
+
+
+def iter_node_chunk(df_chunk: pd.DataFrame, attr_map: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+    "yields the nodes of one chunk of the datapoints"
     # load the template - node.yaml
-    nodeTpl = load_templates("node")
-
-    nodes = []
-    for _, dp in df_datapoints.iterrows():
-
-        # form the final datapoint with template
-        nd = merge(
-            nodeTpl,
-            {
-                "dataPointId": f'{dp["id"]}',
-                "id": f'{dp["id"]}',
-                "attr": {
-                    "OriginalLabel": dp.get(attr_map.get("OriginalLabel", ""), "Node"),
-                    "OriginalX": dp.get(attr_map.get("OriginalX", ""), 0),
-                    "OriginalY": dp.get(attr_map.get("OriginalY", ""), 0),
-                },
-            },
-        )
-        # collect corresponding node for the datapoint
-        nodes.append(nd)
-    return nodes
-
-
-def build_links(linksPath: Union[Path, str], attr_map: Dict[str, str]) -> List[Dict[str, Any]]:
-    df_links: pd.DataFrame = pd.read_csv(linksPath)
+    nodeTpl = template_view("node")
+    attrTpl: Dict[str, Any] = nodeTpl["attr"]
+    dtype = row_dtype(df_chunk)
+    n_nodes = len(df_chunk)
+    ids = [f"{val}" for val in df_chunk["id"].to_numpy(dtype=dtype)]
+
+    # mapped attrs, one column at a time. unmapped ones get the default
+    mapped: Dict[str, List[Any]] = {}
+    for key, default in NODE_ATTR_DEFAULTS.items():
+        if attr_map.get(key, "") in df_chunk.columns:
+            mapped[key] = _template_equal(df_chunk[attr_map[key]].to_numpy(dtype=dtype).tolist(), attrTpl[key])
+        else:
+            mapped[key] = [default] * n_nodes
+    mainCols = {"id": ids, "dataPointId": ids}
+    mainCols = {key: mainCols.get(key, [nodeTpl[key]] * n_nodes) for key in nodeTpl if key != "attr"}
+    attrCols = {key: mapped.get(key, [tplVal] * n_nodes) for key, tplVal in attrTpl.items()}
+
+    # assemble the nodes in one pass. keys in template order, as merge() leaves them
+    mainKeys, attrKeys = list(mainCols.keys()), list(attrCols.keys())
+    for main, attr in zip(zip(*mainCols.values()), zip(*attrCols.values())):
+        yield {**dict(zip(mainKeys, main)), "attr": dict(zip(attrKeys, attr))}
+
+
+def iter_nodes(
+    sheet: Union[pd.DataFrame, Iterable[pd.DataFrame]], attr_map: Dict[str, str], chunksize: int = CHUNKSIZE
+) -> Iterator[Dict[str, Any]]:
+    """yields the nodes, building chunksize rows at a time so only one chunk of
+    records is held in memory while they are streamed to the writer.
+    sheet is the datapoints DataFrame, or its chunks (e.g. from ingest.CsvChunks)
+    """
+    for df_chunk in frame_chunks(sheet, chunksize):
+        yield from iter_node_chunk(df_chunk, attr_map)
+
+
+def build_nodes(df_datapoints: pd.DataFrame, attr_map: Dict[str, str]) -> List[Dict[str, Any]]:
+    return list(iter_nodes(df_datapoints, attr_map))
+
+
+def _node_ids(df_links: pd.DataFrame, col: str) -> List[str]:
+    vals = df_links[col].to_numpy(dtype=row_dtype(df_links))
+    if pd.isna(vals).any():
+        raise ValueError(f"links column '{col}' has missing values")
+    return vals.astype(np.int64).astype(str).tolist()
 
+
+def iter_link_chunk(df_chunk: pd.DataFrame, attr_map: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+    "yields the links of one chunk of the links"
     # load the template - link.yaml
-    linkTpl = load_templates("link")
-
-    links = []
-    for idx, link in df_links.iterrows():
-        # extract the link data (each row) as a dict
-        edgeAttrs: Dict[str, Any] = dict(link)
-
-        # required main params
-        link = merge(
-            linkTpl,
-            {
-                "id": f"{idx}",
-                "source": f"{int(edgeAttrs[attr_map['source']])}",
-                "target": f"{int(edgeAttrs[attr_map['target']])}",
-                "isDirectional": edgeAttrs.get(attr_map.get("isDirectional", ""), False),
-                "attr": {"OriginalLabel": f"{idx}"},
-            },
-        )
-
-        # params other than ["id", "source", "target", "isdirectional"] in the datasheet
-        # row gets pooled inside the 'attr' key. see template at link.yaml
-        otherAttrs = {
-            at: val for at, val in edgeAttrs.items() if at.lower() not in ["id", "source", "target", "isdirectional"]
-        }
-        linkMerged = merge(linkTpl, {"attr": otherAttrs})
-
-        # collect link
-        links.append(dict(linkMerged))
-
-    return links
+    linkTpl = template_view("link")
+    attrTpl: Dict[str, Any] = linkTpl["attr"]
+    dtype = row_dtype(df_chunk)
+    n_links = len(df_chunk)
+
+    # params other than ["id", "source", "target", "isdirectional"] in the datasheet
+    # row gets pooled inside the 'attr' key. see template at link.yaml
+    otherCols = [col for col in df_chunk.columns if col.lower() not in ["id", "source", "target", "isdirectional"]]
+    attrKeys = list(attrTpl.keys()) + [col for col in otherCols if col not in attrTpl]
+
+    # required main params, one column at a time
+    isDirectionalCol = attr_map.get("isDirectional", "")
+    if isDirectionalCol in df_chunk.columns:
+        isDirectional = _template_equal(df_chunk[isDirectionalCol].to_numpy(dtype=dtype).tolist(), linkTpl["isDirectional"])
+    else:
+        isDirectional = [False] * n_links
+    mainCols: Dict[str, List[Any]] = {
+        "id": df_chunk.index.astype(str).tolist(),
+        "isDirectional": isDirectional,
+        "source": _node_ids(df_chunk, attr_map["source"]),
+        "target": _node_ids(df_chunk, attr_map["target"]),
+    }
+    mainCols = {key: mainCols[key] if key in mainCols else [linkTpl[key]] * n_links for key in linkTpl if key != "attr"}
+
+    # attr params, with the template defaults filled once per column
+    attrCols: Dict[str, List[Any]] = {}
+    for key in attrKeys:
+        if key in otherCols:
+            vals = df_chunk[key].to_numpy(dtype=dtype).tolist()
+            attrCols[key] = _template_equal(vals, attrTpl[key]) if key in attrTpl and key != "OriginalLabel" else vals
+        elif key == "OriginalLabel":
+            attrCols[key] = mainCols["id"]
+        else:
+            attrCols[key] = [attrTpl[key]] * n_links
+
+    # assemble the links in one pass
+    mainKeys = list(mainCols.keys())
+    for main, attr in zip(zip(*mainCols.values()), zip(*attrCols.values())):
+        yield {**dict(zip(mainKeys, main)), "attr": dict(zip(attrKeys, attr))}
+
+
+def iter_links(
+    sheet: Union[pd.DataFrame, Iterable[pd.DataFrame]], attr_map: Dict[str, str], chunksize: int = CHUNKSIZE
+) -> Iterator[Dict[str, Any]]:
+    """yields the links, building chunksize rows at a time so only one chunk of
+    records is held in memory while they are streamed to the writer.
+    sheet is the links DataFrame, or its chunks (e.g. from ingest.CsvChunks)
+    """
+    for df_chunk in frame_chunks(sheet, chunksize):
+        yield from iter_link_chunk(df_chunk, attr_map)
+
+
+def build_links(df_links: pd.DataFrame, attr_map: Dict[str, str]) -> List[Dict[str, Any]]:
+    return list(iter_links(df_links, attr_map))
 
 
 def build_nodeAttrDescriptors() -> List[Dict[str, Any]]:
 
-    attrDescriptorTpl = load_templates("nodeAttribs")
+    attrDescriptorTpl = template_view("nodeAttribs")
     required_attrs = [
         {
             "id": "OriginalLabel",
@@ -148,7 +200,7 @@ def build_nodeAttrDescriptors() -> List[Dict[str, Any]]:
 
 
 def build_linkAttrDescriptors() -> List[Dict[str, Any]]:
-    linkAttrbTpl = load_templates("linkAttribs")
+    linkAttrbTpl = template_view("linkAttribs")
     required_attrs = [
         {
             "id": "OriginalLabel",
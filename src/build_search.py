@@ -0,0 +1,85 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Union
+from ingest import CsvChunks
+from unicode_marks import MARK_RANGES
+from utils import CHUNKSIZE, frame_chunks, row_dtype
+
+#from src.ingest import CsvChunks
+#from src.unicode_marks import MARK_RANGES
+#from src.utils import CHUNKSIZE, frame_chunks, row_dtype
+
+# words of the searchable values, lowercased: runs of letters, digits, combining marks and "_", as index.html
+# splits queries with [\p{L}\p{N}\p{M}_]+. \w is the letters, digits and "_". liststring tags are split into words too
+TOKEN_PATTERN = rf"[\w{''.join(f'{re.escape(chr(start))}-{re.escape(chr(end))}' for start, end in MARK_RANGES)}]+"
+
+# the searchable column of the attribute sheet, as parsed
+SEARCHABLE = [True, "TRUE", "True", "true"]
+
+# prefixes up to this long get postings of their own. longer ones match few enough tokens
+# to merge their postings at query time
+PREFIX_LEN = 2
+
+
+def _postings(codes: np.ndarray, rows: np.ndarray, n_keys: int) -> List[List[int]]:
+    # the rows of each key code, ascending and delta-encoded: the first row as is, then the gaps.
+    # one sort of the (code, row) pairs packed in an int, that also drops the repeats
+    n_rows = int(rows.max()) + 1 if len(rows) > 0 else 1
+    pairs = np.sort(codes.astype(np.int64) * n_rows + rows)
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) > 0 else pairs
+    codes, rows = pairs // n_rows, pairs % n_rows
+    starts = np.searchsorted(codes, np.arange(n_keys + 1))
+    firsts = starts[:-1][starts[:-1] < len(rows)]
+    deltas = np.diff(rows, prepend=0)
+    deltas[firsts] = rows[firsts]
+    deltas = deltas.tolist()
+    return [deltas[start:end] for start, end in zip(starts[:-1], starts[1:])]
+
+
+def build_search_index(
+    sheet: Union[pd.DataFrame, CsvChunks], attrDescriptors: List[Dict[str, Any]], chunksize: int = CHUNKSIZE
+) -> Dict[str, Any]:
+    """an inverted index over the attributes marked searchable: the words of their values, sorted, each with
+    the datapoints that hold it. short prefixes get postings too. a query looks its words up by binary
+    search over the sorted words, see MP_APP.searchIndex in index.html. datapoints are numbered in
+    nodes.json order, postings are ascending and delta-encoded.
+
+    Args:
+        sheet (Union[pd.DataFrame, CsvChunks]): the datapoints, whole or in chunks
+        attrDescriptors (List[Dict[str, Any]]): from build_dataset.build_attrDescriptors
+        chunksize (int, optional): rows per pass when sheet is a DataFrame. Defaults to CHUNKSIZE.
+
+    Returns:
+        Dict[str, Any]: {"attrs": [searched attr ids], "prefixLen": PREFIX_LEN, "ids": [datapoint ids], "tokens": [words],
+            "postings": [rows per word], "prefixes": [prefixes], "prefixPostings": [rows per prefix]}
+    """
+    attrs = [at["id"] for at in attrDescriptors if at["searchable"] in SEARCHABLE and at["id"] in sheet.columns]
+    ids: List[str] = []
+    words: List[np.ndarray] = [np.array([], dtype=object)]
+    rows: List[np.ndarray] = [np.array([], dtype=np.int64)]
+    for df_chunk in frame_chunks(sheet, chunksize):
+        start = len(ids)
+        ids.extend(f"{val}" for val in df_chunk["id"].to_numpy(dtype=row_dtype(df_chunk)))
+        for key in attrs:
+            # one (word, row) pair per word of each value, the row numbered across chunks
+            tokens = df_chunk[key].dropna().astype(str).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+            words.append(tokens.to_numpy(dtype=object))
+            rows.append(start + df_chunk.index.get_indexer(tokens.index))
+
+    # the words numbered in sorted order. prefixes are taken of the distinct words only
+    codes, tokens = pd.factorize(np.concatenate(words), sort=True)
+    rows = np.concatenate(rows).astype(np.int64)
+    tokens = pd.Index(tokens, dtype=object)
+    wordPrefixes = [tokens.str[:n] for n in range(1, PREFIX_LEN + 1)]
+    prefixes = pd.Index(np.unique(np.concatenate([prefix.to_numpy(dtype=object) for prefix in wordPrefixes]).astype(str)))
+    prefixCodes = np.concatenate([prefixes.get_indexer(prefix)[codes] for prefix in wordPrefixes])
+    return {
+        "attrs": attrs,
+        "prefixLen": PREFIX_LEN,
+        "ids": ids,
+        "tokens": tokens.tolist(),
+        "postings": _postings(codes, rows, len(tokens)),
+        "prefixes": prefixes.tolist(),
+        "prefixPostings": _postings(prefixCodes, np.tile(rows, PREFIX_LEN), len(prefixes)),
+    }
@@ -1,12 +1,12 @@
 import pandas as pd
 from typing import Any, List, Dict
-from utils import load_templates, merge
-#from src.utils import load_templates, merge
+from utils import template_view, merge
+#from src.utils import template_view, merge
 
 
 def build_settings(snapshots: List[Dict] = [], playerSettings: Dict[str, Any] = {}) -> Dict[str, Any]:
     # load template - settings.yaml
-    settings = load_templates("settings")
+    settings = template_view("settings")
 
     # inject the snapshots
     if len(snapshots) > 0:
@@ -15,7 +15,7 @@ def build_settings(snapshots: List[Dict] = [], playerSettings: Dict[str, Any] =
     else:
         # if no snapshot defined load the default template and fix the size by and color by
         print(f"\t- no snapshot found. injecting default")
-        default_snap = load_templates("snapshot")
+        default_snap = template_view("snapshot")
         default_snap = merge(
             default_snap,
             {
@@ -0,0 +1,95 @@
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+# shard files, in a folder next to the data files. "nodes" shards hold datapoints, "links" shards the
+# nodes and links inside one shard, as nodes.json and links.json do for the whole map
+SHARD_DIR = "shards"
+CROSS_SHARD = "cross"
+
+# above this, the shard files would take longer to request than to load in one file
+MAX_SHARDS = 256
+
+
+def shard_file(kind: str, shard: Any) -> str:
+    "path of a shard file, relative to the data folder"
+    return f"{SHARD_DIR}/{kind}.{shard}.json"
+
+
+def clear_shards(out_data_dir: Path, kind: str) -> None:
+    "deletes the kind's shard files of a previous build, and their sidecars"
+    for path in (out_data_dir / SHARD_DIR).glob(f"{kind}.*"):
+        path.unlink()
+
+
+def list_shards(out_data_dir: Path, kind: str) -> List[str]:
+    "the kind's shard files in out_data_dir, relative to it"
+    return sorted(f"{SHARD_DIR}/{path.name}" for path in (out_data_dir / SHARD_DIR).glob(f"{kind}.*.json"))
+
+
+def _id_keys(col: pd.Series) -> np.ndarray:
+    # node ids as written to the links: numbers as integers, see build_network._node_ids. numbers are
+    # kept as int64, which match far faster than their strings
+    if pd.api.types.is_numeric_dtype(col.dtype) and not pd.api.types.is_bool_dtype(col.dtype):
+        return col.to_numpy(dtype=np.float64).astype(np.int64)
+    return col.astype(str).to_numpy()
+
+
+def shard_datapoints(df_datapoints: pd.DataFrame, shardBy: str) -> Tuple[List[str], np.ndarray]:
+    """partitions the datapoints by the value of the shardBy column, e.g. the Keyword_Theme
+    cluster of network_functions.decorate_network. the largest shard comes first, so it loads first
+
+    Args:
+        df_datapoints (pd.DataFrame): the datapoints sheet
+        shardBy (str): column to partition by. missing values make a shard of their own, keyed ""
+
+    Returns:
+        Tuple[List[str], np.ndarray]: the shard keys, and the shard of each datapoint
+    """
+    if shardBy not in df_datapoints.columns:
+        raise ValueError(f"cannot shard by '{shardBy}'. it is not a datapoints column")
+    vals = df_datapoints[shardBy].astype(object)
+    keys = vals.where(vals.notna(), "").astype(str)
+    counts = keys.value_counts()
+    if len(counts) > MAX_SHARDS:
+        raise ValueError(f"'{shardBy}' has {len(counts)} values, more than {MAX_SHARDS} shards. shard by a cluster attr")
+    order = sorted(counts.index, key=lambda key: (-counts[key], key))
+    codes = keys.map({key: shard for shard, key in enumerate(order)}).to_numpy(dtype=np.int64)
+    return order, codes
+
+
+def shard_links(
+    df_links: pd.DataFrame, attr_map: Dict[str, str], df_datapoints: pd.DataFrame, codes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """the shards of the nodes at either end of each link. -1 for ids that are not a datapoint
+
+    Args:
+        df_links (pd.DataFrame): the links sheet
+        attr_map (Dict[str, str]): map of {required params: column-names} for the links
+        df_datapoints (pd.DataFrame): the datapoints sheet
+        codes (np.ndarray): the shard of each datapoint, from shard_datapoints
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: source and target shard of each link
+    """
+    # a repeated id is the first datapoint holding it
+    nodeIds = _id_keys(df_datapoints["id"])
+    first = ~pd.Index(nodeIds).duplicated()
+    nodeIds, codes = nodeIds[first], codes[first]
+    ends = []
+    for key in ["source", "target"]:
+        linkIds = _id_keys(df_links[attr_map[key]])
+        if nodeIds.dtype != linkIds.dtype:
+            # numbers on one side, text on the other. matched as the strings written to the files
+            nodeIds, linkIds = nodeIds.astype(str), linkIds.astype(str)
+        rows = pd.Index(nodeIds).get_indexer(linkIds)
+        ends.append(np.where(rows >= 0, codes[rows], -1))
+    return ends[0], ends[1]
+
+
+def cross_shard_pairs(sources: np.ndarray, targets: np.ndarray) -> List[Dict[str, int]]:
+    "the number of links from one shard to another, for the links whose ends are in different shards"
+    pairs, counts = np.unique(np.stack([sources, targets], axis=1), axis=0, return_counts=True)
+    return [{"source": int(s), "target": int(t), "links": int(n)} for (s, t), n in zip(pairs, counts)]
+
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Union
+from ingest import CsvChunks
+from utils import CHUNKSIZE, frame_chunks
+
+#from src.ingest import CsvChunks
+#from src.utils import CHUNKSIZE, frame_chunks
+
+# renderTypes summarized, by the kind of summary the filter panel draws them from
+HISTOGRAM_TYPES = ["histogram"]
+TAG_TYPES = ["tag-cloud", "wide-tag-cloud"]
+CATEGORY_TYPES = ["categorybar"]
+
+# equal width bins per histogram. integer attrs spanning fewer whole numbers get a bin per number
+HISTOGRAM_BINS = 20
+
+
+def _numbers(col: pd.Series) -> np.ndarray:
+    # the finite numbers of a column. text and missing values are left out
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype(object)
+    vals = pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return vals[np.isfinite(vals)]
+
+
+def _values(col: pd.Series, attrType: str) -> pd.Series:
+    # the tags of a liststring column (see build_dataset.build_attr_columns), the values of any other
+    vals = col.dropna()
+    if attrType == "liststring":
+        vals = vals.astype(str).str.split("|").explode()
+    return vals.astype(object)
+
+
+class _Histogram:
+    "bins and counts of a numeric attr, over chunks of the sheet: a pass for the range, one for the counts"
+
+    def __init__(self, attrType: str):
+        self.integral = attrType in ["integer", "year"]
+        self.lo, self.hi, self.counts = np.inf, -np.inf, None
+
+    def scan(self, vals: np.ndarray):
+        if len(vals) > 0:
+            self.lo, self.hi = min(self.lo, vals.min()), max(self.hi, vals.max())
+
+    def edges(self) -> np.ndarray:
+        if np.isinf(self.lo):
+            return np.array([])
+        if self.integral and self.hi - self.lo < HISTOGRAM_BINS:
+            # a bin per whole number
+            return np.arange(np.floor(self.lo), np.floor(self.hi) + 2)
+        if self.lo == self.hi:
+            return np.array([self.lo, self.hi])
+        return np.linspace(self.lo, self.hi, HISTOGRAM_BINS + 1)
+
+    def count(self, vals: np.ndarray, edges: np.ndarray):
+        counts = np.histogram(vals, bins=edges)[0] if len(edges) > 0 else np.zeros(0, dtype=np.int64)
+        self.counts = counts if self.counts is None else self.counts + counts
+
+    def summary(self, edges: np.ndarray) -> Dict[str, Any]:
+        if len(edges) == 0:
+            return {"min": None, "max": None, "bins": [], "counts": []}
+        return {"min": float(self.lo), "max": float(self.hi), "bins": edges.tolist(), "counts": self.counts.tolist()}
+
+
+def build_summaries(
+    sheet: Union[pd.DataFrame, CsvChunks], attrDescriptors: List[Dict[str, Any]], chunksize: int = CHUNKSIZE
+) -> Dict[str, Any]:
+    """the bins and counts the filter panel draws, per attribute, from columns of the datapoints: histograms
+    for histogram attrs, tag frequencies for tag clouds and value counts for category bars, most frequent
+    first. values that are missing (or not numbers, for histograms) are counted apart.
+
+    Args:
+        sheet (Union[pd.DataFrame, CsvChunks]): the datapoints, whole or in chunks
+        attrDescriptors (List[Dict[str, Any]]): from build_dataset.build_attrDescriptors
+        chunksize (int, optional): rows per pass when sheet is a DataFrame. Defaults to CHUNKSIZE.
+
+    Returns:
+        Dict[str, Any]: {"datapoints": n, "attrs": {attr id: summary}}
+    """
+    summarized = TAG_TYPES + CATEGORY_TYPES + HISTOGRAM_TYPES
+    attrs = {at["id"]: at for at in attrDescriptors if at["renderType"] in summarized and at["id"] in sheet.columns}
+    histograms = {key: _Histogram(at["attrType"]) for key, at in attrs.items() if at["renderType"] in HISTOGRAM_TYPES}
+    counts: Dict[str, pd.Series] = {key: pd.Series(dtype=np.int64) for key in attrs if key not in histograms}
+    missing: Dict[str, int] = {key: 0 for key in attrs}
+    n_rows = 0
+
+    # the counts of each chunk are added up. histograms need their range first, from a pass of their own
+    for df_chunk in frame_chunks(sheet, chunksize):
+        n_rows += len(df_chunk)
+        for key in counts:
+            missing[key] += int(df_chunk[key].isna().sum())
+            chunkCounts = _values(df_chunk[key], attrs[key]["attrType"]).value_counts()
+            counts[key] = counts[key].add(chunkCounts, fill_value=0)
+        for key, histogram in histograms.items():
+            vals = _numbers(df_chunk[key])
+            missing[key] += len(df_chunk) - len(vals)
+            histogram.scan(vals)
+    edges = {key: histogram.edges() for key, histogram in histograms.items()}
+    if len(histograms) > 0:
+        for df_chunk in frame_chunks(sheet, chunksize):
+            for key, histogram in histograms.items():
+                histogram.count(_numbers(df_chunk[key]), edges[key])
+
+    summaries: Dict[str, Any] = {}
+    for key, at in attrs.items():
+        summary: Dict[str, Any] = {"renderType": at["renderType"], "missing": missing[key]}
+        if key in histograms:
+            summary.update(histograms[key].summary(edges[key]))
+        else:
+            # most frequent first, ties in the order of the values
+            ranked = counts[key].astype(np.int64).reset_index()
+            ranked.columns = ["value", "count"]
+            ranked = ranked.sort_values("count", ascending=False, kind="stable")
+            summary.update({"values": ranked["value"].tolist(), "counts": ranked["count"].tolist()})
+        summaries[key] = summary
+    return {"datapoints": n_rows, "attrs": summaries}
@@ -0,0 +1,167 @@
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from fetch_cache import FetchCache, Transport, fetch_all, url_transport
+
+#from src.fetch_cache import FetchCache, Transport, fetch_all, url_transport
+
+# thumbnails, in a folder next to the data files. thumbs.json lists them
+THUMB_DIR = "thumbs"
+
+# create_map thumbnails options, e.g. {"size": 64}. "size": longest side in pixels (THUMB_SIZE). "format":
+# one of THUMB_FORMATS. "sprites": True, also packs them into sprite sheets. "cache": folder the images are
+# fetched into once (IMAGE_CACHE). "transport": a callable fetching an url's bytes, left out of the build key.
+# the picture attrs, and the snapshots' nodeImageAttr, point at the thumbnails, listed in data/thumbs.json
+THUMBNAIL_OPTIONS = ["size", "format", "sprites", "cache", "transport"]
+
+# the longest side of a thumbnail in pixels: a node drawn large, on a high dpi screen
+THUMB_SIZE = 64
+THUMB_FORMATS = ["png", "jpeg", "webp"]
+
+# sprite sheets: a grid of this many thumbnails a side
+SPRITE_GRID = 16
+
+# fetched images, kept across builds and maps. relative to the working directory
+IMAGE_CACHE = ".image_cache"
+
+def image_columns(attrDescriptors: List[Dict[str, Any]], snapshots: List[Dict], columns: List[str]) -> List[str]:
+    "the datapoints columns of picture attrs, and those the snapshots draw node images from"
+    cols = [at["id"] for at in attrDescriptors if at["attrType"] == "picture"]
+    for snap in snapshots:
+        settings = snap.get("layout", {}).get("settings", {})
+        if settings.get("nodeImageShow") and settings.get("nodeImageAttr"):
+            cols.append(settings["nodeImageAttr"])
+    return [col for col in dict.fromkeys(cols) if col in columns]
+
+
+def make_thumbnail(src: Path, dst: Path, size: int, fmt: str) -> Optional[Tuple[int, int]]:
+    """downscales the image at src to fit a size by size square, keeping its aspect, into dst.
+    run in the process pool. None when src is not an image Pillow reads
+
+    Returns:
+        Optional[Tuple[int, int]]: the thumbnail's width and height
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(src) as img:
+            img.thumbnail((size, size))
+            if fmt == "jpeg" and img.mode not in ["RGB", "L"]:
+                img = img.convert("RGB")
+            elif img.mode not in ["RGB", "RGBA", "L", "LA"]:
+                img = img.convert("RGBA")
+            tmp = dst.with_suffix(".tmp")
+            img.save(tmp, format=fmt)
+            tmp.replace(dst)
+            return img.size
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+        # not an image, a malformed one, or one too large to decode safely
+        return None
+
+
+def pack_sprites(thumbs: List[Path], size: int, out_dir: Path) -> List[Dict[str, Any]]:
+    """packs the thumbnails into png sheets of SPRITE_GRID by SPRITE_GRID cells of size pixels, in order
+
+    Returns:
+        List[Dict[str, Any]]: {"sheet": n, "x": left, "y": top} of each thumbnail in its sheet
+    """
+    from PIL import Image
+
+    perSheet = SPRITE_GRID * SPRITE_GRID
+    cells = []
+    for start in range(0, len(thumbs), perSheet):
+        sheet = Image.new("RGBA", (SPRITE_GRID * size, SPRITE_GRID * size))
+        for n, path in enumerate(thumbs[start : start + perSheet]):
+            x, y = (n % SPRITE_GRID) * size, (n // SPRITE_GRID) * size
+            with Image.open(path) as img:
+                sheet.paste(img.convert("RGBA"), (x, y))
+            cells.append({"sheet": start // perSheet, "x": x, "y": y})
+        sheet.save(out_dir / f"sprite.{start // perSheet}.png")
+    return cells
+
+
+def build_thumbnails(
+    urls: List[str],
+    out_data_dir: Path,
+    cache: FetchCache,
+    transport: Transport = url_transport,
+    size: int = THUMB_SIZE,
+    fmt: str = "png",
+    sprites: bool = False,
+    pool: Optional[Executor] = None,
+) -> Dict[str, Any]:
+    """a thumbnail of each image, in data/thumbs. the images are fetched through the cache, and downscaled
+    in the process pool. thumbnails are named by the sha1 of their image and their size, so an image used
+    by many nodes is one thumbnail, and one built before is kept
+
+    Args:
+        urls (List[str]): the distinct image urls
+        out_data_dir (Path): the data folder
+        cache (FetchCache): where fetched images are kept between builds
+        transport (Transport, optional): fetches an url's bytes. Defaults to url_transport.
+        size (int, optional): longest side of a thumbnail. Defaults to THUMB_SIZE.
+        fmt (str, optional): one of THUMB_FORMATS. Defaults to "png".
+        sprites (bool, optional): also pack the thumbnails into sprite sheets. Defaults to False.
+        pool (Optional[Executor], optional): process pool. Defaults to None, in this process.
+
+    Returns:
+        Dict[str, Any]: {"size": size, "images": {url: {"file", "width", "height", "sprite": {"sheet", "x", "y"}}},
+            "failed": {url: reason}}, files relative to the data folder
+    """
+    try:
+        # optional. imported here, so maps without thumbnails do not load it
+        from PIL import Image
+    except ImportError:
+        raise ImportError("thumbnails need Pillow. pip install pillow") from None
+    if fmt not in THUMB_FORMATS:
+        raise ValueError(f"unknown thumbnail format '{fmt}'. use one of {THUMB_FORMATS}")
+    out_dir = out_data_dir / THUMB_DIR
+    out_dir.mkdir(exist_ok=True)
+    shas, failed = fetch_all(urls, cache, transport)
+
+    # one thumbnail per distinct image
+    ext = "jpg" if fmt == "jpeg" else fmt
+    distinct = sorted(set(shas.values()))
+    dsts = {sha: out_dir / f"{sha}.{size}.{ext}" for sha in distinct}
+    todo = [sha for sha in distinct if not dsts[sha].exists()]
+    mapper = map if pool is None else pool.map
+    dims = dict(zip(todo, mapper(make_thumbnail, [cache.path(sha) for sha in todo], [dsts[sha] for sha in todo], [size] * len(todo), [fmt] * len(todo))))
+    for sha in distinct:
+        if sha not in dims:
+            with Image.open(dsts[sha]) as img:
+                dims[sha] = img.size
+    for url, sha in list(shas.items()):
+        if dims[sha] is None:
+            failed[url] = "not an image"
+            del shas[url]
+    usable = [sha for sha in distinct if dims[sha] is not None]
+
+    # the files of a previous build that are not in this one: sheets, and the thumbnails of images no longer used
+    keep = {dsts[sha].name for sha in usable}
+    for path in out_dir.iterdir():
+        if path.name not in keep:
+            path.unlink()
+    cells = {}
+    if sprites:
+        cells = dict(zip(usable, pack_sprites([dsts[sha] for sha in usable], size, out_dir)))
+
+    images = {}
+    for url, sha in shas.items():
+        width, height = dims[sha]
+        image = {"file": f"{THUMB_DIR}/{dsts[sha].name}", "width": width, "height": height}
+        if sha in cells:
+            image["sprite"] = {**cells[sha], "file": f"{THUMB_DIR}/sprite.{cells[sha]['sheet']}.png"}
+        images[url] = image
+    return {"size": size, "images": images, "failed": failed}
+
+
+def rewrite_images(df_datapoints: pd.DataFrame, columns: List[str], images: Dict[str, Any], prefix: str) -> pd.DataFrame:
+    "the image columns pointing at the thumbnails, prefix + file. values without a thumbnail are left as they are"
+    local = {url: prefix + image["file"] for url, image in images.items()}
+    rewritten = {}
+    for col in columns:
+        vals = df_datapoints[col].astype(object)
+        rewritten[col] = vals.map(local).fillna(vals)
+    return df_datapoints.assign(**rewritten)
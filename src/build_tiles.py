@@ -0,0 +1,196 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from ingest import CsvChunks
+from utils import CHUNKSIZE, frame_chunks, row_dtype
+
+#from src.ingest import CsvChunks
+#from src.utils import CHUNKSIZE, frame_chunks, row_dtype
+
+# leaf tile files, in a folder next to the data files. tiles.json lists them
+TILE_DIR = "tiles"
+
+# a tile holding more nodes than this is split in four, down to MAX_ZOOM
+TILE_CAPACITY = 2000
+MAX_ZOOM = 12
+
+# the snapshot plotTypes drawn from a pair of coordinate attrs. "original" is always OriginalX/OriginalY
+TILED_PLOTS = ["original", "scatterplot"]
+
+
+def tile_file(pyramid: int, z: int, x: int, y: int) -> str:
+    "path of a leaf tile file, relative to the data folder"
+    return f"{TILE_DIR}/{pyramid}.{z}.{x}.{y}.json"
+
+
+def clear_tiles(out_data_dir: Path) -> None:
+    "deletes the tile files of a previous build, and their sidecars"
+    for path in (out_data_dir / TILE_DIR).glob("*.json*"):
+        path.unlink()
+
+
+def list_tiles(out_data_dir: Path) -> List[str]:
+    "the tile files in out_data_dir, relative to it"
+    return sorted(f"{TILE_DIR}/{path.name}" for path in (out_data_dir / TILE_DIR).glob("*.json"))
+
+
+def layout_axes(layout: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    "the (xaxis, yaxis) a snapshot layout draws the nodes at, None for the plotTypes not drawn from coordinates"
+    if layout.get("plotType") not in TILED_PLOTS:
+        return None
+    if layout["plotType"] == "original":
+        return ("OriginalX", "OriginalY")
+    return (layout.get("xaxis", "OriginalX"), layout.get("yaxis", "OriginalY"))
+
+
+def snapshot_axes(snapshots: List[Dict]) -> List[Tuple[str, str]]:
+    """the distinct (xaxis, yaxis) pairs the snapshots are drawn from, in snapshot order. a map without
+    snapshots opens on the original layout, OriginalX/OriginalY
+
+    Args:
+        snapshots (List[Dict]): from create_snapshot
+
+    Returns:
+        List[Tuple[str, str]]: the axes, as attrs of the player
+    """
+    pairs = []
+    for snap in snapshots or [{"layout": {"plotType": "original"}}]:
+        pair = layout_axes(snap.get("layout", {}))
+        if pair is not None and pair not in pairs:
+            pairs.append(pair)
+    return pairs
+
+
+def _grid(vals: np.ndarray, lo: float, hi: float, cells: int) -> np.ndarray:
+    # the cell of each value on a grid of equal cells from lo to hi. hi falls in the last cell
+    if hi <= lo:
+        return np.zeros(len(vals), dtype=np.int64)
+    return np.clip(np.floor((vals - lo) / (hi - lo) * cells), 0, cells - 1).astype(np.int64)
+
+
+def build_quadtree(
+    xs: np.ndarray, ys: np.ndarray, capacity: int = TILE_CAPACITY, maxZoom: int = MAX_ZOOM
+) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+    """a quadtree of tiles over the points: zoom 0 is one tile over their bounds, and each tile with more than
+    capacity points is split in four at the next zoom. a tile at zoom z is cell (x, y) of a 2^z by 2^z grid,
+    y counting up from the lowest value. every tile gets the count, centroid and bounds of its points. the
+    tiles left whole are the leaves, which between them hold each point once. points are binned a zoom
+    at a time, as integer cells of the finest grid
+
+    Args:
+        xs (np.ndarray): x of each point, finite
+        ys (np.ndarray): y of each point, finite
+        capacity (int, optional): most points in a leaf above maxZoom. Defaults to TILE_CAPACITY.
+        maxZoom (int, optional): deepest zoom. Defaults to MAX_ZOOM.
+
+    Returns:
+        Tuple[Dict[str, Any], List[np.ndarray]]: {"bounds": [x0, y0, x1, y1], "maxZoom": deepest zoom with tiles,
+            "tiles": [{"z", "x", "y", "count", "centroid", "bounds", "leaf"}]} with the tiles by zoom,
+            and the points of each leaf, in the order of the leaf tiles
+    """
+    tiles: List[Dict[str, Any]] = []
+    leaves: List[np.ndarray] = []
+    if len(xs) == 0:
+        return {"bounds": None, "maxZoom": 0, "tiles": tiles}, leaves
+    bounds = [float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())]
+    cellX = _grid(xs, bounds[0], bounds[2], 2**maxZoom)
+    cellY = _grid(ys, bounds[1], bounds[3], 2**maxZoom)
+
+    active = np.arange(len(xs))
+    z = 0
+    while len(active) > 0:
+        # the tile of each point still being split, on this zoom's grid. sorted, the tiles are runs of points
+        shift = maxZoom - z
+        keys = ((cellX[active] >> shift) << z) | (cellY[active] >> shift)
+        order = np.argsort(keys, kind="stable")
+        keys, active = keys[order], active[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        aggregates = [
+            np.add.reduceat(xs[active], starts) / counts,
+            np.add.reduceat(ys[active], starts) / counts,
+            np.minimum.reduceat(xs[active], starts),
+            np.minimum.reduceat(ys[active], starts),
+            np.maximum.reduceat(xs[active], starts),
+            np.maximum.reduceat(ys[active], starts),
+        ]
+        split = (counts > capacity) & (z < maxZoom)
+        for i, (start, count) in enumerate(zip(starts.tolist(), counts.tolist())):
+            cx, cy, x0, y0, x1, y1 = (float(agg[i]) for agg in aggregates)
+            key = int(keys[start])
+            tiles.append(
+                {
+                    "z": z,
+                    "x": key >> z,
+                    "y": key & ((1 << z) - 1),
+                    "count": count,
+                    "centroid": [cx, cy],
+                    "bounds": [x0, y0, x1, y1],
+                    "leaf": not split[i],
+                }
+            )
+            if not split[i]:
+                leaves.append(np.sort(active[start : start + count]))
+        active = active[np.repeat(split, counts)]
+        z += 1
+    return {"bounds": bounds, "maxZoom": z - 1, "tiles": tiles}, leaves
+
+
+def _coordinates(
+    sheet: Union[pd.DataFrame, CsvChunks], columns: List[str], chunksize: int
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    # the datapoint ids, as nodes.json writes them, and the columns as numbers. text and missing values are nan
+    ids, vals = [], {col: [] for col in columns}
+    for df_chunk in frame_chunks(sheet, chunksize):
+        ids.append(np.array([f"{val}" for val in df_chunk["id"].to_numpy(dtype=row_dtype(df_chunk))], dtype=object))
+        for col in columns:
+            num = pd.to_numeric(df_chunk[col].astype(object), errors="coerce")
+            vals[col].append(num.to_numpy(dtype=np.float64, na_value=np.nan))
+    return np.concatenate(ids or [np.array([], dtype=object)]), {
+        col: np.concatenate(chunks or [np.array([])]) for col, chunks in vals.items()
+    }
+
+
+def build_tiles(
+    sheet: Union[pd.DataFrame, CsvChunks],
+    snapshots: List[Dict],
+    node_attr_map: Dict[str, str],
+    capacity: int = TILE_CAPACITY,
+    chunksize: int = CHUNKSIZE,
+) -> Tuple[Dict[str, Any], List[List[List[str]]]]:
+    """a quadtree of the datapoints for each pair of axes the snapshots are drawn from (see build_quadtree),
+    so a viewer can draw the aggregates of the tiles in view when zoomed out, and load the ids of the leaf
+    tiles in view when zoomed in. OriginalX/OriginalY are read from the columns node_attr_map names.
+    datapoints without a number on either axis are left out, and counted
+
+    Args:
+        sheet (Union[pd.DataFrame, CsvChunks]): the datapoints, whole or in chunks
+        snapshots (List[Dict]): from create_snapshot
+        node_attr_map (Dict[str, str]): map of {required params: column-names} for the nodes
+        capacity (int, optional): most datapoints in a leaf tile. Defaults to TILE_CAPACITY.
+        chunksize (int, optional): rows per pass when sheet is a DataFrame. Defaults to CHUNKSIZE.
+
+    Returns:
+        Tuple[Dict[str, Any], List[List[List[str]]]]: {"capacity": n, "pyramids": [{"axes": [[xaxis, yaxis]],
+            "unplaced": n, **quadtree}]} and the datapoint ids of each leaf tile, per pyramid
+    """
+    pairs: Dict[Tuple[str, str], List[List[str]]] = {}
+    for axes in snapshot_axes(snapshots):
+        cols = tuple(node_attr_map.get(axis, axis) for axis in axes)
+        missing = [col for col in cols if col not in sheet.columns]
+        if len(missing) > 0:
+            print(f"\t- no tiles for axes {axes}. {missing} not datapoints columns")
+            continue
+        # axes read from the same columns share a pyramid
+        pairs.setdefault(cols, []).append(list(axes))
+    columns = list(dict.fromkeys(col for cols in pairs for col in cols))
+
+    ids, vals = _coordinates(sheet, columns, chunksize) if len(pairs) > 0 else (None, {})
+    pyramids, leafIds = [], []
+    for (xcol, ycol), axes in pairs.items():
+        placed = np.flatnonzero(np.isfinite(vals[xcol]) & np.isfinite(vals[ycol]))
+        quadtree, leaves = build_quadtree(vals[xcol][placed], vals[ycol][placed], capacity)
+        pyramids.append({"axes": axes, "unplaced": len(ids) - len(placed), **quadtree})
+        leafIds.append([ids[placed[rows]].tolist() for rows in leaves])
+    return {"capacity": capacity, "pyramids": pyramids}, leafIds
@@ -0,0 +1,301 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+import hashlib
+import html
+import re
+
+from fetch_cache import FetchCache, Transport, fetch_all, url_transport
+
+#from src.fetch_cache import FetchCache, Transport, fetch_all, url_transport
+
+try:
+    import rjsmin
+except ImportError:
+    # optional. scripts are bundled as they are without it
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    # optional. stylesheets fall back to stripping comments and whitespace
+    rcssmin = None
+
+# vendored scripts, stylesheets and what they load, in a folder next to index.html
+ASSET_DIR = "assets"
+
+# create_map bundle options, e.g. {"concat": True}. "concat": True, one script and one stylesheet. "minify":
+# True, minifies them (scripts need rjsmin). "cache": folder the assets are fetched into once (ASSET_CACHE).
+# "transport": a callable fetching an url's bytes. the assets go in the map folder's ASSET_DIR
+BUNDLE_OPTIONS = ["cache", "concat", "minify", "transport"]
+
+# fetched assets, kept across builds and maps. relative to the working directory
+ASSET_CACHE = ".asset_cache"
+
+# hex digits of the content hash in an asset's name
+HASH_LENGTH = 10
+
+# the remote scripts, stylesheets and icon of index.html. tags may span lines
+_TAG = re.compile(r"<(script|link)\b([^>]*)>(?:\s*</script>)?", re.IGNORECASE)
+_ATTR = re.compile(r"([\w:-]+)\s*=\s*\"([^\"]*)\"")
+# the templates angular includes at runtime, ng-include=" 'url' "
+_INCLUDE = re.compile(r"ng-include=\"\s*'((?:https?:)?//[^']+)'\s*\"")
+_REMOTE = re.compile(r"^(?:https?:)?//")
+
+# the urls a stylesheet loads
+_CSS_IMPORT = re.compile(r"@import\s+(?:url\(\s*)?(['\"]?)([^'\")\s;]+)\1\s*\)?\s*([^;]*);")
+_CSS_URL = re.compile(r"url\(\s*(['\"]?)([^'\")]+?)\1\s*\)")
+_CSS_CHARSET = re.compile(r"@charset\s+[^;]+;\s*")
+_SOURCE_MAP = re.compile(r"^[ \t]*(?://|/\*)[#@] sourceMappingURL=.*$", re.MULTILINE)
+
+# a stylesheet's strings and comments, for the fallback minifier. /*! comments are licenses, kept
+_CSS_TOKENS = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|/\*![\s\S]*?\*/)|/\*[\s\S]*?\*/|(\s+)")
+_CSS_SPACES = re.compile(r"\s*([{};,])\s*")
+
+
+def _absolute(url: str) -> str:
+    # protocol relative urls are fetched over https
+    return "https:" + url if url.startswith("//") else url
+
+
+def find_assets(page: str) -> List[Dict[str, Any]]:
+    """the remote assets of an html page, in order: {"kind": "script", "style", "icon" or "include",
+    "url", "start", "end"}, the span being the whole tag, or the quoted url of an include
+    """
+    assets = []
+    for m in _TAG.finditer(page):
+        attrs = {key.lower(): html.unescape(val) for key, val in _ATTR.findall(m.group(2))}
+        if m.group(1).lower() == "script":
+            kind, url = "script", attrs.get("src", "")
+        else:
+            rel = attrs.get("rel", "").lower().split()
+            kind = "style" if "stylesheet" in rel else "icon" if "icon" in rel else None
+            url = attrs.get("href", "")
+        if kind is not None and _REMOTE.match(url):
+            assets.append({"kind": kind, "url": _absolute(url), "start": m.start(), "end": m.end()})
+    for m in _INCLUDE.finditer(page):
+        assets.append({"kind": "include", "url": _absolute(m.group(1)), "start": m.start(1), "end": m.end(1)})
+    return sorted(assets, key=lambda asset: asset["start"])
+
+
+def minify_css(text: str) -> str:
+    "rcssmin when installed, else the comments and runs of whitespace outside strings taken out"
+    if rcssmin is not None:
+        return rcssmin.cssmin(text, keep_bang_comments=True)
+    text = _CSS_TOKENS.sub(lambda m: m.group(1) or (" " if m.group(2) else ""), text)
+    parts = re.split(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')", text)
+    parts[::2] = [_CSS_SPACES.sub(r"\1", part) for part in parts[::2]]
+    return "".join(parts).strip()
+
+
+def minify_js(text: str) -> str:
+    "rjsmin when installed. scripts are not minified without it, the vendored ones mostly are already"
+    return rjsmin.jsmin(text, keep_bang_comments=True) if rjsmin is not None else text
+
+
+class _Bundler:
+    # fetches assets through the cache and writes them, content hashed, into out_dir/assets
+
+    def __init__(self, out_dir: Path, cache: FetchCache, transport: Transport):
+        self.asset_dir = out_dir / ASSET_DIR
+        self.asset_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = cache
+        self.transport = transport
+        self.shas: Dict[str, str] = {}
+        self.failed: Dict[str, str] = {}
+        self.written: Dict[str, str] = {}
+        self.styles: Dict[str, str] = {}
+
+    def fetch(self, urls: List[str]):
+        urls = [url for url in dict.fromkeys(urls) if url not in self.shas and url not in self.failed]
+        shas, failed = fetch_all(urls, self.cache, self.transport)
+        self.shas.update(shas)
+        self.failed.update(failed)
+
+    def read(self, url: str) -> Optional[bytes]:
+        return self.cache.path(self.shas[url]).read_bytes() if url in self.shas else None
+
+    def write(self, name: str, ext: str, data: bytes) -> str:
+        "writes data as assets/name.hash.ext, unless it is there from a previous build. returns the file name"
+        fname = f"{name}.{hashlib.sha1(data).hexdigest()[:HASH_LENGTH]}{ext}"
+        path = self.asset_dir / fname
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+        return fname
+
+    def vendor(self, url: str) -> Optional[str]:
+        "the file an url's bytes are written to, None if they could not be fetched"
+        if url not in self.written:
+            data = self.read(url)
+            if data is None:
+                return None
+            name, suffix = _name(url)
+            self.written[url] = self.write(name, suffix, data)
+        return self.written[url]
+
+    def style(self, url: str, seen: Tuple[str, ...] = ()) -> Optional[str]:
+        """the text of a stylesheet, its @imports inlined and the fonts and images it loads vendored,
+        their urls pointing at them in assets/. None if it could not be fetched
+        """
+        if url in self.styles:
+            return self.styles[url]
+        data = self.read(url)
+        if data is None:
+            return None
+        text = _CSS_CHARSET.sub("", data.decode("utf-8-sig", errors="replace"))
+        text = _SOURCE_MAP.sub("", text)
+
+        # the imports are set aside while the urls are vendored, their own urls are relative to them
+        imports = []
+
+        def hold(m: re.Match) -> str:
+            imports.append((urljoin(url, m.group(2)), m.group(3).strip(), m.group(0)))
+            return f"\0{len(imports) - 1}\0"
+
+        text = _CSS_IMPORT.sub(hold, text)
+        refs = {}
+        for m in _CSS_URL.finditer(text):
+            if not m.group(2).startswith(("data:", "#")):
+                refs[m.group(2)] = urldefrag(urljoin(url, m.group(2)))
+        self.fetch([target for target, _ in refs.values()] + [ref for ref, _, _ in imports])
+
+        def local(m: re.Match) -> str:
+            if m.group(2) not in refs:
+                return m.group(0)
+            target, fragment = refs[m.group(2)]
+            fname = self.vendor(target)
+            if fname is None:
+                return m.group(0)
+            return f"url({m.group(1)}{fname}{'#' + fragment if fragment else ''}{m.group(1)})"
+
+        def inline(m: re.Match) -> str:
+            ref, media, rule = imports[int(m.group(1))]
+            inner = self.style(ref, seen + (url,)) if ref not in seen + (url,) else None
+            if inner is None:
+                return rule
+            return f"@media {media} {{\n{inner}\n}}\n" if media else inner + "\n"
+
+        text = re.sub(r"\0(\d+)\0", inline, _CSS_URL.sub(local, text))
+        self.styles[url] = text
+        return self.styles[url]
+
+
+def _name(url: str) -> Tuple[str, str]:
+    # the stem and extension of an url's file, "css?family=Roboto" is "css" with no extension
+    stem = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1] or "index"
+    stem = re.sub(r"[^\w.-]", "_", stem)
+    if "." in stem.strip("."):
+        stem, ext = stem.rsplit(".", 1)
+        return stem, "." + ext
+    return stem, ""
+
+
+def _runs(assets: List[Dict[str, Any]], page: str) -> List[List[Dict[str, Any]]]:
+    # the scripts that follow one another with only whitespace between them
+    runs: List[List[Dict[str, Any]]] = []
+    for asset in assets:
+        if asset["kind"] != "script":
+            continue
+        if len(runs) > 0 and page[runs[-1][-1]["end"] : asset["start"]].strip() == "":
+            runs[-1].append(asset)
+        else:
+            runs.append([asset])
+    return runs
+
+
+def bundle_assets(
+    page: str,
+    out_dir: Path,
+    cache: FetchCache,
+    transport: Transport = url_transport,
+    concat: bool = False,
+    minify: bool = False,
+) -> Tuple[str, Dict[str, Any]]:
+    """vendors the remote scripts, stylesheets, icon and included templates of an html page into out_dir/assets,
+    named by the hash of their content so they can be cached for good, and points the page at them. the fonts and
+    images the stylesheets load are vendored too. assets are fetched through the cache, so only the first build
+    needs the network
+
+    Args:
+        page (str): the html
+        out_dir (Path): the map folder
+        cache (FetchCache): where fetched assets are kept between builds
+        transport (Transport, optional): fetches an url's bytes. Defaults to url_transport.
+        concat (bool, optional): one script per run of consecutive scripts, and one stylesheet for all of them,
+            at the first one. Defaults to False, a file each.
+        minify (bool, optional): minify the scripts (needs rjsmin) and stylesheets. Defaults to False.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: the rewritten html, and {"assets": {url: file}, "requests": number of
+            requests index.html makes for its assets, "failed": {url: reason}}, files relative to out_dir
+    """
+    assets = find_assets(page)
+    bundler = _Bundler(out_dir, cache, transport)
+    bundler.fetch([asset["url"] for asset in assets])
+    if len(bundler.failed) > 0:
+        raise ValueError(
+            f"could not fetch {len(bundler.failed)} assets into the cache {cache.root}, and they are not there"
+            f" from an earlier build. e.g. {dict(list(bundler.failed.items())[:3])}"
+        )
+
+    def text(asset: Dict[str, Any]) -> str:
+        if asset["kind"] == "style":
+            body = bundler.style(asset["url"])
+            return minify_css(body) if minify else body
+        body = _SOURCE_MAP.sub("", bundler.read(asset["url"]).decode("utf-8-sig", errors="replace"))
+        return minify_js(body) if minify else body
+
+    # what replaces each tag: a file of its own, one bundle for a run, or nothing
+    files: Dict[int, Optional[str]] = {}
+    if concat:
+        for run in _runs(assets, page):
+            if len(run) > 1:
+                # a script may end in a line comment or without its last semicolon
+                data = "\n;\n".join(text(asset) for asset in run) + "\n"
+                files[run[0]["start"]] = bundler.write("bundle", ".js", data.encode("utf-8"))
+                files.update({asset["start"]: None for asset in run[1:]})
+        styles = [asset for asset in assets if asset["kind"] == "style"]
+        if len(styles) > 1:
+            data = "\n".join(text(asset) for asset in styles)
+            files[styles[0]["start"]] = bundler.write("bundle", ".css", data.encode("utf-8"))
+            files.update({asset["start"]: None for asset in styles[1:]})
+    for asset in assets:
+        if asset["start"] in files:
+            continue
+        if asset["kind"] in ["script", "style"]:
+            name, ext = _name(asset["url"])
+            ext = ext if ext in [".js", ".css"] else ".js" if asset["kind"] == "script" else ".css"
+            files[asset["start"]] = bundler.write(name, ext, text(asset).encode("utf-8"))
+        else:
+            files[asset["start"]] = bundler.vendor(asset["url"])
+
+    # rewrite from the end, so the spans before stay where they are
+    for asset in reversed(assets):
+        fname, start, end = files[asset["start"]], asset["start"], asset["end"]
+        src = f"{ASSET_DIR}/{fname}"
+        if fname is None:
+            # the whitespace before a dropped tag goes with it
+            start = len(page[:start].rstrip())
+            tag = ""
+        elif asset["kind"] == "script":
+            tag = f'<script src="{src}"></script>'
+        elif asset["kind"] == "style":
+            tag = f'<link rel="stylesheet" href="{src}">'
+        elif asset["kind"] == "icon":
+            tag = re.sub(r"(href\s*=\s*\")[^\"]*", lambda m: m.group(1) + src, page[start:end])
+        else:
+            tag = src
+        page = page[:start] + tag + page[end:]
+
+    # the files of a previous build that are not in this one, and their sidecars
+    used = set(bundler.written.values()) | {fname for fname in files.values() if fname is not None}
+    for path in bundler.asset_dir.iterdir():
+        if path.name not in used and path.name.rsplit(".", 1)[0] not in used:
+            path.unlink()
+    mapping = {asset["url"]: f"{ASSET_DIR}/{files[asset['start']]}" for asset in assets if files[asset["start"]] is not None}
+    mapping.update({url: f"{ASSET_DIR}/{fname}" for url, fname in bundler.written.items()})
+    requests = len({fname for fname in files.values() if fname is not None})
+    return page, {"assets": mapping, "requests": requests, "failed": bundler.failed}
+
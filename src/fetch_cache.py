@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import urllib.request
+
+# requests in flight at once, and how long to wait for each
+FETCH_THREADS = 8
+FETCH_TIMEOUT = 30
+
+# a fetcher of bytes by url (or file path)
+Transport = Callable[[str], bytes]
+
+
+def url_transport(url: str) -> bytes:
+    "the bytes of an url over http(s) or file://. anything without a scheme is a file path"
+    if "://" not in url:
+        return Path(url).read_bytes()
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as res:
+        return res.read()
+
+
+class FetchCache:
+    """files fetched once across builds. the bytes are stored by their sha1 (objects/ab/abcdef...), so a
+    file behind several urls is stored once, and urls.json maps each url fetched to its sha1
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.root / "urls.json") as f:
+                self.urls: Dict[str, str] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.urls = {}
+
+    def path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / sha
+
+    def get(self, url: str) -> Optional[str]:
+        "the sha1 of the url's bytes, None if it was never fetched or has since been deleted"
+        sha = self.urls.get(url)
+        return sha if sha is not None and self.path(sha).exists() else None
+
+    def put(self, url: str, data: bytes) -> str:
+        sha = hashlib.sha1(data).hexdigest()
+        path = self.path(sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+        self.urls[url] = sha
+        return sha
+
+    def save(self):
+        with open(self.root / "urls.json", mode="w") as f:
+            json.dump(self.urls, f, indent=4)
+
+
+def fetch_all(urls: List[str], cache: FetchCache, transport: Transport) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """the sha1 in the cache of each url's bytes, fetching those not cached yet, a few at a time
+
+    Returns:
+        Tuple[Dict[str, str], Dict[str, str]]: {url: sha1}, and {url: error} for the urls that failed
+    """
+    shas = {url: cache.get(url) for url in urls}
+    missing = [url for url, sha in shas.items() if sha is None]
+
+    def fetch(url: str) -> Tuple[str, Any]:
+        try:
+            return url, transport(url)
+        except Exception as err:  # any failure leaves the url as it is
+            return url, err
+
+    failed: Dict[str, str] = {}
+    with ThreadPoolExecutor(FETCH_THREADS) as threads:
+        for url, data in threads.map(fetch, missing):
+            if isinstance(data, Exception):
+                failed[url] = f"{data.__class__.__name__}: {data}"
+            else:
+                shas[url] = cache.put(url, data)
+    cache.save()
+    return {url: sha for url, sha in shas.items() if sha is not None}, failed
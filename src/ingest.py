@@ -0,0 +1,254 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+from quantize import round_columns
+
+#from src.quantize import round_columns
+
+# attrTypes stored as categoricals, small integers and float32 (when no precision is lost)
+CATEGORY_TYPES = ["string", "liststring"]
+INTEGER_TYPES = ["integer", "year"]
+FLOAT_TYPES = ["float"]
+INT_DTYPES = ["int8", "int16", "int32", "int64"]
+
+# spellings the csv parser reads as booleans
+BOOL_STRINGS = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+
+
+def _inferred(col: pd.Series) -> pd.Series:
+    # a categorical column parsed from numbers or booleans gets the dtype read_csv would have
+    # inferred without the declaration, so the values written to the data files do not change
+    cats = col.cat.categories
+    if not pd.api.types.is_object_dtype(cats.dtype):
+        return col
+    if len(cats) > 0 and all(cat in BOOL_STRINGS for cat in cats):
+        vals = col.astype(object).map(BOOL_STRINGS)
+        return vals.astype(bool) if not col.isna().any() else vals
+    try:
+        return pd.to_numeric(col.astype(object))
+    except (ValueError, TypeError):
+        return col
+
+
+def _smallest_int(col: pd.Series) -> Optional[str]:
+    # the smallest integer dtype for a column read as integers. a column with gaps is read as
+    # floats and stays floats, so its values are written as before (1999.0)
+    if not pd.api.types.is_integer_dtype(col.dtype):
+        return None
+    vals = col.to_numpy()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if len(vals) == 0 or (vals.min() >= info.min and vals.max() <= info.max):
+            return dtype
+    return None
+
+
+def compact_dtypes(df_datapoints: pd.DataFrame, dpAttribTypes: Dict[str, str]) -> pd.DataFrame:
+    """stores the numeric columns in the smallest dtype their attrType allows: the smallest integer
+    dtype for integer and year columns without gaps, float32 for float when every value survives
+    the round trip. the values written to the data files do not change.
+    string and liststring columns are read as categoricals by read_datapoints, and kept
+    as categoricals when their values repeat.
+
+    Args:
+        df_datapoints (pd.DataFrame): the datapoints sheet
+        dpAttribTypes (Dict[str, str]): map of {column-name: attrType}
+
+    Returns:
+        pd.DataFrame: the same frame, with compact columns
+    """
+    for key in df_datapoints.columns:
+        col = df_datapoints[key]
+        attrType = dpAttribTypes.get(key)
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            col = _inferred(col)
+            if isinstance(col.dtype, pd.CategoricalDtype) and len(col.cat.categories) > len(col) // 2:
+                # mostly distinct values (labels, descriptions) take less room as plain strings
+                col = col.astype(object)
+            df_datapoints[key] = col
+        elif attrType in INTEGER_TYPES:
+            dtype = _smallest_int(col)
+            df_datapoints[key] = col if dtype is None else col.astype(dtype)
+        elif attrType in FLOAT_TYPES and col.dtype == np.float64:
+            vals = col.to_numpy()
+            f32 = vals.astype(np.float32)
+            if np.array_equal(f32.astype(np.float64), vals, equal_nan=True):
+                df_datapoints[key] = f32
+    return df_datapoints
+
+
+class _ColumnScan:
+    "what the chunks of one column hold, to settle the dtype a whole-file read would give it"
+
+    def __init__(self):
+        self.kinds: Set[str] = set()
+        self.f32, self.lo, self.hi = True, np.inf, -np.inf
+
+    def update(self, col: pd.Series):
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            col = _inferred(col)
+        vals = col.dropna()
+        if len(vals) == 0:
+            self.kinds.add("empty")
+        elif pd.api.types.is_bool_dtype(col.dtype):
+            self.kinds.add("bool")
+        elif isinstance(col.dtype, pd.CategoricalDtype):
+            self.kinds.add("string")
+        elif not pd.api.types.is_numeric_dtype(col.dtype):
+            self.kinds.add("boolna" if all(isinstance(val, bool) for val in vals) else "string")
+        else:
+            self.kinds.add("int" if pd.api.types.is_integer_dtype(col.dtype) else "float")
+            vals = vals.to_numpy(dtype=np.float64)
+            self.f32 = self.f32 and np.array_equal(vals.astype(np.float32).astype(np.float64), vals)
+            self.lo, self.hi = min(self.lo, vals.min()), max(self.hi, vals.max())
+
+    def kind(self) -> str:
+        # the C parser's inference over the whole column: ints with gaps become floats, booleans
+        # with gaps objects, and a column of mixed kinds is read as strings
+        kinds = self.kinds - {"empty"}
+        if len(kinds) == 0:
+            return "float"
+        for kind, allowed in [("bool", {"bool"}), ("boolna", {"bool", "boolna"}), ("int", {"int"}), ("float", {"int", "float"})]:
+            if kinds <= allowed and (kind in ["boolna", "float"] or "empty" not in self.kinds):
+                return kind
+        return "string"
+
+    def dtype(self, attrType: Optional[str]) -> Optional[str]:
+        # the final dtype, compacted as compact_dtypes would. None keeps the strings as read
+        kind = self.kind()
+        if kind in ["bool", "boolna"]:
+            return "bool" if kind == "bool" else "object"
+        if kind == "string":
+            return None
+        if attrType in INTEGER_TYPES and kind == "int":
+            for dtype in INT_DTYPES:
+                info = np.iinfo(dtype)
+                if self.lo >= info.min and self.hi <= info.max:
+                    return dtype
+        if attrType in FLOAT_TYPES and kind == "float" and self.f32:
+            return "float32"
+        return "int64" if kind == "int" else "float64"
+
+
+def _as_dtype(col: pd.Series, dtype: Optional[str]) -> pd.Series:
+    if dtype is None:
+        return col
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        # numbers or booleans declared as string. see _inferred
+        vals = col.astype(object)
+        col = vals.map(BOOL_STRINGS) if dtype in ["bool", "object"] else pd.to_numeric(vals)
+    return col.astype(dtype)
+
+
+class CsvChunks:
+    """a csv sheet read chunksize rows at a time, for sheets larger than memory. iterating yields
+    the chunks as DataFrames, every time from the file. a first pass over the file settles each
+    column's dtype as a whole-file read would infer it (and compact_dtypes compact it), so every
+    chunk has the same dtypes and the builders write the same files as from the whole sheet.
+    a column that mixes numbers and text is read as text. the columns in decimals are rounded
+    as they are read, see quantize.round_columns.
+    """
+
+    def __init__(self, path: Union[Path, str], chunksize: int, dpAttribTypes: Optional[Dict[str, str]] = None):
+        self.path = str(path)
+        self.chunksize = chunksize
+        self.columns: List[str] = list(pd.read_csv(self.path, nrows=0).columns)
+        dpAttribTypes = dpAttribTypes or {}
+        self.categories = {key: "category" for key in self.columns if dpAttribTypes.get(key) in CATEGORY_TYPES}
+
+        scans = {key: _ColumnScan() for key in self.columns}
+        self.n_rows = 0
+        for df_chunk in self._read(self.categories):
+            self.n_rows += len(df_chunk)
+            for key in self.columns:
+                scans[key].update(df_chunk[key])
+        self.dtypes = {key: scan.dtype(dpAttribTypes.get(key)) for key, scan in scans.items()}
+        self.kinds = {key: scan.kind() for key, scan in scans.items()}
+        self.decimals: Dict[str, int] = {}
+
+    def _read(self, dtypes: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        return pd.read_csv(self.path, chunksize=self.chunksize, dtype=dtypes)
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        # text columns that some chunks would read as numbers are read as text throughout
+        text = {key: str for key, kind in self.kinds.items() if kind == "string" and key not in self.categories}
+        for df_chunk in self._read({**self.categories, **text}):
+            for key in self.columns:
+                df_chunk[key] = _as_dtype(df_chunk[key], self.dtypes[key])
+            yield round_columns(df_chunk, self.decimals)
+
+
+def read_datapoints(
+    datapointsPath: Union[Path, str], df_attrs: Optional[pd.DataFrame] = None, chunksize: Optional[int] = None
+) -> Union[pd.DataFrame, CsvChunks]:
+    """reads the datapoints sheet once. the same frame feeds the dataset and the network builders.
+    with the attribute sheet, the columns are read in compact dtypes picked from their attrType:
+    categoricals for string and liststring, see compact_dtypes for the numeric ones
+
+    Args:
+        datapointsPath (Union[Path, str]): filepath for the datapoints
+        df_attrs (Optional[pd.DataFrame], optional): the datapoint attributes. Defaults to None, inferred dtypes.
+        chunksize (Optional[int], optional): read in chunks of rows instead, see CsvChunks. Defaults to None.
+
+    Returns:
+        Union[pd.DataFrame, CsvChunks]: one row per datapoint
+    """
+    dpAttribTypes: Dict[str, str] = {} if df_attrs is None else dict(zip(df_attrs["id"], df_attrs["attrType"]))
+    if chunksize is not None:
+        df_datapoints = CsvChunks(datapointsPath, chunksize, dpAttribTypes)
+    else:
+        dtypes = {key: "category" for key, attrType in dpAttribTypes.items() if attrType in CATEGORY_TYPES}
+        df_datapoints = pd.read_csv(str(datapointsPath), dtype=dtypes)
+    if "id" not in df_datapoints.columns:
+        raise ValueError(f"datapoints file {datapointsPath} has no 'id' column")
+    if df_attrs is not None and chunksize is None:
+        df_datapoints = compact_dtypes(df_datapoints, dpAttribTypes)
+    return df_datapoints
+
+
+def read_datapointAttrs(datapointAttrPath: Union[Path, str]) -> pd.DataFrame:
+    """reads the datapoint attribute sheet (one row per datapoint column)
+
+    Args:
+        datapointAttrPath (Union[Path, str]): filepath for the datapoint attributes
+
+    Returns:
+        pd.DataFrame: one row per attribute
+    """
+    df_attrs: pd.DataFrame = pd.read_csv(str(datapointAttrPath))
+    missing = [col for col in ["id", "attrType"] if col not in df_attrs.columns]
+    if len(missing) > 0:
+        raise ValueError(f"datapoint attributes file {datapointAttrPath} is missing columns {missing}")
+    return df_attrs
+
+
+def read_links(
+    linksPath: Union[Path, str], attr_map: Dict[str, str], chunksize: Optional[int] = None
+) -> Union[pd.DataFrame, CsvChunks]:
+    """reads the links sheet
+
+    Args:
+        linksPath (Union[Path, str]): filepath for the edges
+        attr_map (Dict[str, str]): map of {required params: column-names} for the links
+        chunksize (Optional[int], optional): read in chunks of rows instead, see CsvChunks. Defaults to None.
+
+    Returns:
+        Union[pd.DataFrame, CsvChunks]: one row per link
+    """
+    df_links = pd.read_csv(str(linksPath)) if chunksize is None else CsvChunks(linksPath, chunksize)
+    missing = [attr_map[key] for key in ["source", "target"] if attr_map[key] not in df_links.columns]
+    if len(missing) > 0:
+        raise ValueError(f"links file {linksPath} is missing columns {missing}")
+    return df_links
+
+
+def validate_datapoints(df_datapoints: Union[pd.DataFrame, CsvChunks], df_attrs: pd.DataFrame):
+    "every datapoint column needs an attrType in the attribute sheet"
+    described = set(df_attrs["id"])
+    undescribed = [col for col in df_datapoints.columns if col not in described]
+    if len(undescribed) > 0:
+        raise ValueError(f"datapoint columns {undescribed} are not described in the datapoint attributes file")
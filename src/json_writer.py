@@ -0,0 +1,281 @@
+from collections.abc import Iterator
+from datetime import date, datetime
+from typing import Any, Dict, IO, List, Optional, Tuple, Type, Union
+import importlib.util
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils import CHUNKSIZE
+
+# from src.utils import CHUNKSIZE
+
+
+def _default(o: Any) -> Any:
+    "converts the numpy and pandas values the encoders do not handle natively"
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if o is pd.NA or o is pd.NaT:
+        return None
+    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
+
+
+def _finite(val: Any) -> Any:
+    """val with NaN and Infinity written as null (browsers cannot parse those tokens), and the numpy
+    and pandas values converted, so the stdlib encoder can write it with allow_nan=False
+    """
+    # exact types first, they are nearly all of a data file
+    kind = type(val)
+    if kind is str or kind is int or kind is bool or val is None:
+        return val
+    if kind is float:
+        return val if math.isfinite(val) else None
+    if kind is dict:
+        return {k: _finite(v) for k, v in val.items()}
+    if kind is list:
+        return [_finite(v) for v in val]
+    if isinstance(val, float):
+        return float(val) if math.isfinite(val) else None
+    if isinstance(val, (str, int)):
+        return val
+    if isinstance(val, dict):
+        return {k: _finite(v) for k, v in val.items()}
+    if isinstance(val, (list, tuple)):
+        return [_finite(v) for v in val]
+    return _finite(_default(val))
+
+
+class StdlibBackend:
+    "encodes with the stdlib json module. always available"
+
+    name = "json"
+
+    def __init__(self, indent: Optional[int], separators: Tuple[str, str]):
+        # the C encoder writes the compact output, the pure python one indented output
+        self.encoder = json.JSONEncoder(indent=indent, separators=separators, allow_nan=False)
+
+    @staticmethod
+    def supports(indent: Optional[int], separators: Tuple[str, str]) -> bool:
+        return True
+
+    def dumps(self, val: Any) -> bytes:
+        return self.encoder.encode(_finite(val)).encode("utf-8")
+
+
+class OrjsonBackend:
+    """encodes with orjson. numpy arrays and scalars are serialized natively and NaN is written as null.
+    orjson only writes compact json or 2 space indents, other indents are re-spaced after encoding.
+    unlike the stdlib backend, non ascii characters are written as utf-8 instead of \\u escapes.
+    """
+
+    name = "orjson"
+
+    def __init__(self, indent: Optional[int], separators: Tuple[str, str]):
+        # optional. imported here, so the module loads without it and the stdlib backend is used
+        import orjson
+
+        self.orjson = orjson
+        self.indent = indent
+        self.option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent is not None:
+            self.option |= orjson.OPT_INDENT_2
+
+    @staticmethod
+    def supports(indent: Optional[int], separators: Tuple[str, str]) -> bool:
+        if importlib.util.find_spec("orjson") is None:
+            return False
+        return separators == ((",", ":") if indent is None else (",", ": "))
+
+    def dumps(self, val: Any) -> bytes:
+        out = self.orjson.dumps(val, default=_default, option=self.option)
+        if self.indent is None or self.indent == 2:
+            return out
+        # swap each leading 2 space step for a \x01 marker (control characters are always
+        # escaped in json strings), one indent level per pass, then widen the markers
+        out = out.replace(b"\n  ", b"\n\x01")
+        while b"\x01  " in out:
+            out = out.replace(b"\x01  ", b"\x01\x01")
+        return out.replace(b"\x01", b" " * self.indent)
+
+
+# in order of preference
+BACKENDS: Dict[str, Type] = {"orjson": OrjsonBackend, "json": StdlibBackend}
+
+
+def _separators(indent: Optional[int], separators: Optional[Tuple[str, str]]) -> Tuple[str, str]:
+    # same defaults as json.dump
+    return separators or ((",", ": ") if indent is not None else (", ", ": "))
+
+
+def get_backend(indent: Optional[int], separators: Optional[Tuple[str, str]] = None, name: Optional[str] = None):
+    """the json encoder backend to write with
+
+    Args:
+        indent (Optional[int]): same as json.dump
+        separators (Optional[Tuple[str, str]], optional): same as json.dump. Defaults to None.
+        name (Optional[str], optional): one of BACKENDS. Defaults to None, the fastest available one.
+
+    Returns:
+        an encoder with a dumps(val) -> bytes method
+    """
+    separators = _separators(indent, separators)
+    if name is not None:
+        backend = BACKENDS[name]
+        if not backend.supports(indent, separators):
+            raise ValueError(f"json backend '{name}' is not available for indent={indent}, separators={separators}")
+        return backend(indent, separators)
+    for backend in BACKENDS.values():
+        if backend.supports(indent, separators):
+            return backend(indent, separators)
+
+
+class EncodedChunk(bytes):
+    "a list of stream items already encoded by a backend (see encode_chunk), written into the stream as is"
+
+
+def encode_chunk(
+    items: List[Any], indent: Optional[int] = 4, separators: Optional[Tuple[str, str]] = None, backend: Optional[str] = None
+) -> EncodedChunk:
+    """encodes items for a stream written with the same formatting and backend, e.g. in another process
+
+    Args:
+        items (List[Any]): json serializable items
+        indent (Optional[int], optional): same as dump. Defaults to 4.
+        separators (Optional[Tuple[str, str]], optional): same as dump. Defaults to None.
+        backend (Optional[str], optional): same as dump. pass the name the writer resolves to. Defaults to None.
+
+    Returns:
+        EncodedChunk: the items encoded as a json list
+    """
+    return EncodedChunk(get_backend(indent, separators, backend).dumps(items))
+
+
+def _has_stream(val: Any, depth: int = 2) -> bool:
+    "true if val is an iterator or holds one within depth levels of dicts and lists"
+    if isinstance(val, Iterator):
+        return True
+    if depth == 0:
+        return False
+    if isinstance(val, dict):
+        return any(_has_stream(v, depth - 1) for v in val.values())
+    if isinstance(val, list):
+        return any(_has_stream(v, depth - 1) for v in val)
+    return False
+
+
+def _chunks(stream: Iterator, chunksize: int) -> Iterator[Union[List[Any], EncodedChunk]]:
+    chunk: List[Any] = []
+    for item in stream:
+        if isinstance(item, EncodedChunk):
+            if len(chunk) > 0:
+                yield chunk
+                chunk = []
+            yield item
+            continue
+        chunk.append(item)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+class _StreamEncoder:
+    "writes json to a file, draining iterators a chunk at a time instead of building the full document"
+
+    def __init__(self, f: IO[bytes], indent: Optional[int], separators: Tuple[str, str], backend, chunksize: int):
+        self.f = f
+        self.indent = indent
+        self.item_sep, self.key_sep = (sep.encode("utf-8") for sep in separators)
+        self.backend = backend
+        self.chunksize = chunksize
+
+    def _newline(self, level: int) -> bytes:
+        return b"" if self.indent is None else b"\n" + b" " * (self.indent * level)
+
+    def _reindent(self, out: bytes, level: int) -> bytes:
+        # nothing in json output holds a raw newline, so re-indenting the nested lines is safe
+        return out if self.indent is None or level == 0 else out.replace(b"\n", self._newline(level))
+
+    def encode(self, val: Any, level: int = 0):
+        if isinstance(val, Iterator):
+            self._encode_stream(val, level)
+        elif not _has_stream(val):
+            self.f.write(self._reindent(self.backend.dumps(val), level))
+        elif isinstance(val, dict):
+            items = ((self.backend.dumps(str(k)) + self.key_sep, v) for k, v in val.items())
+            self._encode_items(items, b"{", b"}", level)
+        else:
+            self._encode_items(((b"", v) for v in val), b"[", b"]", level)
+
+    def _encode_items(self, items, open_: bytes, close: bytes, level: int):
+        self.f.write(open_)
+        empty = True
+        for prefix, v in items:
+            self.f.write((b"" if empty else self.item_sep) + self._newline(level + 1) + prefix)
+            self.encode(v, level + 1)
+            empty = False
+        self.f.write(close if empty else self._newline(level) + close)
+
+    def _encode_stream(self, stream: Iterator, level: int):
+        # encode a chunk of items as one list and splice its items in, without the brackets
+        self.f.write(b"[")
+        empty = True
+        for chunk in _chunks(stream, self.chunksize):
+            out = chunk if isinstance(chunk, EncodedChunk) else self.backend.dumps(chunk)
+            if out == b"[]":
+                continue
+            out = out[1:-1] if self.indent is None else out[1:-2]
+            self.f.write((b"" if empty else self.item_sep) + self._reindent(out, level))
+            empty = False
+        self.f.write(b"]" if empty else self._newline(level) + b"]")
+
+
+def dump(
+    data: Any,
+    f: IO[bytes],
+    indent: Optional[int] = 4,
+    separators: Optional[Tuple[str, str]] = None,
+    backend: Optional[str] = None,
+    chunksize: int = CHUNKSIZE,
+):
+    """writes data as json, like json.dump(data, f, indent=indent, separators=separators).
+    iterators anywhere in data (e.g. the datapoints, nodes and links generators) are written
+    as lists, chunksize items at a time, so only one chunk of items is held in memory.
+    an EncodedChunk yielded by an iterator is written as its items.
+    NaN and Infinity are written as null, numpy and pandas values are converted.
+
+    Args:
+        data (Any): json serializable data. iterators are written as lists
+        f (IO[bytes]): file opened in binary mode to write to
+        indent (Optional[int], optional): same as json.dump. Defaults to 4.
+        separators (Optional[Tuple[str, str]], optional): same as json.dump. Defaults to None.
+        backend (Optional[str], optional): json encoder, one of BACKENDS. Defaults to None, the fastest available.
+        chunksize (int, optional): iterator items encoded per write. Defaults to CHUNKSIZE.
+    """
+    separators = _separators(indent, separators)
+    encoder = _StreamEncoder(f, indent, separators, get_backend(indent, separators, backend), chunksize)
+    encoder.encode(data)
+
+
+class _ByteCounter:
+    "a binary file that only counts what is written to it"
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data: bytes):
+        self.size += len(data)
+
+
+def encoded_size(data: Any, **kwargs) -> int:
+    "the number of bytes dump(data, f, **kwargs) writes, without holding them"
+    counter = _ByteCounter()
+    dump(data, counter, **kwargs)
+    return counter.size
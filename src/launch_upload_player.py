@@ -10,9 +10,8 @@ import os
 import configparser
 import pathlib as pl
 import reference as ref
-import http.server
-import socketserver
-import webbrowser
+from build_manifest import MANIFEST_NAME
+from preview_server import serve
 
 ### Config Setup ###
 config = configparser.ConfigParser()
@@ -24,6 +23,10 @@ REGION = config['aws']['region']
 ACCESS_KEY = config['aws']['access_key_id']
 SECRET_KEY = config['aws']['secret_access_key']
 
+# build files in the map folder that are not part of the published map. earlier
+# builds copied the preview server in
+UNPUBLISHED = [MANIFEST_NAME, "preview_server.py"]
+
 
 # launch local server and open browser to display map
 def run_local(project_directory, PORT=5000):
@@ -31,15 +34,7 @@ def run_local(project_directory, PORT=5000):
     launches a new tab in active browswer with the map
     project_directory : string, the directory with the project data (index.html and 'data' folder)
     """
-    web_dir = os.path.join(os.getcwd(), project_directory)
-    os.chdir(web_dir)  # change to project directory where index.html and data folder are
-
-    webbrowser.open_new_tab("http://localhost:" + str(PORT))  # open new tab in browswer
-
-    Handler = http.server.SimpleHTTPRequestHandler
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print("\nServing locally at port", PORT, "go to http://localhost:%s \nCTL_C to quit\n" % str(PORT))
-        httpd.serve_forever()
+    serve(project_directory, PORT, openBrowser=True)  # threaded, serves the precompressed .gz/.br data files when available
 
 def upload_to_s3(path, bucket_name):
     print("\nUploading map to AWS S3 Bucket, named %s, as static website"%bucket_name)
@@ -73,6 +68,8 @@ def upload_to_s3(path, bucket_name):
  
     for subdir, dirs, files in os.walk(path):
         for file in files:
+            if file in UNPUBLISHED:
+                continue
             full_path = os.path.join(subdir, file)
             with open(full_path, 'rb') as data:
                 bucket.put_object(Key=full_path[len(path)+1:], Body=data,
@@ -1,54 +1,232 @@
-from typing import Any, List, Dict, Union
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Dict, Optional, Tuple, Union
 from pathlib import Path
 import shutil
-import json
+import time
 import uuid
+import numpy as np
+import pandas as pd
 
 
-from build_dataset import build_attrDescriptors, build_datapoints
-from build_network import build_nodes, build_links, build_nodeAttrDescriptors, build_linkAttrDescriptors
+from build_clusters import build_clusters
+from bundle_assets import ASSET_CACHE, ASSET_DIR, BUNDLE_OPTIONS, bundle_assets
+from build_dataset import build_attrDescriptors, build_columnar_datapoints, iter_datapoints
+from build_network import iter_nodes, iter_links, build_nodeAttrDescriptors, build_linkAttrDescriptors
+from build_shards import CROSS_SHARD, SHARD_DIR, clear_shards, list_shards, shard_file
+from build_shards import cross_shard_pairs, shard_datapoints, shard_links
 from build_settings import build_settings
-from utils import load_templates, merge
+from build_search import build_search_index
+from build_summaries import build_summaries
+from build_thumbnails import IMAGE_CACHE, THUMB_DIR, THUMB_SIZE, THUMBNAIL_OPTIONS
+from build_thumbnails import build_thumbnails, image_columns, rewrite_images
+from build_tiles import TILE_DIR, build_tiles, clear_tiles, list_tiles, tile_file
+from fetch_cache import FetchCache, url_transport
+import json_writer
+from json_writer import encoded_size, get_backend
+from build_manifest import build_key, clear_manifest, input_hash, is_fresh, load_manifest, save_manifest, source_hash
+from precompress import report_savings, write_sidecars
+from ingest import CsvChunks, read_datapoints, read_datapointAttrs, read_links, validate_datapoints
+from parallel_build import cpu_workers, iter_encoded_datapoints, iter_encoded_links, iter_encoded_nodes
+from prune_links import SPARSIFY_OPTIONS, dedupe_links, sparsify_links
+from quantize import column_decimals, round_columns, rounding_savings
+from utils import load_templates, merge, template_view
 '''
-from src.build_dataset import build_attrDescriptors, build_datapoints
-from src.build_network import build_nodes, build_links, build_nodeAttrDescriptors, build_linkAttrDescriptors
+from src.build_clusters import build_clusters
+from src.bundle_assets import ASSET_CACHE, ASSET_DIR, BUNDLE_OPTIONS, bundle_assets
+from src.build_dataset import build_attrDescriptors, build_columnar_datapoints, iter_datapoints
+from src.build_network import iter_nodes, iter_links, build_nodeAttrDescriptors, build_linkAttrDescriptors
+from src.build_shards import CROSS_SHARD, SHARD_DIR, clear_shards, list_shards, shard_file
+from src.build_shards import cross_shard_pairs, shard_datapoints, shard_links
 from src.build_settings import build_settings
-from src.utils import load_templates, merge
+from src.build_search import build_search_index
+from src.build_summaries import build_summaries
+from src.build_thumbnails import IMAGE_CACHE, THUMB_DIR, THUMB_SIZE, THUMBNAIL_OPTIONS
+from src.build_thumbnails import build_thumbnails, image_columns, rewrite_images
+from src.build_tiles import TILE_DIR, build_tiles, clear_tiles, list_tiles, tile_file
+from src.fetch_cache import FetchCache, url_transport
+from src import json_writer
+from src.json_writer import encoded_size, get_backend
+from src.build_manifest import build_key, clear_manifest, input_hash, is_fresh, load_manifest, save_manifest, source_hash
+from src.precompress import report_savings, write_sidecars
+from src.ingest import CsvChunks, read_datapoints, read_datapointAttrs, read_links, validate_datapoints
+from src.parallel_build import cpu_workers, iter_encoded_datapoints, iter_encoded_links, iter_encoded_nodes
+from src.prune_links import SPARSIFY_OPTIONS, dedupe_links, sparsify_links
+from src.quantize import column_decimals, round_columns, rounding_savings
+from src.utils import load_templates, merge, template_view
 '''
 
-def __write_dataset_file(datapointsPath: Union[Path, str], datapointAttrPath: Union[Path, str], out_data_dir: Path):
+# index.html and the run script copied into each map folder
+SRC_DIR = Path(__file__).resolve().parent
+
+
+def __json_format(minify: bool) -> Dict[str, Any]:
+    "json_writer.dump formatting args. minified output drops the indentation and the spaces after separators"
+    return {"indent": None, "separators": (",", ":")} if minify else {"indent": 4}
+
+
+def __datapoints_part(
+    df_datapoints: pd.DataFrame,
+    datapointAttrTypes: Dict[str, str],
+    jsonFormat: Dict[str, Any],
+    datasetFormat: str,
+    pool: Optional[Executor],
+    window: int,
+) -> Dict[str, Any]:
+    # the datapoints of a dataset file, as its keys
+    if datasetFormat == "columnar":
+        # one array per attribute. index.html expands it into datapoints for the player
+        if pool is None:
+            return build_columnar_datapoints(df_datapoints, datapointAttrTypes)
+        # the tag vocabularies span the whole sheet. built in one task
+        return pool.submit(build_columnar_datapoints, df_datapoints, datapointAttrTypes).result()
+    if datasetFormat == "rows":
+        # collect datapoints. streamed to the file chunk by chunk
+        if pool is None:
+            return {"datapoints": iter_datapoints(df_datapoints, datapointAttrTypes)}
+        return {"datapoints": iter_encoded_datapoints(pool, df_datapoints, datapointAttrTypes, jsonFormat, window)}
+    raise ValueError(f"unknown datasetFormat '{datasetFormat}'. use 'rows' or 'columnar'")
+
+
+def __write_dataset_file(
+    df_datapoints: Union[pd.DataFrame, CsvChunks],
+    df_attrs: pd.DataFrame,
+    out_data_dir: Path,
+    jsonFormat: Dict[str, Any],
+    datasetFormat: str,
+    pool: Optional[Executor] = None,
+    window: int = 0,
+    shardBy: Optional[str] = None,
+):
     # collect datapoint attributes
-    datapointAttribs = build_attrDescriptors(str(datapointAttrPath))
+    datapointAttribs = build_attrDescriptors(df_attrs)
     datapointAttrTypes = {row["id"]: row["attrType"] for row in datapointAttribs}
     # print(f"\t- processed {len(datapointAttribs)} datapoint attributes {[at['id'] for at in datapointAttribs]}")
 
-    # collect datapoints
-    datapoints = build_datapoints(str(datapointsPath), datapointAttrTypes)
-    print(
-        f"\t- processed {len(datapoints)} datapoints with {datapoints[0].keys()} where attr={list(datapoints[0]['attr'].keys())}"
-    )
-
     # merge into dataset
     datasetTpl = load_templates("dataset")
-    data = {**datasetTpl, **{"attrDescriptors": datapointAttribs, "datapoints": datapoints}}
-    with open(out_data_dir / "nodes.json", mode="w") as f:
-        json.dump(data, f, indent=4)
+    clear_shards(out_data_dir, "nodes")
+    if shardBy is None:
+        datapoints = __datapoints_part(df_datapoints, datapointAttrTypes, jsonFormat, datasetFormat, pool, window)
+        if "datapoints" not in datapoints:
+            datasetTpl.pop("datapoints")
+        data = {**datasetTpl, **{"attrDescriptors": datapointAttribs}, **datapoints}
+    else:
+        # one file of datapoints per shard. nodes.json lists them, index.html loads them
+        shardKeys, codes = shard_datapoints(df_datapoints, shardBy)
+        (out_data_dir / SHARD_DIR).mkdir(exist_ok=True)
+        shards = []
+        for shard, key in enumerate(shardKeys):
+            df_shard = df_datapoints.iloc[np.flatnonzero(codes == shard)]
+            fname = shard_file("nodes", shard)
+            with open(out_data_dir / fname, mode="wb") as f:
+                json_writer.dump(
+                    __datapoints_part(df_shard, datapointAttrTypes, jsonFormat, datasetFormat, pool, window), f, **jsonFormat
+                )
+            shards.append({"key": key, "file": fname, "datapoints": len(df_shard), "bytes": (out_data_dir / fname).stat().st_size})
+        sharded = {"datapoints": [], "format": "sharded", "shardBy": shardBy, "shards": shards}
+        data = {**datasetTpl, **{"attrDescriptors": datapointAttribs}, **sharded}
+        print(f"\t- sharded by '{shardBy}' into {len(shards)} files in {out_data_dir / SHARD_DIR}")
+    print(f"\t- processing {len(df_datapoints)} datapoints where attr={list(df_datapoints.columns)}")
+
+    with open(out_data_dir / "nodes.json", mode="wb") as f:
+        json_writer.dump(data, f, **jsonFormat)
+
+
+def __network_part(
+    df_datapoints: Union[pd.DataFrame, CsvChunks],
+    df_links: Union[pd.DataFrame, CsvChunks],
+    node_attr_map: Dict[str, str],
+    link_attr_map: Dict[str, str],
+    jsonFormat: Dict[str, Any],
+    pool: Optional[Executor],
+    window: int,
+) -> Dict[str, Any]:
+    # the nodes and links of a network file, streamed to the file chunk by chunk. None skips the nodes
+    part: Dict[str, Any] = {}
+    if df_datapoints is not None:
+        if pool is None:
+            part["nodes"] = iter_nodes(df_datapoints, attr_map=node_attr_map)
+        else:
+            part["nodes"] = iter_encoded_nodes(pool, df_datapoints, node_attr_map, jsonFormat, window)
+    if pool is None:
+        part["links"] = iter_links(df_links, attr_map=link_attr_map)
+    else:
+        part["links"] = iter_encoded_links(pool, df_links, link_attr_map, jsonFormat, window)
+    return part
+
+
+def __write_network_shards(
+    df_datapoints: pd.DataFrame,
+    df_links: pd.DataFrame,
+    node_attr_map: Dict[str, str],
+    link_attr_map: Dict[str, str],
+    out_data_dir: Path,
+    jsonFormat: Dict[str, Any],
+    pool: Optional[Executor],
+    window: int,
+    shardBy: str,
+) -> Dict[str, Any]:
+    # one file per shard with its nodes and the links between them, and one with the links across shards
+    shardKeys, codes = shard_datapoints(df_datapoints, shardBy)
+    sources, targets = shard_links(df_links, link_attr_map, df_datapoints, codes)
+    linkCodes = np.where(sources == targets, sources, -1)
+    (out_data_dir / SHARD_DIR).mkdir(exist_ok=True)
+
+    def write(fname: str, rows: Optional[np.ndarray], linkRows: np.ndarray) -> int:
+        df_shard = None if rows is None else df_datapoints.iloc[rows]
+        part = __network_part(
+            df_shard,
+            df_links.iloc[linkRows],
+            node_attr_map,
+            link_attr_map,
+            jsonFormat,
+            pool,
+            window,
+        )
+        with open(out_data_dir / fname, mode="wb") as f:
+            json_writer.dump(part, f, **jsonFormat)
+        return (out_data_dir / fname).stat().st_size
+
+    shards = []
+    for shard, key in enumerate(shardKeys):
+        rows, linkRows = np.flatnonzero(codes == shard), np.flatnonzero(linkCodes == shard)
+        fname = shard_file("links", shard)
+        size = write(fname, rows, linkRows)
+        shards.append({"key": key, "file": fname, "nodes": len(rows), "links": len(linkRows), "bytes": size})
+
+    crossRows = np.flatnonzero(linkCodes == -1)
+    fname = shard_file("links", CROSS_SHARD)
+    crossLinks = {
+        "file": fname,
+        "links": len(crossRows),
+        "bytes": write(fname, None, crossRows),
+        "pairs": cross_shard_pairs(sources[crossRows], targets[crossRows]),
+    }
+    print(f"\t- sharded by '{shardBy}' into {len(shards)} files in {out_data_dir / SHARD_DIR}, {len(crossRows)} cross-shard links")
+    return {"nodes": [], "links": [], "format": "sharded", "shardBy": shardBy, "shards": shards, "crossLinks": crossLinks}
 
 
 def __write_network_file(
-    datapointsPath: Union[Path, str],
-    linksPath: Union[Path, str],
+    df_datapoints: Union[pd.DataFrame, CsvChunks],
+    df_links: Union[pd.DataFrame, CsvChunks],
     node_attr_map: Dict[str, str],
     link_attr_map: Dict[str, str],
     out_data_dir: Path,
+    jsonFormat: Dict[str, Any],
+    pool: Optional[Executor] = None,
+    window: int = 0,
+    shardBy: Optional[str] = None,
 ):
-    # collect nodes
-    nodes = build_nodes(dpPath=datapointsPath, attr_map=node_attr_map)
-    print(f"\t- processed {len(nodes)} nodes with {nodes[0].keys()} where attr={list(nodes[0]['attr'].keys())}")
-
-    # collect links
-    links = build_links(linksPath=linksPath, attr_map=link_attr_map)
-    print(f"\t- processed {len(links)} links with {links[0].keys()} where attr={list(links[0]['attr'].keys())}")
+    # collect nodes and links. streamed to the file chunk by chunk
+    clear_shards(out_data_dir, "links")
+    if shardBy is None:
+        network = __network_part(df_datapoints, df_links, node_attr_map, link_attr_map, jsonFormat, pool, window)
+    else:
+        network = __write_network_shards(
+            df_datapoints, df_links, node_attr_map, link_attr_map, out_data_dir, jsonFormat, pool, window, shardBy
+        )
+    print(f"\t- processing {len(df_datapoints)} nodes")
+    print(f"\t- processing {len(df_links)} links where attr columns={list(df_links.columns)}")
 
     # collect node attributes
     nodeAttribs = build_nodeAttrDescriptors()
@@ -59,24 +237,233 @@ def __write_network_file(
     print(f"\t- processed {len(linkAttribs)} link attributes {[at['id'] for at in linkAttribs]}")
 
     # write network file
-    networkTpl = load_templates("network")
+    networkTpl = template_view("network")
     data = {
         **networkTpl,
-        **{"nodes": nodes, "links": links, "nodeAttrDescriptors": nodeAttribs, "linkAttrDescriptors": linkAttribs},
+        **{**network, "nodeAttrDescriptors": nodeAttribs, "linkAttrDescriptors": linkAttribs},
     }
     # pprint.pprint(data)
 
-    with open(out_data_dir / "links.json", mode="w") as f:
-        json.dump([data], f, indent=4)
+    with open(out_data_dir / "links.json", mode="wb") as f:
+        json_writer.dump([data], f, **jsonFormat)
+
+
+def __dedupe_links(
+    df_links: pd.DataFrame, link_attr_map: Dict[str, str], markReciprocal: bool, jsonFormat: Dict[str, Any]
+) -> pd.DataFrame:
+    # drop the repeated links and report what they would have taken in links.json
+    kept, dropped = dedupe_links(df_links, link_attr_map, markReciprocal)
+    df_dropped = df_links.loc[df_links.index.difference(kept.index)]
+    saved = encoded_size([{"links": iter_links(df_dropped, link_attr_map)}], **jsonFormat) - encoded_size(
+        [{"links": []}], **jsonFormat
+    )
+    print(
+        f"\t- dropped {len(df_dropped)} of {len(df_links)} links ({dropped['duplicate']} duplicates, "
+        f"{dropped['reciprocal']} reciprocal pairs collapsed). about {saved:,}B less in links.json"
+    )
+    return kept
+
+
+def __round_sheet(
+    sheet: Union[pd.DataFrame, CsvChunks], precision: Dict[str, Any], writes: Dict[str, int], jsonFormat: Dict[str, Any]
+) -> Tuple[Union[pd.DataFrame, CsvChunks], Dict[str, int], int]:
+    # round the float columns given a precision. chunked sheets are rounded as they are read
+    decimals = column_decimals(sheet, list(sheet.columns), precision)
+    if len(decimals) == 0:
+        return sheet, decimals, 0
+    saved, _ = rounding_savings(sheet, decimals, writes, jsonFormat)
+    if isinstance(sheet, CsvChunks):
+        sheet.decimals = decimals
+        return sheet, decimals, saved
+    return round_columns(sheet, decimals), decimals, saved
+
+
+def __column_precision(precision: Dict[str, Any], node_attr_map: Dict[str, str]) -> Dict[str, Any]:
+    # node attrs stand for the datapoints column they are read from
+    return {node_attr_map.get(key, key): val for key, val in precision.items()}
+
+
+def __round_sheets(
+    df_datapoints: Union[pd.DataFrame, CsvChunks],
+    df_links: Union[pd.DataFrame, CsvChunks],
+    precision: Dict[str, Any],
+    node_attr_map: Dict[str, str],
+    jsonFormat: Dict[str, Any],
+) -> Tuple[Union[pd.DataFrame, CsvChunks], Union[pd.DataFrame, CsvChunks]]:
+    # precision is by column, from __column_precision
+    unknown = [key for key in precision if key not in df_datapoints.columns and key not in df_links.columns]
+    if len(unknown) > 0:
+        raise ValueError(f"precision given for {unknown}, which are not datapoints or links columns")
+    # datapoints columns are written in nodes.json, and again in links.json when a node attr reads them
+    nodeCols = set(node_attr_map.values())
+    writes = {key: 2 if key in nodeCols else 1 for key in df_datapoints.columns}
+    df_datapoints, decimals, saved = __round_sheet(df_datapoints, precision, writes, jsonFormat)
+    df_links, linkDecimals, linksSaved = __round_sheet(df_links, precision, {}, jsonFormat)
+    if len(decimals) + len(linkDecimals) > 0:
+        print(
+            f"\t- rounded datapoints {decimals} and links {linkDecimals} to decimal places."
+            f" about {saved + linksSaved:,}B less in nodes.json and links.json"
+        )
+    return df_datapoints, df_links
+
+
+def __thumbnail_images(
+    df_datapoints: pd.DataFrame,
+    df_attrs: pd.DataFrame,
+    snapshots: List[Dict],
+    thumbnails: Dict[str, Any],
+    out_data_dir: Path,
+    jsonFormat: Dict[str, Any],
+    workers: int,
+) -> pd.DataFrame:
+    # thumbnails of the node images, listed in thumbs.json. the image columns point at them
+    columns = image_columns(build_attrDescriptors(df_attrs), snapshots, list(df_datapoints.columns))
+    urls = pd.unique(pd.concat([df_datapoints[col].dropna().astype(str) for col in columns] or [pd.Series([], dtype=str)]))
+    args = [
+        [url for url in urls.tolist() if url != ""],
+        out_data_dir,
+        FetchCache(thumbnails.get("cache", IMAGE_CACHE)),
+        thumbnails.get("transport", url_transport),
+        thumbnails.get("size", THUMB_SIZE),
+        thumbnails.get("format", "png"),
+        thumbnails.get("sprites", False),
+    ]
+    if workers == 1:
+        data = build_thumbnails(*args)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            data = build_thumbnails(*args, pool)
+    with open(out_data_dir / "thumbs.json", mode="wb") as f:
+        json_writer.dump(data, f, **jsonFormat)
+    print(f"\t- {len(data['images'])} thumbnails of {columns} in {out_data_dir / THUMB_DIR}. {len(data['failed'])} images failed")
+    for url, reason in list(data["failed"].items())[:5]:
+        print(f"\t\t{url}: {reason}")
+    # relative to index.html, which the player loads them from
+    return rewrite_images(df_datapoints, columns, data["images"], f"{out_data_dir.name}/")
+
+
+def __bundle_index(out_dir: Path, bundle: Dict[str, Any], compression: Dict[str, int]):
+    # index.html pointing at its scripts and stylesheets vendored into assets/, with sidecars for the text ones
+    page, data = bundle_assets(
+        (SRC_DIR / "index.html").read_text(encoding="utf-8"),
+        out_dir,
+        FetchCache(bundle.get("cache", ASSET_CACHE)),
+        bundle.get("transport", url_transport),
+        bundle.get("concat", False),
+        bundle.get("minify", False),
+    )
+    (out_dir / "index.html").write_text(page, encoding="utf-8")
+    files = sorted(set(data["assets"].values()))
+    size = sum((out_dir / fname).stat().st_size for fname in files)
+    print(f"\t- vendored {len(files)} assets, {size:,}B, into {out_dir / ASSET_DIR}. index.html loads {data['requests']} of them")
+    for url, reason in list(data["failed"].items())[:5]:
+        print(f"\t\tkept remote {url}: {reason}")
+    for fname in files:
+        if fname.endswith((".js", ".css", ".html")):
+            write_sidecars(out_dir / fname, compression)
+
+
+def __write_summaries_file(
+    df_datapoints: Union[pd.DataFrame, CsvChunks], df_attrs: pd.DataFrame, out_data_dir: Path, jsonFormat: Dict[str, Any]
+):
+    data = build_summaries(df_datapoints, build_attrDescriptors(df_attrs))
+    print(f"\t- summarized {len(data['attrs'])} attributes {list(data['attrs'].keys())}")
+    with open(out_data_dir / "summaries.json", mode="wb") as f:
+        json_writer.dump(data, f, **jsonFormat)
+
 
+def __write_search_file(
+    df_datapoints: Union[pd.DataFrame, CsvChunks], df_attrs: pd.DataFrame, out_data_dir: Path, jsonFormat: Dict[str, Any]
+):
+    data = build_search_index(df_datapoints, build_attrDescriptors(df_attrs))
+    print(f"\t- indexed {len(data['tokens'])} words and {len(data['prefixes'])} prefixes of attributes {data['attrs']}")
+    with open(out_data_dir / "search.json", mode="wb") as f:
+        json_writer.dump(data, f, **jsonFormat)
+
+
+def __write_tiles_file(
+    df_datapoints: Union[pd.DataFrame, CsvChunks],
+    snapshots: List[Dict],
+    node_attr_map: Dict[str, str],
+    out_data_dir: Path,
+    jsonFormat: Dict[str, Any],
+):
+    # the tile aggregates in tiles.json, the ids of each leaf tile in a file of its own
+    data, leafIds = build_tiles(df_datapoints, snapshots, node_attr_map)
+    clear_tiles(out_data_dir)
+    (out_data_dir / TILE_DIR).mkdir(exist_ok=True)
+    for n, (pyramid, ids) in enumerate(zip(data["pyramids"], leafIds)):
+        leaves = [tile for tile in pyramid["tiles"] if tile["leaf"]]
+        for tile, tileIds in zip(leaves, ids):
+            tile["file"] = tile_file(n, tile["z"], tile["x"], tile["y"])
+            with open(out_data_dir / tile["file"], mode="wb") as f:
+                json_writer.dump({"ids": tileIds}, f, **jsonFormat)
+        print(
+            f"\t- tiled {pyramid['axes']} into {len(pyramid['tiles'])} tiles, {len(leaves)} leaves,"
+            f" {pyramid['maxZoom'] + 1} zoom levels. {pyramid['unplaced']} datapoints without coordinates"
+        )
+    with open(out_data_dir / "tiles.json", mode="wb") as f:
+        json_writer.dump(data, f, **jsonFormat)
 
-def __write_settings_file(snapshots: List[Dict], playerSettings: Dict[str, Any], out_data_dir: Path):
+
+def __write_clusters_file(
+    df_datapoints: Union[pd.DataFrame, CsvChunks],
+    df_links: Union[pd.DataFrame, CsvChunks],
+    snapshots: List[Dict],
+    node_attr_map: Dict[str, str],
+    link_attr_map: Dict[str, str],
+    out_data_dir: Path,
+    jsonFormat: Dict[str, Any],
+):
+    data = build_clusters(df_datapoints, df_links, snapshots, node_attr_map, link_attr_map)
+    for network in data["networks"]:
+        print(
+            f"\t- clustered by '{network['attr']}' over {network['axes']}: "
+            f"{len(network['nodes'])} super-nodes, {len(network['links'])} links between them"
+        )
+    with open(out_data_dir / "clusters.json", mode="wb") as f:
+        json_writer.dump(data, f, **jsonFormat)
+
+
+def __write_settings_file(
+    snapshots: List[Dict], playerSettings: Dict[str, Any], out_data_dir: Path, jsonFormat: Dict[str, Any]
+):
     data = build_settings(snapshots, playerSettings)
-    with open(out_data_dir / "settings.json", mode="w") as f:
-        json.dump(data, f, indent=4)
+    with open(out_data_dir / "settings.json", mode="wb") as f:
+        json_writer.dump(data, f, **jsonFormat)
     return data
 
 
+def __precompress_files(
+    out_data_dir: Path, fnames: List[str], compression: Dict[str, int], pool: Optional[Executor] = None
+):
+    # write (or clear stale) .gz/.br sidecars and report the savings
+    paths = [out_data_dir / fname for fname in fnames]
+    mapper = map if pool is None else pool.map
+    for path, sizes in zip(paths, mapper(write_sidecars, paths, [compression] * len(paths))):
+        report_savings(path, sizes)
+
+
+def __data_files(out_data_dir: Path, fnames: List[str]) -> List[str]:
+    # the data files and the shard and tile files they list
+    shards = [shard for fname in fnames for shard in list_shards(out_data_dir, Path(fname).stem)]
+    return fnames + shards + (list_tiles(out_data_dir) if "tiles.json" in fnames else [])
+
+
+def __timed(fn: Callable, *args, **kwargs) -> float:
+    # wall time of a build stage, in seconds
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def __print_timings(timings: Dict[str, float], total: float):
+    print(f">> timings")
+    for stage, elapsed in timings.items():
+        print(f"\t- {stage:<12} {elapsed:8.2f}s")
+    print(f"\t- {'total':<12} {total:8.2f}s")
+
+
 def create_map(
     datapointsPath: Union[Path, str],
     linksPath: Union[Path, str],
@@ -86,6 +473,23 @@ def create_map(
     snapshots: List[Dict] = [],
     playerSettings: Dict[str, Any] = {},
     outFolder: Union[Path, str] = "data_out",
+    minify: bool = False,
+    compression: Dict[str, int] = {},
+    datasetFormat: str = "rows",
+    incremental: bool = False,
+    workers: int = 1,
+    chunksize: Optional[int] = None,
+    shardBy: Optional[str] = None,
+    dedupeLinks: bool = False,
+    markReciprocal: bool = False,
+    sparsify: Dict[str, Any] = {},
+    summaries: bool = False,
+    searchIndex: bool = False,
+    tiles: bool = False,
+    clusters: bool = False,
+    precision: Dict[str, Any] = {},
+    thumbnails: Dict[str, Any] = {},
+    bundle: Dict[str, Any] = {},
 ):
     """Creates a map renderable in a browser.
        Outputs a folder with formatted data folder, index.html and run utility
@@ -99,7 +503,46 @@ def create_map(
         snapshots (List[Dict], optional): list of snapshots. Defaults to []
         playerSettings (Dict[str, str], optional): settings to customize the player (info, theme etc). Defaults to {}
         outFolder (str, optional): name of the output folder. Defaults to "data_out".
+        minify (bool, optional): write the data files as compact json. Defaults to False.
+        compression (Dict[str, int], optional): precompressed sidecars as {extension: level}, e.g. {"gz": 9, "br": 11}. Defaults to {}.
+        datasetFormat (str, optional): "rows", a dict per datapoint, or "columnar", an array per attribute. Defaults to "rows".
+        incremental (bool, optional): only rebuild the data files whose inputs changed since the last build. Defaults to False.
+        workers (int, optional): processes to build the data files with, 0 for one per cpu. Defaults to 1.
+        chunksize (Optional[int], optional): read the csv files this many rows at a time. Defaults to None, read whole.
+        shardBy (Optional[str], optional): a datapoints column to split the data files into shards by. Defaults to None.
+        dedupeLinks (bool, optional): write each link once, with the largest weight of its repeats. Defaults to False.
+        markReciprocal (bool, optional): write a directed pair A->B, B->A as one isReciprocal link. Defaults to False.
+        sparsify (Dict[str, Any], optional): thin out the links by weight, see prune_links.SPARSIFY_OPTIONS. Defaults to {}.
+        summaries (bool, optional): also write data/summaries.json, the attribute histograms and counts. Defaults to False.
+        searchIndex (bool, optional): also write data/search.json, an index of the searchable attributes. Defaults to False.
+        tiles (bool, optional): also write data/tiles.json, a quadtree of the datapoints per snapshot. Defaults to False.
+        clusters (bool, optional): also write data/clusters.json, a network of the clusters per snapshot. Defaults to False.
+        precision (Dict[str, Any], optional): decimal places per float column, a number, "auto" or None. Defaults to {}.
+        thumbnails (Dict[str, Any], optional): thumbnail the picture attrs, see build_thumbnails.THUMBNAIL_OPTIONS. Defaults to {}.
+        bundle (Dict[str, Any], optional): vendor the cdn assets, see bundle_assets.BUNDLE_OPTIONS. Defaults to {}.
     """
+    if chunksize is not None and datasetFormat == "columnar":
+        raise ValueError("datasetFormat 'columnar' needs the whole datapoints sheet. use 'rows' with chunksize")
+    if chunksize is not None and shardBy is not None:
+        raise ValueError("shardBy needs the whole datapoints and links sheets. it is not available with chunksize")
+    dedupeLinks = dedupeLinks or markReciprocal
+    if chunksize is not None and dedupeLinks:
+        raise ValueError("dedupeLinks needs the whole links sheet. it is not available with chunksize")
+    unknown = [key for key in sparsify if key not in SPARSIFY_OPTIONS]
+    if len(unknown) > 0:
+        raise ValueError(f"unknown sparsify options {unknown}. use any of {SPARSIFY_OPTIONS}")
+    if chunksize is not None and len(sparsify) > 0:
+        raise ValueError("sparsify needs the whole links sheet. it is not available with chunksize")
+    unknown = [key for key in thumbnails if key not in THUMBNAIL_OPTIONS]
+    if len(unknown) > 0:
+        raise ValueError(f"unknown thumbnails options {unknown}. use any of {THUMBNAIL_OPTIONS}")
+    if chunksize is not None and len(thumbnails) > 0:
+        raise ValueError("thumbnails rewrite the datapoints sheet. they are not available with chunksize")
+    unknown = [key for key in bundle if key not in BUNDLE_OPTIONS]
+    if len(unknown) > 0:
+        raise ValueError(f"unknown bundle options {unknown}. use any of {BUNDLE_OPTIONS}")
+    buildStart = time.perf_counter()
+    timings: Dict[str, float] = {}
 
     # create folders and copy the index file
     print(f">> creating folders")
@@ -112,24 +555,174 @@ def create_map(
         print(f"\t- found existing. overwriting - {out_data_path}")
 
     # copy the index and run scripts to out directory
-    shutil.copy("src/index.html", out_dir)
-    print(f"\t- copied {out_dir}/index.html")
+    if len(bundle) > 0:
+        timings["bundle"] = __timed(__bundle_index, out_dir, bundle, compression)
+    else:
+        shutil.rmtree(out_dir / ASSET_DIR, ignore_errors=True)
+        shutil.copy(SRC_DIR / "index.html", out_dir)
+        print(f"\t- copied {out_dir}/index.html")
 
-    shutil.copy("src/run_local.sh", out_dir)
+    shutil.copy(SRC_DIR / "run_local.sh", out_dir)
     print(f"\t- copied {out_dir}/run_local.sh\n")
+    # the preview server is run from src. earlier builds copied it into the map folder
+    (out_dir / "preview_server.py").unlink(missing_ok=True)
+
+    # content hashes of everything each data file is built from
+    if incremental:
+        manifest = load_manifest(out_dir)
+    else:
+        clear_manifest(out_dir)
+        manifest = {"inputs": {}, "outputs": {}}
+    jsonFormat = __json_format(minify)
+    common = [source_hash(), jsonFormat, get_backend(**jsonFormat).name, compression]
+    # the datapoints as written, rounded to their precision and pointing at the thumbnails. the precision is keyed
+    # by column, as the columns node_attr_map names are rounded too
+    thumbnailKey = {key: val for key, val in thumbnails.items() if key != "transport"}
+    columnPrecision = __column_precision(precision, node_attr_map)
+    datapointsHash = build_key(input_hash(datapointsPath, manifest), columnPrecision, thumbnailKey)
+    buildKeys = {
+        "nodes.json": build_key(common, datapointsHash, input_hash(datapointAttrPath, manifest), datasetFormat, shardBy),
+        "links.json": build_key(
+            common, datapointsHash, input_hash(linksPath, manifest), node_attr_map, link_attr_map, shardBy, dedupeLinks, markReciprocal, sparsify
+        ),
+        "settings.json": build_key(common, snapshots, playerSettings),
+    }
+    # the optional data files, left from an earlier build when they are off
+    optional = [
+        ("summaries.json", summaries, []),
+        ("search.json", searchIndex, []),
+        ("tiles.json", tiles, [node_attr_map, snapshots]),
+        (
+            "clusters.json",
+            clusters,
+            [input_hash(linksPath, manifest), node_attr_map, link_attr_map, snapshots, dedupeLinks, markReciprocal, sparsify],
+        ),
+    ]
+    for fname, wanted, params in optional:
+        if wanted:
+            buildKeys[fname] = build_key(common, datapointsHash, input_hash(datapointAttrPath, manifest), *params)
+        else:
+            for path in out_data_path.glob(f"{fname}*"):
+                path.unlink()
+    if not tiles:
+        clear_tiles(out_data_path)
+    if len(thumbnails) == 0:
+        shutil.rmtree(out_data_path / THUMB_DIR, ignore_errors=True)
+        for path in out_data_path.glob("thumbs.json*"):
+            path.unlink()
+    stale = [fname for fname, key in buildKeys.items() if not is_fresh(manifest, out_data_path / fname, key)]
+    for fname in buildKeys:
+        if fname not in stale:
+            print(f"\t- {fname} is up to date. skipping")
+
+    # read each input sheet once. the dataset and network builders share the frames
+    if any(fname in stale for fname in ["nodes.json", "links.json", "summaries.json", "search.json", "tiles.json", "clusters.json"]):
+        print(f">> reading data")
+        readStart = time.perf_counter()
+        df_attrs = read_datapointAttrs(datapointAttrPath)
+        df_datapoints = read_datapoints(datapointsPath, df_attrs, chunksize)
+        df_links = read_links(linksPath, link_attr_map, chunksize)
+        validate_datapoints(df_datapoints, df_attrs)
+        # rounded before anything is built from them, so every data file writes the same values
+        df_datapoints, df_links = __round_sheets(df_datapoints, df_links, columnPrecision, node_attr_map, jsonFormat)
+        if len(thumbnails) > 0:
+            thumbStart = time.perf_counter()
+            df_datapoints = __thumbnail_images(
+                df_datapoints, df_attrs, snapshots, thumbnails, out_data_path, jsonFormat, cpu_workers(workers)
+            )
+            timings["thumbnails"] = time.perf_counter() - thumbStart
+        # the links as links.json writes them, for it and the links between clusters
+        linksStale = "links.json" in stale or "clusters.json" in stale
+        if dedupeLinks and linksStale:
+            df_links = __dedupe_links(df_links, link_attr_map, markReciprocal, jsonFormat)
+        if len(sparsify) > 0 and linksStale:
+            n_links = len(df_links)
+            df_links, pruned = sparsify_links(df_links, link_attr_map, **sparsify)
+            print(f"\t- sparsified {sparsify}: kept {len(df_links)} of {n_links} links, {pruned['backbone']} for the backbone")
+        timings["reading"] = time.perf_counter() - readStart - timings.get("thumbnails", 0)
+        if chunksize is not None:
+            print(f"\t- scanned in chunks of {chunksize} rows. the sheets are read again, chunk by chunk, while building")
+        print(f"\t- read {len(df_datapoints)} datapoints, {len(df_attrs)} datapoint attributes, {len(df_links)} links\n")
+
+    # the stale files, as {file: (stage, build(pool, window))}
+    builds: Dict[str, Any] = {}
+    if "nodes.json" in stale:
+        builds["nodes.json"] = (
+            "dataset",
+            lambda pool, window: __write_dataset_file(
+                df_datapoints, df_attrs, out_data_path, jsonFormat, datasetFormat, pool, window, shardBy
+            ),
+        )
+    if "links.json" in stale:
+        builds["links.json"] = (
+            "network",
+            lambda pool, window: __write_network_file(
+                df_datapoints, df_links, node_attr_map, link_attr_map, out_data_path, jsonFormat, pool, window, shardBy
+            ),
+        )
+    if "summaries.json" in stale:
+        builds["summaries.json"] = (
+            "summaries",
+            lambda pool, window: __write_summaries_file(df_datapoints, df_attrs, out_data_path, jsonFormat),
+        )
+    if "search.json" in stale:
+        builds["search.json"] = (
+            "search",
+            lambda pool, window: __write_search_file(df_datapoints, df_attrs, out_data_path, jsonFormat),
+        )
+    if "tiles.json" in stale:
+        builds["tiles.json"] = (
+            "tiles",
+            lambda pool, window: __write_tiles_file(df_datapoints, snapshots, node_attr_map, out_data_path, jsonFormat),
+        )
+    if "clusters.json" in stale:
+        builds["clusters.json"] = (
+            "clusters",
+            lambda pool, window: __write_clusters_file(
+                df_datapoints, df_links, snapshots, node_attr_map, link_attr_map, out_data_path, jsonFormat
+            ),
+        )
+    if "settings.json" in stale:
+        builds["settings.json"] = (
+            "settings",
+            lambda pool, window: __write_settings_file(snapshots, playerSettings, out_data_path, jsonFormat),
+        )
 
     # write the files
-    print(f">> building dataset")
-    __write_dataset_file(datapointsPath, datapointAttrPath, out_data_path)
-    print(f"\t- new dataset file written to {out_data_path / 'nodes.json'}.\n")
+    workers = cpu_workers(workers)
+    if workers == 1 or len(builds) == 0:
+        for fname, (stage, build) in builds.items():
+            print(f">> building {stage}")
+            timings[stage] = __timed(build, None, 0)
+            print(f"\t- new {stage} file written to {out_data_path / fname}.\n")
+
+        if len(stale) > 0:
+            print(f">> precompressing data files")
+            timings["precompress"] = __timed(__precompress_files, out_data_path, __data_files(out_data_path, stale), compression)
+    else:
+        # the stages run side by side in threads that only stitch and write the chunks, the rows are
+        # built and encoded in the process pool. chunks are written in row order, so the files are
+        # identical to a build with workers=1
+        print(f">> building {', '.join(stage for stage, _ in builds.values())} with {workers} processes")
+        with ProcessPoolExecutor(workers) as pool, ThreadPoolExecutor(len(builds)) as threads:
+            # start the processes before the stage threads, forking a threaded process is unsafe
+            pool.submit(int).result()
+            futures = {fname: threads.submit(__timed, build, pool, 2 * workers) for fname, (_, build) in builds.items()}
+            for fname, future in futures.items():
+                stage = builds[fname][0]
+                timings[stage] = future.result()
+                print(f"\t- new {stage} file written to {out_data_path / fname}.\n")
+
+            print(f">> precompressing data files")
+            timings["precompress"] = __timed(__precompress_files, out_data_path, __data_files(out_data_path, stale), compression, pool)
 
-    print(f">> building network")
-    __write_network_file(datapointsPath, linksPath, node_attr_map, link_attr_map, out_data_path)
-    print(f"\t- new network file written to {out_data_path / 'links.json'}.\n")
+    # record what the data files were built from
+    if incremental:
+        manifest["outputs"] = {**manifest["outputs"], **buildKeys}
+        save_manifest(out_dir, manifest)
 
-    print(f">> building settings")
-    __write_settings_file(snapshots, playerSettings, out_data_path)
-    print(f"\t- new settings file written to {out_data_path / 'settings.json'}.\n")
+    if len(stale) > 0:
+        __print_timings(timings, time.perf_counter() - buildStart)
 
 
 def create_snapshot(name: str, subtitle: str, summaryImg: str = "", description: str = "", layout_params: Dict = {}):
@@ -0,0 +1,103 @@
+from collections import deque
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple, Union
+import os
+
+import pandas as pd
+
+from build_dataset import iter_datapoints
+from build_network import iter_link_chunk, iter_node_chunk
+from json_writer import EncodedChunk, encode_chunk, get_backend
+from utils import CHUNKSIZE, frame_chunks
+
+# from src.build_dataset import iter_datapoints
+# from src.build_network import iter_link_chunk, iter_node_chunk
+# from src.json_writer import EncodedChunk, encode_chunk, get_backend
+# from src.utils import CHUNKSIZE, frame_chunks
+
+# a DataFrame, or its chunks
+Sheet = Union[pd.DataFrame, Iterable[pd.DataFrame]]
+
+
+def cpu_workers(workers: int) -> int:
+    "the number of processes to build with. 0 is one per cpu"
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def ordered_map(pool: Executor, fn: Callable, args: Iterator[Tuple], window: int) -> Iterator[Any]:
+    """like pool.map, but keeps at most window tasks in flight so results are not all held at once.
+    the first window of tasks is submitted right away, before the results are consumed.
+
+    Args:
+        pool (Executor): process pool to run fn in
+        fn (Callable): picklable function
+        args (Iterator[Tuple]): the args of each call
+        window (int): max tasks submitted ahead of the one being consumed
+
+    Returns:
+        Iterator[Any]: the results, in the order of args
+    """
+    pending = deque(pool.submit(fn, *a) for a in islice(args, window))
+
+    def results():
+        while len(pending) > 0:
+            result = pending.popleft().result()
+            pending.extend(pool.submit(fn, *a) for a in islice(args, 1))
+            yield result
+
+    return results()
+
+
+def _encode_datapoints(df_chunk: pd.DataFrame, dpAttribTypes: Dict[str, str], jsonFormat: Dict[str, Any], backend: str):
+    return encode_chunk(list(iter_datapoints(df_chunk, dpAttribTypes)), backend=backend, **jsonFormat)
+
+
+def _encode_nodes(df_chunk: pd.DataFrame, attr_map: Dict[str, str], jsonFormat: Dict[str, Any], backend: str):
+    return encode_chunk(list(iter_node_chunk(df_chunk, attr_map)), backend=backend, **jsonFormat)
+
+
+def _encode_links(df_chunk: pd.DataFrame, attr_map: Dict[str, str], jsonFormat: Dict[str, Any], backend: str):
+    return encode_chunk(list(iter_link_chunk(df_chunk, attr_map)), backend=backend, **jsonFormat)
+
+
+def iter_encoded_datapoints(
+    pool: Executor,
+    sheet: Sheet,
+    dpAttribTypes: Dict[str, str],
+    jsonFormat: Dict[str, Any],
+    window: int,
+    chunksize: int = CHUNKSIZE,
+) -> Iterator[EncodedChunk]:
+    "iter_datapoints, built and encoded chunksize rows at a time in the pool. in row order"
+    backend = get_backend(**jsonFormat).name
+    args = ((df_chunk, dpAttribTypes, jsonFormat, backend) for df_chunk in frame_chunks(sheet, chunksize))
+    return ordered_map(pool, _encode_datapoints, args, window)
+
+
+def iter_encoded_nodes(
+    pool: Executor,
+    sheet: Sheet,
+    attr_map: Dict[str, str],
+    jsonFormat: Dict[str, Any],
+    window: int,
+    chunksize: int = CHUNKSIZE,
+) -> Iterator[EncodedChunk]:
+    "iter_nodes, built and encoded chunksize rows at a time in the pool. in row order"
+    backend = get_backend(**jsonFormat).name
+    args = ((df_chunk, attr_map, jsonFormat, backend) for df_chunk in frame_chunks(sheet, chunksize))
+    return ordered_map(pool, _encode_nodes, args, window)
+
+
+def iter_encoded_links(
+    pool: Executor,
+    sheet: Sheet,
+    attr_map: Dict[str, str],
+    jsonFormat: Dict[str, Any],
+    window: int,
+    chunksize: int = CHUNKSIZE,
+) -> Iterator[EncodedChunk]:
+    "iter_links, built and encoded chunksize rows at a time in the pool. in row order"
+    backend = get_backend(**jsonFormat).name
+    args = ((df_chunk, attr_map, jsonFormat, backend) for df_chunk in frame_chunks(sheet, chunksize))
+    return ordered_map(pool, _encode_links, args, window)
@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import Dict
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    # optional. .br sidecars are skipped without it
+    brotli = None
+
+
+# sidecar extension: (Content-Encoding, default level)
+SIDECARS = {"gz": ("gzip", 9), "br": ("br", 11)}
+
+# files are compressed this many bytes at a time, so a large data file is never held whole
+BLOCKSIZE = 1 << 20
+
+
+def _compress(path: Path, sidecar: Path, ext: str, level: int):
+    with open(path, "rb") as src, open(sidecar, "wb") as dst:
+        if ext == "gz":
+            # a gzip stream with no mtime (wbits 31), like gzip.compress(data, mtime=0). keeps the sidecar identical across rebuilds
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            process, finish = compressor.compress, compressor.flush
+        else:
+            compressor = brotli.Compressor(quality=level)
+            process, finish = compressor.process, compressor.finish
+        for block in iter(lambda: src.read(BLOCKSIZE), b""):
+            dst.write(process(block))
+        dst.write(finish())
+
+
+def write_sidecars(path: Path, levels: Dict[str, int]) -> Dict[str, int]:
+    """writes a precompressed copy (e.g. nodes.json.gz, nodes.json.br) next to path for each
+    requested extension, and removes stale sidecars of extensions that were not requested
+
+    Args:
+        path (Path): file to compress
+        levels (Dict[str, int]): map of {sidecar extension: compression level}, e.g. {"gz": 9, "br": 11}.
+                                 None picks the default level
+
+    Returns:
+        Dict[str, int]: map of {sidecar extension: size in bytes} for the sidecars written
+    """
+    unknown = [ext for ext in levels if ext not in SIDECARS]
+    if len(unknown) > 0:
+        raise ValueError(f"unknown compression {unknown}. use any of {list(SIDECARS.keys())}")
+
+    sizes: Dict[str, int] = {}
+    for ext in SIDECARS:
+        sidecar = path.with_name(f"{path.name}.{ext}")
+        if ext not in levels or (ext == "br" and brotli is None):
+            if ext in levels:
+                print(f"\t- brotli is not installed. skipping {sidecar.name}")
+            # a stale sidecar would be served instead of the fresh file
+            sidecar.unlink(missing_ok=True)
+            continue
+        level = levels[ext] if levels[ext] is not None else SIDECARS[ext][1]
+        _compress(path, sidecar, ext, level)
+        sizes[ext] = sidecar.stat().st_size
+    return sizes
+
+
+def report_savings(path: Path, sizes: Dict[str, int]):
+    "prints the size of path and how many bytes each of its sidecars saves"
+    size = path.stat().st_size
+    savings = [f"{path.name}.{ext} {sz:,}B (-{1 - sz / max(size, 1):.0%})" for ext, sz in sizes.items()]
+    print(f"\t- {path.name} {size:,}B" + (f" -> {', '.join(savings)}" if savings else ""))
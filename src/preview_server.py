@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+serves a map folder locally, a thread per connection. serves the .gz/.br sidecars when the browser
+accepts them, answers ETag/Last-Modified revalidations with 304, and byte ranges
+
+    python src/preview_server.py [PORT] [DIRECTORY]
+"""
+from functools import partial
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+import datetime
+import email.utils
+import http.server
+import os
+import re
+import sys
+import webbrowser
+
+# Content-Encoding: sidecar extension, in order of preference
+SIDECAR_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# the content hashed files of create_map's bundle never change under their name. the rest is revalidated each load
+IMMUTABLE = re.compile(r"(^|/)assets/[^/]+\.[0-9a-f]{10}\.[\w.]+$")
+
+
+class _Slice:
+    "length bytes of an open file from start, read like the file"
+
+    def __init__(self, f, start: int, length: int):
+        f.seek(start)
+        self.f = f
+        self.left = length
+
+    def read(self, n: int = -1) -> bytes:
+        data = self.f.read(self.left if n is None or n < 0 else min(n, self.left))
+        self.left -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def _byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """the first and last byte of a single range, bytes=a-b, a- or -n. None for anything else, which is
+    answered with the whole file. ValueError when no byte of the range is in the file
+    """
+    m = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if m is None or m.group(1) == m.group(2) == "":
+        return None
+    if m.group(1) == "":
+        suffix = int(m.group(2))
+        if suffix == 0:
+            raise ValueError(header)
+        return max(0, size - suffix), size - 1
+    start = int(m.group(1))
+    end = min(int(m.group(2)), size - 1) if m.group(2) != "" else size - 1
+    if m.group(2) != "" and int(m.group(2)) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+class PreviewRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """serves the precompressed sidecar of a file (e.g. nodes.json.br) when the client accepts its encoding,
+    answers ETag and Last-Modified revalidations with 304, and single byte ranges with 206. keeps connections
+    alive across requests
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def _accepted_encodings(self) -> List[str]:
+        accepted = []
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            encoding, _, params = part.strip().partition(";")
+            if params.replace(" ", "") not in ["q=0", "q=0.0"]:
+                accepted.append(encoding.strip().lower())
+        return accepted
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        # If-None-Match wins over If-Modified-Since. tags compare weakly
+        if "If-None-Match" in self.headers:
+            tags = [tag.strip() for tag in self.headers["If-None-Match"].split(",")]
+            tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+            return "*" in tags or etag in tags
+        try:
+            since = email.utils.parsedate_to_datetime(self.headers.get("If-Modified-Since", ""))
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        return int(mtime) <= since.timestamp()
+
+    def _send_validators(self, path: str, etag: str, mtime: float):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(int(mtime)))
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable" if IMMUTABLE.search(path) else "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and urlsplit(self.path).path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path) or path.endswith("/"):
+            # redirects, listings and 404s
+            return super().send_head()
+
+        # a range is of the file itself, so it is never served from a sidecar
+        rangeHeader = self.headers.get("Range")
+        encoding, served = None, path
+        if rangeHeader is None:
+            accepted = self._accepted_encodings()
+            for enc, ext in SIDECAR_ENCODINGS:
+                if enc in accepted and os.path.isfile(path + ext):
+                    encoding, served = enc, path + ext
+                    break
+        f = open(served, "rb")
+        try:
+            fs = os.fstat(f.fileno())
+            etag = f'"{fs.st_size:x}-{fs.st_mtime_ns:x}{"-" + encoding if encoding else ""}"'
+            if self._not_modified(etag, fs.st_mtime):
+                f.close()
+                self.send_response(304)
+                self._send_validators(path, etag, fs.st_mtime)
+                self.end_headers()
+                return None
+
+            byteRange = None
+            ifRange = self.headers.get("If-Range")
+            if rangeHeader is not None and ifRange in [None, etag, self.date_time_string(int(fs.st_mtime))]:
+                try:
+                    byteRange = _byte_range(rangeHeader, fs.st_size)
+                except ValueError:
+                    f.close()
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{fs.st_size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return None
+
+            self.send_response(200 if byteRange is None else 206)
+            self.send_header("Content-Type", self.guess_type(path))
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Accept-Ranges", "bytes")
+            self._send_validators(path, etag, fs.st_mtime)
+            if byteRange is None:
+                self.send_header("Content-Length", str(fs.st_size))
+                self.end_headers()
+                return f
+            start, end = byteRange
+            self.send_header("Content-Range", f"bytes {start}-{end}/{fs.st_size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            return _Slice(f, start, end - start + 1)
+        except Exception:
+            f.close()
+            raise
+
+
+def make_server(directory: str = ".", port: int = 8000, host: str = "") -> http.server.ThreadingHTTPServer:
+    "a server of directory, a thread per connection so a slow request does not hold up the others"
+    return http.server.ThreadingHTTPServer((host, port), partial(PreviewRequestHandler, directory=directory))
+
+
+def serve(directory: str = ".", port: int = 8000, openBrowser: bool = False):
+    """serves directory at http://localhost:port until interrupted
+
+    Args:
+        directory (str, optional): the map folder (index.html and 'data' folder). Defaults to ".".
+        port (int, optional): Defaults to 8000.
+        openBrowser (bool, optional): open the map in a new browser tab. Defaults to False.
+    """
+    with make_server(directory, port) as httpd:
+        print(f"serving {directory} at port {port}. go to http://localhost:{port} \nCTL_C to quit\n")
+        if openBrowser:
+            webbrowser.open_new_tab(f"http://localhost:{port}")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    serve(sys.argv[2] if len(sys.argv) > 2 else ".", int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
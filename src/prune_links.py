@@ -0,0 +1,182 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from ingest import BOOL_STRINGS
+
+# from src.ingest import BOOL_STRINGS
+
+# the links column merged duplicates keep the largest value of. see link.yaml
+WEIGHT_COL = "weight"
+# sparsify_links options, the keys of create_map's sparsify, applied after dedupeLinks:
+# "topk": k, keeps the k heaviest links of each node. "quantile": q, keeps the links at least as heavy as
+# this quantile. "minWeight": w, keeps the links at least this heavy. "backbone": True, keeps a maximum
+# spanning forest as well (needs scipy). e.g. {"topk": 5, "backbone": True}
+SPARSIFY_OPTIONS = ["topk", "quantile", "minWeight", "backbone"]
+# attr set on every link by markReciprocal: true for a directed link that stands for a pair A->B, B->A
+RECIPROCAL_COL = "isReciprocal"
+
+
+def _endpoints(df_links: pd.DataFrame, attr_map: Dict[str, str]) -> Tuple[np.ndarray, np.ndarray]:
+    ends = []
+    for key in ["source", "target"]:
+        col = df_links[attr_map[key]]
+        if col.isna().any():
+            raise ValueError(f"links column '{attr_map[key]}' has missing values")
+        ends.append(col.to_numpy(dtype=np.int64))
+    return ends[0], ends[1]
+
+
+def _directed(df_links: pd.DataFrame, attr_map: Dict[str, str]) -> np.ndarray:
+    # links without an isDirectional column are undirected, as build_network writes them
+    col = attr_map.get("isDirectional", "")
+    if col not in df_links.columns:
+        return np.zeros(len(df_links), dtype=bool)
+    vals = df_links[col]
+    if not pd.api.types.is_bool_dtype(vals.dtype):
+        vals = vals.astype(object).replace(BOOL_STRINGS)
+    return vals.fillna(False).astype(bool).to_numpy()
+
+
+def _merge(df_links: pd.DataFrame, keys: pd.DataFrame) -> pd.DataFrame:
+    # one row per key: the first one, with the largest weight of the rows it stands for
+    first = ~keys.duplicated(keep="first").to_numpy()
+    if WEIGHT_COL in df_links.columns and pd.api.types.is_numeric_dtype(df_links[WEIGHT_COL].dtype):
+        weights = df_links[WEIGHT_COL].groupby([keys[col].to_numpy() for col in keys.columns], sort=False)
+        df_links = df_links.assign(**{WEIGHT_COL: weights.transform("max")})
+    return df_links[first]
+
+
+def dedupe_links(
+    df_links: pd.DataFrame, attr_map: Dict[str, str], markReciprocal: bool = False
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """drops the links that repeat another one. undirected links are matched either way round (A-B is B-A),
+    directed links only the same way round. the first link of each group is kept, with the largest weight
+    of the group. with markReciprocal, a directed pair A->B, B->A is kept as its first link, flagged in
+    the isReciprocal attr. the rows keep their index, so the kept links keep their ids.
+
+    Args:
+        df_links (pd.DataFrame): the links sheet
+        attr_map (Dict[str, str]): map of {required params: column-names} for the links
+        markReciprocal (bool, optional): collapse reciprocal directed pairs into one flagged link. Defaults to False.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, int]]: the kept links, and the number of links dropped as
+            {"duplicate": n, "reciprocal": n}
+    """
+    sources, targets = _endpoints(df_links, attr_map)
+    directed = _directed(df_links, attr_map)
+
+    # canonical ends: undirected links as (smaller id, larger id)
+    lo = np.where(directed, sources, np.minimum(sources, targets))
+    hi = np.where(directed, targets, np.maximum(sources, targets))
+    kept = _merge(df_links, pd.DataFrame({"lo": lo, "hi": hi, "directed": directed}))
+    dropped = {"duplicate": len(df_links) - len(kept), "reciprocal": 0}
+    if not markReciprocal:
+        return kept, dropped
+
+    # the directed links left are distinct, so a pair shows up as two links with the same canonical ends
+    sources, targets = _endpoints(kept, attr_map)
+    directed = _directed(kept, attr_map)
+    pairKeys = pd.DataFrame(
+        {
+            "lo": np.minimum(sources, targets),
+            "hi": np.maximum(sources, targets),
+            # undirected links and self loops are never part of a pair
+            "single": np.where(directed & (sources != targets), -1, np.arange(len(kept))),
+        }
+    )
+    reciprocal = pairKeys.duplicated(keep=False).to_numpy()
+    kept = _merge(kept.assign(**{RECIPROCAL_COL: reciprocal}), pairKeys)
+    dropped["reciprocal"] = int(reciprocal.sum()) // 2
+    return kept, dropped
+
+
+def _weights(df_links: pd.DataFrame) -> np.ndarray:
+    # missing weights rank below every other link
+    if WEIGHT_COL not in df_links.columns:
+        raise ValueError(f"links have no '{WEIGHT_COL}' column to sparsify by")
+    weights = pd.to_numeric(df_links[WEIGHT_COL], errors="coerce").to_numpy(dtype=np.float64)
+    return np.where(np.isnan(weights), -np.inf, weights)
+
+
+def _topk(sources: np.ndarray, targets: np.ndarray, weights: np.ndarray, k: int) -> np.ndarray:
+    # each link is listed under both of its nodes. a stable sort by node, then by weight (heaviest
+    # first), ranks the links of every node. ties keep the sheet order
+    n = len(sources)
+    nodes = np.concatenate([sources, targets])
+    order = np.lexsort((-np.concatenate([weights, weights]), nodes))
+    sortedNodes = nodes[order]
+    starts = np.flatnonzero(np.r_[True, sortedNodes[1:] != sortedNodes[:-1]])
+    ranks = np.arange(2 * n) - np.repeat(starts, np.diff(np.r_[starts, 2 * n]))
+    keep = np.zeros(n, dtype=bool)
+    keep[order[ranks < k] % n] = True
+    return keep
+
+
+def _backbone(sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    # a maximum spanning forest: the heaviest links that keep every connected set of nodes connected.
+    # the sparse graph gets each link's rank by weight as its cost, so the costs are positive and
+    # unique, and the minimum spanning tree of the costs is a maximum one of the weights
+    try:
+        # optional. imported here, so builds without a backbone do not load it
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import minimum_spanning_tree
+    except ImportError:
+        raise ImportError("the backbone needs scipy. pip install scipy") from None
+    n = len(sources)
+    nodes, ends = np.unique(np.concatenate([sources, targets]), return_inverse=True)
+    rows, cols = np.minimum(ends[:n], ends[n:]), np.maximum(ends[:n], ends[n:])
+    byWeight = np.lexsort((np.arange(n), -weights))
+    cost = np.empty(n, dtype=np.float64)
+    cost[byWeight] = np.arange(1, n + 1)
+    # one entry per pair of nodes (the sparse matrix would add up repeats), the heaviest. no self loops
+    pairs = pd.DataFrame({"row": rows, "col": cols, "cost": cost})[rows != cols]
+    pairs = pairs.loc[pairs.groupby(["row", "col"], sort=False)["cost"].idxmin()]
+    graph = coo_matrix((pairs["cost"], (pairs["row"], pairs["col"])), shape=(len(nodes), len(nodes))).tocsr()
+    tree = minimum_spanning_tree(graph).tocoo()
+    keep = np.zeros(n, dtype=bool)
+    keep[byWeight[np.rint(tree.data).astype(np.int64) - 1]] = True
+    return keep
+
+
+def sparsify_links(
+    df_links: pd.DataFrame,
+    attr_map: Dict[str, str],
+    topk: Optional[int] = None,
+    quantile: Optional[float] = None,
+    minWeight: Optional[float] = None,
+    backbone: bool = False,
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """thins out a dense links sheet by weight. each filter given drops the links it does not keep, and the
+    backbone puts back the heaviest links that keep every connected set of nodes connected. links count
+    for the nodes at both ends, whatever their direction. the rows keep their index, so their ids.
+
+    Args:
+        df_links (pd.DataFrame): the links sheet
+        attr_map (Dict[str, str]): map of {required params: column-names} for the links
+        topk (Optional[int], optional): keep the links among the k heaviest of either of their nodes. Defaults to None.
+        quantile (Optional[float], optional): keep the links at least as heavy as this quantile of the weights,
+            e.g. 0.9 keeps the heaviest tenth. Defaults to None.
+        minWeight (Optional[float], optional): keep the links at least this heavy. Defaults to None.
+        backbone (bool, optional): keep a maximum spanning forest as well. needs scipy. Defaults to False.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, int]]: the kept links, and {"dropped": n, "backbone": n kept only by the backbone}
+    """
+    sources, targets = _endpoints(df_links, attr_map)
+    weights = _weights(df_links)
+    keep = np.ones(len(df_links), dtype=bool)
+    if topk is not None:
+        keep &= _topk(sources, targets, weights, topk)
+    if quantile is not None:
+        weighted = weights[np.isfinite(weights)]
+        keep &= weights >= (np.quantile(weighted, quantile) if len(weighted) > 0 else np.inf)
+    if minWeight is not None:
+        keep &= weights >= minWeight
+    restored = 0
+    if backbone:
+        tree = _backbone(sources, targets, weights)
+        restored = int((tree & ~keep).sum())
+        keep |= tree
+    return df_links[keep], {"dropped": int((~keep).sum()), "backbone": restored}
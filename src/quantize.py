@@ -0,0 +1,112 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from json_writer import encoded_size
+from utils import CHUNKSIZE, frame_chunks
+
+#from src.json_writer import encoded_size
+#from src.utils import CHUNKSIZE, frame_chunks
+
+# "auto" precision: steps finer than a pixel of a map this many pixels across, zoomed in this much
+SCREEN_PX = 4096
+ZOOM_RANGE = 16
+
+
+def auto_decimals(lo: float, hi: float) -> int:
+    "decimal places that keep values spanning lo to hi finer than a pixel at the deepest zoom"
+    step = (hi - lo) / (SCREEN_PX * ZOOM_RANGE)
+    if not step > 0:
+        return 0
+    return max(0, math.ceil(-math.log10(step)))
+
+
+def _floats(col: pd.Series) -> Optional[np.ndarray]:
+    # the values of a float column, None for any other
+    if not pd.api.types.is_float_dtype(col.dtype):
+        return None
+    return col.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def round_columns(df: pd.DataFrame, decimals: Dict[str, int]) -> pd.DataFrame:
+    """rounds the float columns of df named in decimals, vectorized. other columns are left alone. the rounded
+    values are the doubles nearest their decimals, so they are written with at most that many decimal places
+    """
+    rounded = {}
+    for key, places in decimals.items():
+        vals = _floats(df[key]) if key in df.columns else None
+        if vals is not None:
+            rounded[key] = np.round(vals, places)
+    return df.assign(**rounded) if len(rounded) > 0 else df
+
+
+def column_decimals(
+    sheet: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    columns: List[str],
+    precision: Dict[str, Any],
+    chunksize: int = CHUNKSIZE,
+) -> Dict[str, int]:
+    """the decimal places to round each float column of the sheet to. "auto" is taken from the column's range,
+    see auto_decimals. None, and columns that are not floats, are left out
+
+    Args:
+        sheet (Union[pd.DataFrame, Iterable[pd.DataFrame]]): the datapoints or links, whole or in chunks
+        columns (List[str]): the columns of the sheet
+        precision (Dict[str, Any]): {column: decimal places, "auto" or None}
+        chunksize (int, optional): rows per pass when sheet is a DataFrame. Defaults to CHUNKSIZE.
+
+    Returns:
+        Dict[str, int]: {column: decimal places}
+    """
+    wanted = {key: val for key, val in precision.items() if key in columns and val is not None}
+    for key, val in wanted.items():
+        if val != "auto" and not (isinstance(val, (int, np.integer)) and not isinstance(val, bool) and val >= 0):
+            raise ValueError(f"precision of '{key}' is {val!r}. use decimal places, 'auto' or None")
+    auto = [key for key, val in wanted.items() if val == "auto"]
+    lo, hi, floats = {key: np.inf for key in auto}, {key: -np.inf for key in auto}, set()
+    for df_chunk in frame_chunks(sheet, chunksize):
+        for key in wanted:
+            vals = _floats(df_chunk[key])
+            if vals is None:
+                continue
+            floats.add(key)
+            vals = vals[np.isfinite(vals)]
+            if key in auto and len(vals) > 0:
+                lo[key], hi[key] = min(lo[key], vals.min()), max(hi[key], vals.max())
+        if len(floats) == len(wanted) and len(auto) == 0:
+            break
+    return {
+        key: (auto_decimals(lo[key], hi[key]) if key in auto else val)
+        for key, val in wanted.items()
+        if key in floats
+    }
+
+
+def rounding_savings(
+    sheet: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    decimals: Dict[str, int],
+    writes: Dict[str, int],
+    jsonFormat: Dict[str, Any],
+    chunksize: int = CHUNKSIZE,
+) -> Tuple[int, Dict[str, int]]:
+    """the bytes rounding takes off the data files: each column's values encoded before and after, times the
+    times the data files write the column
+
+    Args:
+        sheet (Union[pd.DataFrame, Iterable[pd.DataFrame]]): the datapoints or links before rounding, whole or in chunks
+        decimals (Dict[str, int]): from column_decimals
+        writes (Dict[str, int]): how many times the data files write each column
+        jsonFormat (Dict[str, Any]): json_writer.dump formatting args
+        chunksize (int, optional): rows per pass when sheet is a DataFrame. Defaults to CHUNKSIZE.
+
+    Returns:
+        Tuple[int, Dict[str, int]]: the bytes saved, in all and per column
+    """
+    saved = {key: 0 for key in decimals}
+    for df_chunk in frame_chunks(sheet, chunksize):
+        for key, places in decimals.items():
+            vals = _floats(df_chunk[key])
+            before = encoded_size(vals.tolist(), **jsonFormat)
+            after = encoded_size(np.round(vals, places).tolist(), **jsonFormat)
+            saved[key] += (before - after) * writes.get(key, 1)
+    return sum(saved.values()), saved
@@ -1,36 +1,127 @@
-from typing import Any, List, Dict
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Dict, Union
+import numpy as np
+import pandas as pd
 import yaml
-import copy
+
+# rows built per chunk by the streaming builders
+CHUNKSIZE = 10000
+
+
+class FrozenDict(dict):
+    "read-only dict handed out by template_view. copy.deepcopy or load_templates give a mutable copy"
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("templates are shared and read-only. use load_templates() for a mutable copy")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo: Dict) -> Dict[str, Any]:
+        return thaw(self)
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(val: Any) -> Any:
+    "read-only copy of a parsed template: dicts become FrozenDicts and lists tuples"
+    if isinstance(val, dict):
+        return FrozenDict((k, freeze(v)) for k, v in val.items())
+    if isinstance(val, (list, tuple)):
+        return tuple(freeze(v) for v in val)
+    return val
+
+
+def thaw(val: Any) -> Any:
+    "mutable copy of a frozen template"
+    if isinstance(val, dict):
+        return {k: thaw(v) for k, v in val.items()}
+    if isinstance(val, tuple):
+        return [thaw(v) for v in val]
+    return val
+
+
+# the templates ship with the package, wherever it is run from
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+# parsed once per process. libyaml's loader when it is installed
+_YAML_LOADER = getattr(yaml, "CFullLoader", yaml.FullLoader)
+_templates: Dict[str, FrozenDict] = {}
+
+
+def template_view(fname: str) -> FrozenDict:
+    """the parsed template, shared and read-only. parsed on first use, then served from the registry
+
+    Args:
+        fname (str): template name in src/templates, e.g. "link"
+
+    Returns:
+        FrozenDict: read-only template. nested lists are tuples
+    """
+    if fname not in _templates:
+        with open(TEMPLATES_DIR / f"{fname}.yaml") as f:
+            templates: List[Dict] = list(yaml.load_all(f, Loader=_YAML_LOADER))
+        _templates[fname] = freeze(templates[0])
+    return _templates[fname]
+
+
+# the templates the map builders use
+BUILD_TEMPLATES = ["dataset", "datapoint", "datapointAttribs", "network", "node", "nodeAttribs", "link", "linkAttribs", "settings", "snapshot"]
+
+
+def preload_templates(fnames: List[str] = BUILD_TEMPLATES):
+    "parses the templates into the registry, e.g. before forking worker processes that share it"
+    for fname in fnames:
+        template_view(fname)
 
 
 def load_templates(fname: str) -> Dict[str, Any]:
-    try:
-        templates: List[Dict] = []
-        with open(f"src/templates/{fname}.yaml") as f:
-            for project in yaml.load_all(f, Loader=yaml.FullLoader):
-                templates.append(project)
-        return templates[0]
-    except FileNotFoundError as err:
-        # no templates found.
-        raise err
+    "a mutable copy of the template, for callers that modify it. read-only callers use template_view"
+    return thaw(template_view(fname))
 
 
 def merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
-    "merges b into a"
-    for key in b:
-        if key in a:
-            if isinstance(a[key], dict) and isinstance(b[key], dict):
-                merge(a[key], b[key])
-            elif a[key] == b[key]:
-                pass  # same leaf value
-            else:
-                a[key] = b[key]
+    """merges b into a, without modifying either. only the dicts along the keys b changes are
+    copied, untouched subtrees of a and the values taken from b are shared with the result.
+    a leaf of a is kept while b's value compares equal to it (e.g. a template's 1 stays 1 for 1.0)
+
+    Args:
+        a (Dict[str, Any]): base, e.g. a template
+        b (Dict[str, Any]): values to merge in
+
+    Returns:
+        Dict[str, Any]: the merged dict
+    """
+    merged = dict(a)
+    for key, val in b.items():
+        if key not in merged:
+            merged[key] = val
+        elif isinstance(merged[key], dict) and isinstance(val, dict):
+            merged[key] = merge(merged[key], val)
+        elif merged[key] == val:
+            pass  # same leaf value
         else:
-            if isinstance(b[key], dict):
-                a[key] = dict(b[key])  # copy
-            else:
-                a[key] = b[key]
-    return copy.deepcopy(a)
+            merged[key] = val
+    return merged
+
+
+def row_dtype(df: pd.DataFrame) -> np.dtype:
+    """the dtype iterrows() hands each row out in: object when any column holds strings,
+    float64 when ints and floats mix. builders that work column-wise cast each column to
+    this dtype so the emitted values stay identical to the row-wise builders.
+    """
+    return df.iloc[:0].to_numpy().dtype
+
+
+def frame_chunks(sheet: Union[pd.DataFrame, Iterable[pd.DataFrame]], chunksize: int = CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    "a DataFrame split into chunksize row slices, or the frames of a sheet that is already read in chunks"
+    if isinstance(sheet, pd.DataFrame):
+        return (sheet.iloc[start : start + chunksize] for start in range(0, len(sheet), chunksize))
+    return iter(sheet)
 
 
 if __name__ == "__main__":
@@ -38,4 +129,4 @@ if __name__ == "__main__":
         {"a": 0, "b": 1, "c": {"c1": 1, "c2": 2, "c4": {"d": 0, "e": 1}}},
         {"a": 1, "c": {"c2": 22, "c3": 33, "c4": {"d": 6}}},
     )
-    print(x)
\ No newline at end of file
+    print(x)
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+# the modules import each other by name, as the build scripts run them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+NODE_ATTR_MAP = {"OriginalLabel": "label", "OriginalX": "x", "OriginalY": "y"}
+LINK_ATTR_MAP = {"source": "Source", "target": "Target", "isDirectional": "isDirectional"}
+
+
+@pytest.fixture
+def map_inputs(tmp_path):
+    "a small map's nodes.csv, links.csv and node_attrs.csv, as create_map args"
+    n = 60
+    rng = np.random.default_rng(0)
+    weight = rng.random(4 * n).round(3)
+    weight[::25] = 1.0
+    pd.DataFrame(
+        {
+            "id": range(n),
+            "label": [f"node {i}" for i in range(n)],
+            "x": rng.normal(size=n),
+            "y": rng.normal(size=n),
+            "theme": rng.choice(["arts", "science", "society"], n),
+            "tags": ["|".join(rng.choice(["a", "b", "c", "d"], 2, replace=False)) for _ in range(n)],
+            "score": rng.integers(0, 100, n),
+        }
+    ).to_csv(tmp_path / "nodes.csv", index=False)
+    pd.DataFrame(
+        {
+            "Source": rng.integers(0, n, 4 * n),
+            "Target": rng.integers(0, n, 4 * n),
+            "weight": weight,
+            "isDirectional": rng.random(4 * n) < 0.5,
+        }
+    ).to_csv(tmp_path / "links.csv", index=False)
+    (tmp_path / "node_attrs.csv").write_text(
+        "id,title,attrType\nid,,string\nlabel,,string\nx,,float\ny,,float\ntheme,,string\ntags,,liststring\nscore,,integer\n"
+    )
+    return {
+        "datapointsPath": tmp_path / "nodes.csv",
+        "linksPath": tmp_path / "links.csv",
+        "datapointAttrPath": tmp_path / "node_attrs.csv",
+        "node_attr_map": NODE_ATTR_MAP,
+        "link_attr_map": LINK_ATTR_MAP,
+        "outFolder": tmp_path / "out",
+    }
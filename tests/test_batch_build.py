@@ -0,0 +1,19 @@
+import os
+
+import batch_build
+
+
+def fake_build(project):
+    # a worker killed mid build, as by the oom killer
+    if project["name"] == "dies":
+        os._exit(1)
+    return {"name": project["name"], "ok": True, "seconds": 0.0, "error": None}
+
+
+def test_dead_worker_is_reported(monkeypatch):
+    # forked workers see the patched build_project
+    monkeypatch.setattr(batch_build, "build_project", fake_build)
+    results = batch_build.build_batch([{"name": "first"}, {"name": "dies"}], workers=1)
+    assert [result["name"] for result in results] == ["first", "dies"]
+    assert results[0]["ok"]
+    assert not results[1]["ok"] and "BrokenProcessPool" in results[1]["error"]
@@ -0,0 +1,48 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from map_utils import create_map
+
+# columns whose dtype depends on rows far apart: gaps only near the end, booleans with a gap,
+# numbers declared as strings with one text value, a column empty in most chunks
+AWKWARD_TYPES = {"late_gap": "integer", "flag": "string", "code": "string", "sparse": "float", "exact": "float"}
+
+
+def add_awkward_columns(map_inputs):
+    df = pd.read_csv(map_inputs["datapointsPath"])
+    n = len(df)
+    rng = np.random.default_rng(1)
+    late_gap = rng.integers(0, 100, n).astype(float)
+    late_gap[-1] = np.nan
+    flag = rng.choice(["True", "False"], n).astype(object)
+    flag[n // 2] = np.nan
+    code = rng.integers(0, 50, n).astype(str).astype(object)
+    code[-2] = "n/a"
+    sparse = np.full(n, np.nan)
+    sparse[n // 3] = 0.1
+    df = df.assign(late_gap=late_gap, flag=flag, code=code, sparse=sparse, exact=rng.integers(0, 8, n) / 4)
+    df.to_csv(map_inputs["datapointsPath"], index=False)
+    with open(map_inputs["datapointAttrPath"], "a") as f:
+        f.write("".join(f"{key},,{attrType}\n" for key, attrType in AWKWARD_TYPES.items()))
+
+
+def build(map_inputs, outFolder, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(**{**map_inputs, "outFolder": outFolder}, incremental=False, **kwargs)
+    return {fname: (outFolder / "data" / fname).read_bytes() for fname in ["nodes.json", "links.json"]}
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 1000])
+def test_chunked_build_matches_whole_build(map_inputs, tmp_path, chunksize):
+    add_awkward_columns(map_inputs)
+    whole = build(map_inputs, tmp_path / "whole")
+    assert build(map_inputs, tmp_path / "chunked", chunksize=chunksize) == whole
+
+
+def test_chunked_build_matches_whole_build_minified(map_inputs, tmp_path):
+    whole = build(map_inputs, tmp_path / "whole", minify=True)
+    assert build(map_inputs, tmp_path / "chunked", chunksize=25, minify=True) == whole
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import shutil
+
+import pandas as pd
+
+import build_manifest
+from map_utils import create_map
+
+DATA_FILES = ["nodes.json", "links.json", "settings.json"]
+
+
+def build(map_inputs, **kwargs):
+    "the data files create_map skipped"
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        create_map(**map_inputs, incremental=True, **kwargs)
+    return [fname for fname in DATA_FILES if f"{fname} is up to date" in out.getvalue()]
+
+
+def mtimes(map_inputs):
+    return {fname: (map_inputs["outFolder"] / "data" / fname).stat().st_mtime_ns for fname in DATA_FILES}
+
+
+def test_unchanged_inputs_skip_rebuild(map_inputs):
+    assert build(map_inputs) == []
+    before = mtimes(map_inputs)
+    assert build(map_inputs) == DATA_FILES
+    assert mtimes(map_inputs) == before
+
+
+def test_changed_csv_rebuilds(map_inputs):
+    build(map_inputs)
+    df_links = pd.read_csv(map_inputs["linksPath"])
+    df_links.loc[0, "weight"] = 0.5
+    df_links.to_csv(map_inputs["linksPath"], index=False)
+    assert build(map_inputs) == ["nodes.json", "settings.json"]
+
+    # links.json has the nodes too
+    df_datapoints = pd.read_csv(map_inputs["datapointsPath"])
+    df_datapoints.loc[0, "label"] = "renamed"
+    df_datapoints.to_csv(map_inputs["datapointsPath"], index=False)
+    assert build(map_inputs) == ["settings.json"]
+
+
+def test_changed_params_rebuild(map_inputs):
+    build(map_inputs)
+    assert build(map_inputs, playerSettings={"headerTitle": "x"}) == ["nodes.json", "links.json"]
+    assert build(map_inputs, playerSettings={"headerTitle": "x"}, minify=True) == []
+
+
+def test_changed_template_rebuilds(map_inputs, tmp_path, monkeypatch):
+    # a copy of the builder code and templates, to edit one
+    src = tmp_path / "src"
+    shutil.copytree(build_manifest.SRC_DIR, src, ignore=shutil.ignore_patterns("__pycache__", "*.html"))
+    monkeypatch.setattr(build_manifest, "SRC_DIR", src)
+    build(map_inputs)
+    assert build(map_inputs) == DATA_FILES
+    with open(src / "templates" / "link.yaml", "a") as f:
+        f.write("\n# edited\n")
+    assert build(map_inputs) == []
+
+
+def test_full_build_leaves_no_manifest(map_inputs):
+    build(map_inputs)
+    manifest = map_inputs["outFolder"] / build_manifest.MANIFEST_NAME
+    assert manifest.exists()
+    # a full build with other params drops it, so the next incremental build does not trust the files
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(**map_inputs, minify=True)
+    assert not manifest.exists()
+    assert build(map_inputs) == []
@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from build_dataset import build_datapoints
+from ingest import read_datapointAttrs, read_datapoints
+
+ATTR_TYPES = {"id": "string", "year": "year", "gap_year": "year", "votes": "integer", "score": "float", "theme": "string"}
+
+
+def write_sheets(tmp_path):
+    pd.DataFrame(
+        {
+            "id": range(6),
+            "year": [1999, 2001, 2001, 1987, 2020, 1999],
+            "gap_year": [1999, np.nan, 2001, 1987, 2020, 1999],
+            "votes": [0, 40000, 3, 3, 12, 7],
+            "score": [0.5, 0.25, 1.5, 2.0, 0.125, 3.0],
+            "theme": ["a", "b", "a", "a", "b", "a"],
+        }
+    ).to_csv(tmp_path / "nodes.csv", index=False)
+    (tmp_path / "node_attrs.csv").write_text(
+        "id,title,attrType\n" + "".join(f"{key},,{attrType}\n" for key, attrType in ATTR_TYPES.items())
+    )
+    return read_datapointAttrs(tmp_path / "node_attrs.csv")
+
+
+def test_compact_dtypes(tmp_path):
+    df = read_datapoints(tmp_path / "nodes.csv", write_sheets(tmp_path))
+    assert df["year"].dtype == np.int16 and df["votes"].dtype == np.int32
+    # a column with gaps stays as read
+    assert df["gap_year"].dtype == np.float64
+    assert df["score"].dtype == np.float32
+    assert isinstance(df["theme"].dtype, pd.CategoricalDtype)
+
+
+def test_compact_dtypes_write_the_same_values(tmp_path):
+    df_attrs = write_sheets(tmp_path)
+    compact = build_datapoints(read_datapoints(tmp_path / "nodes.csv", df_attrs), ATTR_TYPES)
+    inferred = build_datapoints(pd.read_csv(tmp_path / "nodes.csv"), ATTR_TYPES)
+    assert json.dumps(compact) == json.dumps(inferred)
+    # whole numbers with gaps are written as the floats they are read as
+    assert compact[0]["attr"]["gap_year"] == 1999.0 and isinstance(compact[0]["attr"]["gap_year"], float)
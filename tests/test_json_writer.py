@@ -0,0 +1,80 @@
+import contextlib
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import json_writer
+from build_dataset import build_attrDescriptors, build_datapoints
+from build_network import build_linkAttrDescriptors, build_links, build_nodeAttrDescriptors, build_nodes
+from ingest import read_datapointAttrs, read_datapoints, read_links
+from map_utils import create_map
+from utils import load_templates
+
+
+def dumped(data, **kwargs) -> bytes:
+    f = io.BytesIO()
+    json_writer.dump(data, f, **kwargs)
+    return f.getvalue()
+
+
+def document(items):
+    # a document shaped like links.json, with streamed lists nested in it
+    return [{"id": "net", "nodes": items(range(5)), "links": items([]), "attr": {"n": items(["a", 1, 2.5, None, True])}}]
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 1000])
+@pytest.mark.parametrize("fmt", [{"indent": 4}, {"indent": None, "separators": (",", ":")}])
+def test_streamed_lists_match_json_dump(chunksize, fmt):
+    expected = json.dumps(document(list), **fmt).encode()
+    assert dumped(document(iter), chunksize=chunksize, **fmt) == expected
+    assert json_writer.encoded_size(document(iter), chunksize=chunksize, **fmt) == len(expected)
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+@pytest.mark.parametrize("fmt", [{"indent": 4}, {"indent": None, "separators": (",", ":")}])
+def test_nan_and_numpy_values(backend, fmt):
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    data = {
+        "floats": [float("nan"), float("inf"), -float("inf"), 0.5, np.float64(np.nan), np.float32(0.25)],
+        "ints": [np.int8(3), np.int64(2 ** 40), True, pd.NA],
+        "array": np.array([1.5, np.nan]),
+        "text": "NaN Infinity",
+        "nested": ({"x": np.nan},),
+    }
+    out = dumped(data, backend=backend, **fmt)
+    assert json.loads(out) == {
+        "floats": [None, None, None, 0.5, None, 0.25],
+        "ints": [3, 2 ** 40, True, None],
+        "array": [1.5, None],
+        "text": "NaN Infinity",
+        "nested": [{"x": None}],
+    }
+
+
+def test_data_files_match_json_dump(map_inputs):
+    # nodes.json and links.json, streamed, against json.dump of the lists the builders return
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(**map_inputs)
+    df_attrs = read_datapointAttrs(map_inputs["datapointAttrPath"])
+    df_datapoints = read_datapoints(map_inputs["datapointsPath"], df_attrs)
+    df_links = read_links(map_inputs["linksPath"], map_inputs["link_attr_map"])
+    attribs = build_attrDescriptors(df_attrs)
+    dataset = {
+        **load_templates("dataset"),
+        "attrDescriptors": attribs,
+        "datapoints": build_datapoints(df_datapoints, {row["id"]: row["attrType"] for row in attribs}),
+    }
+    network = {
+        **load_templates("network"),
+        "nodes": build_nodes(df_datapoints, map_inputs["node_attr_map"]),
+        "links": build_links(df_links, map_inputs["link_attr_map"]),
+        "nodeAttrDescriptors": build_nodeAttrDescriptors(),
+        "linkAttrDescriptors": build_linkAttrDescriptors(),
+    }
+    data_dir = map_inputs["outFolder"] / "data"
+    assert (data_dir / "nodes.json").read_bytes() == json.dumps(dataset, indent=4).encode()
+    assert (data_dir / "links.json").read_bytes() == json.dumps([network], indent=4).encode()
@@ -0,0 +1,82 @@
+import copy
+import pickle
+import random
+
+import pytest
+
+from utils import FrozenDict, freeze, load_templates, merge, template_view, thaw
+
+
+def reference_merge(a, b):
+    # the previous merge: updates a in place and returns a deep copy of it
+    for key in b:
+        if key in a:
+            if isinstance(a[key], dict) and isinstance(b[key], dict):
+                reference_merge(a[key], b[key])
+            elif a[key] == b[key]:
+                pass  # same leaf value
+            else:
+                a[key] = b[key]
+        else:
+            if isinstance(b[key], dict):
+                a[key] = dict(b[key])  # copy
+            else:
+                a[key] = b[key]
+    return copy.deepcopy(a)
+
+
+def random_tree(rng: random.Random, depth: int):
+    leaves = [0, 1, 1.0, 0.0, "x", "", None, True, [1, 2]]
+    tree = {}
+    for key in rng.sample("abcdef", rng.randint(0, 4)):
+        tree[key] = random_tree(rng, depth - 1) if depth > 0 and rng.random() < 0.4 else rng.choice(leaves)
+    return tree
+
+
+def merge_cases(n: int = 2000):
+    rng = random.Random(0)
+    return [(random_tree(rng, 3), random_tree(rng, 3)) for _ in range(n)]
+
+
+def test_merge_matches_deepcopy_merge():
+    for a, b in merge_cases():
+        merged = merge(a, b)
+        expected = reference_merge(copy.deepcopy(a), copy.deepcopy(b))
+        # == does not tell 1 from 1.0, compare the reprs too
+        assert merged == expected and repr(merged) == repr(expected), (a, b)
+
+
+def test_merge_leaves_inputs_alone():
+    for a, b in merge_cases():
+        a_before, b_before = copy.deepcopy(a), copy.deepcopy(b)
+        merge(a, b)
+        assert repr(a) == repr(a_before) and repr(b) == repr(b_before), (a, b)
+
+
+def test_merge_into_template_view():
+    tpl = template_view("node")
+    node = merge(tpl, {"id": "7", "attr": {"OriginalX": 0.5}})
+    assert node["attr"]["OriginalX"] == 0.5
+    assert tpl["attr"]["OriginalX"] == load_templates("node")["attr"]["OriginalX"]
+
+
+def test_frozen_templates_round_trip():
+    for fname in ["node", "link", "settings"]:
+        tpl = load_templates(fname)
+        view = freeze(tpl)
+        assert isinstance(view, FrozenDict)
+        assert thaw(view) == tpl and repr(thaw(view)) == repr(tpl)
+        assert copy.deepcopy(view) == tpl and type(copy.deepcopy(view)) is dict
+        assert pickle.loads(pickle.dumps(view)) == view
+
+
+def test_frozen_templates_are_read_only():
+    view = template_view("settings")
+    with pytest.raises(TypeError):
+        view["player"] = {}
+    with pytest.raises(TypeError):
+        view.update({})
+    # mutable copies do not reach the shared view
+    tpl = load_templates("settings")
+    tpl["player"] = {}
+    assert template_view("settings")["player"] != {}
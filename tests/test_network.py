@@ -0,0 +1,99 @@
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from build_network import build_links, build_nodes, iter_links, iter_nodes
+from utils import load_templates, merge
+
+NODE_ATTR_MAP = {"OriginalLabel": "label", "OriginalX": "x", "OriginalY": "y"}
+LINK_ATTR_MAP = {"source": "Source", "target": "Target", "isDirectional": "isDirectional"}
+
+
+def merge_nodes(df_datapoints: pd.DataFrame, attr_map: Dict[str, str]) -> List[Dict[str, Any]]:
+    # the row-wise builder: a merge into the node template per datapoint
+    nodeTpl = load_templates("node")
+    nodes = []
+    for _, dp in df_datapoints.iterrows():
+        attr = {
+            "OriginalLabel": dp.get(attr_map.get("OriginalLabel", ""), "Node"),
+            "OriginalX": dp.get(attr_map.get("OriginalX", ""), 0),
+            "OriginalY": dp.get(attr_map.get("OriginalY", ""), 0),
+        }
+        nodes.append(merge(nodeTpl, {"dataPointId": f'{dp["id"]}', "id": f'{dp["id"]}', "attr": attr}))
+    return nodes
+
+
+def merge_links(df_links: pd.DataFrame, attr_map: Dict[str, str]) -> List[Dict[str, Any]]:
+    # the row-wise builder: two merges into the link template per link
+    linkTpl = load_templates("link")
+    links = []
+    for idx, row in df_links.iterrows():
+        edgeAttrs = dict(row)
+        link = merge(
+            linkTpl,
+            {
+                "id": f"{idx}",
+                "source": f"{int(edgeAttrs[attr_map['source']])}",
+                "target": f"{int(edgeAttrs[attr_map['target']])}",
+                "isDirectional": edgeAttrs.get(attr_map.get("isDirectional", ""), False),
+                "attr": {"OriginalLabel": f"{idx}"},
+            },
+        )
+        otherAttrs = {at: val for at, val in edgeAttrs.items() if at.lower() not in ["id", "source", "target", "isdirectional"]}
+        links.append(merge(link, {"attr": otherAttrs}))
+    return links
+
+
+def datapoints(n: int = 50) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    x, y = rng.random(n), rng.random(n)
+    # values equal to the template's 0, first and further down the sheet
+    x[[0, 1, 20]] = 0.0
+    y[[5, 30]] = 0.0
+    return pd.DataFrame({"id": range(n), "label": [f"node {i}" for i in range(n)], "x": x, "y": y})
+
+
+def links(n: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    weight = rng.random(n)
+    # weights equal to the template's 1, first and further down the sheet
+    weight[[0, 1, 2, 50, 150]] = 1.0
+    return pd.DataFrame(
+        {
+            "Source": rng.integers(0, 50, n),
+            "Target": rng.integers(0, 50, n),
+            "weight": weight,
+            "sign": rng.choice(["positive", "negative"], n),
+            "votes": rng.integers(0, 10, n),
+            "isDirectional": rng.random(n) < 0.5,
+        }
+    )
+
+
+def encoded(records) -> str:
+    return json.dumps(records, indent=4)
+
+
+def test_nodes_match_merge_builder():
+    df = datapoints()
+    assert encoded(build_nodes(df, NODE_ATTR_MAP)) == encoded(merge_nodes(df, NODE_ATTR_MAP))
+    # unmapped attrs get their defaults
+    assert encoded(build_nodes(df, {})) == encoded(merge_nodes(df, {}))
+
+
+def test_links_match_merge_builder():
+    df = links()
+    assert encoded(build_links(df, LINK_ATTR_MAP)) == encoded(merge_links(df, LINK_ATTR_MAP))
+    # a numeric sheet, where iterrows hands out every value as a float
+    df_numeric = df[["Source", "Target", "weight", "votes"]]
+    assert encoded(build_links(df_numeric, LINK_ATTR_MAP)) == encoded(merge_links(df_numeric, LINK_ATTR_MAP))
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 1000])
+def test_records_do_not_depend_on_chunks(chunksize):
+    df_datapoints, df_links = datapoints(), links()
+    assert list(iter_nodes(df_datapoints, NODE_ATTR_MAP, chunksize)) == build_nodes(df_datapoints, NODE_ATTR_MAP)
+    assert list(iter_links(df_links, LINK_ATTR_MAP, chunksize)) == build_links(df_links, LINK_ATTR_MAP)
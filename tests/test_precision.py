@@ -0,0 +1,70 @@
+import contextlib
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from map_utils import create_map
+
+LINK_ATTR_MAP = {"source": "Source", "target": "Target", "isDirectional": "isDirectional"}
+
+
+def write_inputs(folder, n=20):
+    rng = np.random.default_rng(0)
+    pd.DataFrame(
+        {
+            "id": range(n),
+            "label": [f"node {i}" for i in range(n)],
+            "x_tsne": rng.random(n),
+            "y_tsne": rng.random(n),
+            "x_force": rng.random(n),
+            "y_force": rng.random(n),
+        }
+    ).to_csv(folder / "nodes.csv", index=False)
+    pd.DataFrame({"Source": rng.integers(0, n, 30), "Target": rng.integers(0, n, 30), "isDirectional": False}).to_csv(
+        folder / "links.csv", index=False
+    )
+    (folder / "node_attrs.csv").write_text(
+        "id,title,attrType\nid,,string\nlabel,,string\n" + "".join(f"{col},,float\n" for col in ["x_tsne", "y_tsne", "x_force", "y_force"])
+    )
+
+
+def build(folder, xcol, precision):
+    node_attr_map = {"OriginalLabel": "label", "OriginalX": xcol, "OriginalY": "y_tsne"}
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        create_map(
+            folder / "nodes.csv", folder / "links.csv", folder / "node_attrs.csv", node_attr_map, LINK_ATTR_MAP,
+            outFolder=folder / "out", precision=precision, incremental=True,
+        )
+    with open(folder / "out" / "data" / "nodes.json") as f:
+        datapoints = {dp["id"]: dp["attr"] for dp in json.load(f)["datapoints"]}
+    with open(folder / "out" / "data" / "links.json") as f:
+        nodes = {node["id"]: node["attr"] for node in json.load(f)[0]["nodes"]}
+    return datapoints, nodes, out.getvalue()
+
+
+def decimals(val):
+    return len(repr(val).split(".")[1])
+
+
+def test_nothing_rounded_by_default(tmp_path):
+    write_inputs(tmp_path)
+    datapoints, nodes, _ = build(tmp_path, "x_tsne", {})
+    assert max(decimals(dp["x_tsne"]) for dp in datapoints.values()) > 10
+    assert all(nodes[key]["OriginalX"] == dp["x_tsne"] for key, dp in datapoints.items())
+
+
+def test_incremental_rebuild_follows_node_attr_map(tmp_path):
+    # the coordinates' precision is given by node attr, so moving OriginalX to another column rounds that column
+    write_inputs(tmp_path)
+    precision = {"OriginalX": "auto", "OriginalY": "auto"}
+    datapoints, nodes, _ = build(tmp_path, "x_tsne", precision)
+    assert all(decimals(dp["x_tsne"]) <= 5 for dp in datapoints.values())
+
+    datapoints, nodes, log = build(tmp_path, "x_force", precision)
+    assert "nodes.json is up to date" not in log
+    assert all(decimals(dp["x_force"]) <= 5 for dp in datapoints.values())
+    assert max(decimals(dp["x_tsne"]) for dp in datapoints.values()) > 10
+    assert all(nodes[key]["OriginalX"] == dp["x_force"] for key, dp in datapoints.items())
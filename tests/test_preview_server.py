@@ -0,0 +1,88 @@
+import functools
+import gzip
+import http.client
+import threading
+
+import pytest
+
+from preview_server import PreviewRequestHandler, make_server
+
+BODY = bytes(range(256)) * 40
+
+
+class QuietHandler(PreviewRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "nodes.json").write_bytes(BODY)
+    (tmp_path / "data" / "nodes.json.gz").write_bytes(gzip.compress(BODY))
+    (tmp_path / "data" / "nodes.json.br").write_bytes(b"brotli of nodes.json")
+    httpd = make_server(str(tmp_path), 0, "127.0.0.1")
+    httpd.RequestHandlerClass = functools.partial(QuietHandler, directory=str(tmp_path))
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(server, path, **headers):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+    conn.request("GET", path, headers={key.replace("_", "-"): val for key, val in headers.items()})
+    res = conn.getresponse()
+    body = res.read()
+    conn.close()
+    return res, body
+
+
+def test_revalidation(server):
+    res, body = get(server, "/data/nodes.json")
+    assert res.status == 200 and body == BODY
+    etag = res.getheader("ETag")
+    res, body = get(server, "/data/nodes.json", If_None_Match=etag)
+    assert res.status == 304 and body == b"" and res.getheader("ETag") == etag
+    assert get(server, "/data/nodes.json", If_None_Match=f"W/{etag}")[0].status == 304
+    assert get(server, "/data/nodes.json", If_None_Match='"stale"')[0].status == 200
+    res, _ = get(server, "/data/nodes.json", If_Modified_Since=res.getheader("Last-Modified"))
+    assert res.status == 304
+
+
+def test_byte_ranges(server):
+    res, body = get(server, "/data/nodes.json", Range="bytes=100-199")
+    assert res.status == 206 and body == BODY[100:200]
+    assert res.getheader("Content-Range") == f"bytes 100-199/{len(BODY)}"
+    assert get(server, "/data/nodes.json", Range="bytes=-10")[1] == BODY[-10:]
+    assert get(server, "/data/nodes.json", Range=f"bytes={len(BODY) - 5}-")[1] == BODY[-5:]
+    # a range of the file itself, never of a sidecar
+    res, body = get(server, "/data/nodes.json", Range="bytes=0-9", Accept_Encoding="gzip, br")
+    assert res.getheader("Content-Encoding") is None and body == BODY[:10]
+
+
+def test_unsatisfiable_range(server):
+    res, body = get(server, "/data/nodes.json", Range=f"bytes={len(BODY)}-")
+    assert res.status == 416 and body == b""
+    assert res.getheader("Content-Range") == f"bytes */{len(BODY)}"
+
+
+def test_stale_if_range_gets_whole_file(server):
+    res, body = get(server, "/data/nodes.json", Range="bytes=0-9", If_Range='"stale"')
+    assert res.status == 200 and body == BODY
+
+
+@pytest.mark.parametrize(
+    "accept, encoding",
+    [("", None), ("gzip", "gzip"), ("gzip, br", "br"), ("br;q=0, gzip", "gzip"), ("deflate", None)],
+)
+def test_sidecar_by_accept_encoding(server, accept, encoding):
+    res, body = get(server, "/data/nodes.json", Accept_Encoding=accept)
+    assert res.status == 200 and res.getheader("Content-Encoding") == encoding
+    assert res.getheader("Vary") == "Accept-Encoding"
+    if encoding == "gzip":
+        assert gzip.decompress(body) == BODY
+    elif encoding is None:
+        assert body == BODY
+    # each encoding revalidates against its own tag
+    assert get(server, "/data/nodes.json", Accept_Encoding=accept, If_None_Match=res.getheader("ETag"))[0].status == 304
@@ -0,0 +1,112 @@
+import contextlib
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from map_utils import create_map
+from prune_links import dedupe_links, sparsify_links
+
+ATTR_MAP = {"source": "Source", "target": "Target", "isDirectional": "isDirectional"}
+
+
+def sheet(rows):
+    return pd.DataFrame(rows, columns=["Source", "Target", "weight", "isDirectional"])
+
+
+def test_duplicates_keep_first_link_with_max_weight():
+    df = sheet(
+        [
+            [1, 2, 0.2, False],
+            [2, 1, 0.9, False],  # undirected, either way round
+            [1, 2, 0.5, False],
+            [3, 4, 0.1, True],
+            [3, 4, 0.4, True],  # directed, the same way round
+            [4, 3, 0.8, True],  # directed, the other way round: a link of its own
+        ]
+    )
+    kept, dropped = dedupe_links(df, ATTR_MAP)
+    assert kept.index.tolist() == [0, 3, 5]
+    assert kept["weight"].tolist() == [0.9, 0.4, 0.8]
+    assert dropped == {"duplicate": 3, "reciprocal": 0}
+    # the sheet is left alone
+    assert df["weight"].tolist() == [0.2, 0.9, 0.5, 0.1, 0.4, 0.8]
+
+
+def test_reciprocal_links_are_flagged():
+    df = sheet(
+        [
+            [1, 2, 0.3, True],
+            [5, 5, 0.5, True],  # a self loop is never a pair
+            [2, 1, 0.7, True],
+            [1, 3, 0.2, True],
+            [3, 4, 0.6, False],
+            [4, 3, 0.1, False],
+        ]
+    )
+    kept, dropped = dedupe_links(df, ATTR_MAP, markReciprocal=True)
+    assert kept.index.tolist() == [0, 1, 3, 4]
+    assert kept["isReciprocal"].tolist() == [True, False, False, False]
+    assert kept["weight"].tolist() == [0.7, 0.5, 0.2, 0.6]
+    assert dropped == {"duplicate": 1, "reciprocal": 1}
+
+
+def test_create_map_writes_each_link_once(map_inputs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_map(**map_inputs, markReciprocal=True)
+    with open(map_inputs["outFolder"] / "data" / "links.json") as f:
+        links = json.load(f)[0]["links"]
+    df = pd.read_csv(map_inputs["linksPath"])
+    pairs = [frozenset([link["source"], link["target"]]) for link in links if not link["isDirectional"]]
+    assert len(pairs) == len(set(pairs))
+    assert all("isReciprocal" in link["attr"] for link in links)
+    # the kept links keep their ids, and the largest weight of their repeats
+    for link in links:
+        row = df.loc[int(link["id"])]
+        assert (str(row["Source"]), str(row["Target"])) == (link["source"], link["target"])
+        assert link["attr"]["weight"] >= row["weight"]
+
+
+def weighted():
+    # a connected set of 4 nodes, a repeat of its heaviest link, and a pair of nodes of their own
+    return sheet(
+        [
+            [0, 1, 0.9, False],
+            [0, 2, 0.8, False],
+            [0, 3, 0.1, False],
+            [1, 2, 0.2, False],
+            [2, 3, 0.3, False],
+            [5, 6, 0.05, False],
+            [1, 0, 0.4, False],
+            [3, 6, np.nan, False],
+        ]
+    )
+
+
+def kept(**kwargs):
+    df, counts = sparsify_links(weighted(), ATTR_MAP, **kwargs)
+    return df.index.tolist(), counts
+
+
+def test_topk_keeps_the_heaviest_links_of_each_node():
+    # node 0 keeps 0-1, node 2 0-2, node 3 2-3, nodes 5 and 6 their only weighted link
+    assert kept(topk=1) == ([0, 1, 4, 5], {"dropped": 4, "backbone": 0})
+    assert kept(topk=2)[0] == [0, 1, 2, 4, 5, 6, 7]
+
+
+def test_quantile_and_min_weight():
+    # missing weights rank below every other link, and are left out of the quantile
+    assert kept(quantile=0.5)[0] == [0, 1, 4, 6]
+    assert kept(quantile=0.9)[0] == [0]
+    assert kept(minWeight=0.3)[0] == [0, 1, 4, 6]
+    assert kept(minWeight=0.3, topk=1)[0] == [0, 1, 4]
+
+
+def test_backbone_keeps_every_node_connected():
+    pytest.importorskip("scipy")
+    # a maximum spanning forest: 0-1 over its lighter repeat, 0-2 and 2-3, and 5-6 on its own.
+    # 3-6, with no weight, is the only link joining the two sets
+    assert kept(minWeight=0.85, backbone=True) == ([0, 1, 4, 5, 7], {"dropped": 3, "backbone": 4})
+    assert kept(backbone=True) == (list(range(8)), {"dropped": 0, "backbone": 0})
@@ -0,0 +1,32 @@
+import re
+import unicodedata
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from build_search import TOKEN_PATTERN, build_search_index
+from unicode_marks import MARK_RANGES, UNIDATA_VERSION, mark_ranges
+
+INDEX_HTML = Path(__file__).resolve().parent.parent / "src" / "index.html"
+
+
+def test_decomposed_accent_is_one_word():
+    # "café" written as "e" and a combining acute accent, as macOS and many exports write it
+    cafe = "café"
+    df = pd.DataFrame({"id": [0, 1], "title": [f"{cafe} society", "cafe racer"]})
+    index = build_search_index(df, [{"id": "title", "searchable": True}])
+    assert re.findall(TOKEN_PATTERN, f"{cafe} society") == [cafe, "society"]
+    assert index["postings"][index["tokens"].index(cafe)] == [0]
+    assert index["postings"][index["tokens"].index("cafe")] == [1]
+
+
+def test_index_html_splits_queries_the_same_way():
+    # TOKEN_PATTERN stands for this class of the query tokenizer in MP_APP.searchIndex
+    assert "/[\\p{L}\\p{N}\\p{M}_]+/gu" in INDEX_HTML.read_text(encoding="utf-8")
+
+
+@pytest.mark.skipif(unicodedata.unidata_version != UNIDATA_VERSION, reason="MARK_RANGES were generated for another unicode version")
+def test_mark_ranges_are_up_to_date():
+    # regenerate with: python src/unicode_marks.py
+    assert MARK_RANGES == mark_ranges()
@@ -0,0 +1,24 @@
+import io
+
+import pytest
+
+from build_thumbnails import build_thumbnails
+from fetch_cache import FetchCache
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def png(width: int, height: int) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_unreadable_images_are_failed(tmp_path, monkeypatch):
+    # a bomb over Pillow's pixel limit raises DecompressionBombError, not OSError
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    images = {"http://x/ok.png": png(10, 10), "http://x/bomb.png": png(100, 100), "http://x/notes.txt": b"not an image"}
+    (tmp_path / "data").mkdir()
+    thumbs = build_thumbnails(list(images), tmp_path / "data", FetchCache(tmp_path / "cache"), transport=images.__getitem__)
+    assert list(thumbs["images"]) == ["http://x/ok.png"]
+    assert sorted(thumbs["failed"]) == ["http://x/bomb.png", "http://x/notes.txt"]